@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Batch Model Builder
+Builds many variants of a primitive on the geometry worker pool for the
+create_batch tool, so a part family costs one MCP round-trip instead of one
+per variant.
+
+Variants come from an explicit list of parameter sets, a Cartesian sweep over
+value lists, or both (every listed variant is swept). Each worker builds its
+shape, optionally exports it, and hands the BREP bytes back; the server stores
+them straight into the model store's spill directory so a large catalogue does
+not have to fit in memory.
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from primitive_cache import PrimitiveCache, cache_key
+from sessions import export_filename
+from workers import WorkerPool, WorkerTimeout, build_model, worker_pool
+
+MAX_BATCH_VARIANTS = int(os.getenv("GENX_MCP_MAX_BATCH", "1000"))
+EXPORT_FORMATS = ("stl", "step")
+
+
+def expand_parameter_sets(parameters: Optional[Dict[str, Any]] = None,
+                          variants: Optional[List[Dict[str, Any]]] = None,
+                          sweep: Optional[Dict[str, List[Any]]] = None,
+                          max_variants: int = MAX_BATCH_VARIANTS) -> List[Dict[str, Any]]:
+    """Shared parameters, overridden by each variant, crossed with every sweep combination"""
+    variants = variants or [{}]
+    sweep = sweep or {}
+    for key, values in sweep.items():
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"Sweep values for '{key}' must be a non-empty list")
+
+    count = len(variants)
+    for values in sweep.values():
+        count *= len(values)
+    if count > max_variants:
+        raise ValueError(f"Batch of {count} variants exceeds the limit of {max_variants} (GENX_MCP_MAX_BATCH)")
+
+    keys = list(sweep)
+    return [{**(parameters or {}), **variant, **dict(zip(keys, combination))}
+            for variant in variants
+            for combination in itertools.product(*sweep.values())]
+
+
+def variant_names(template: str, parameter_sets: List[Dict[str, Any]]) -> List[str]:
+    """Format the name template with each variant's index and parameters"""
+    try:
+        names = [template.format(index=index, **params) for index, params in enumerate(parameter_sets)]
+    except (KeyError, IndexError, ValueError) as e:
+        raise ValueError(f"Invalid name template '{template}': {e}")
+    # Names double as export file names in the session directory
+    for name in names:
+        export_filename(name)
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Name template '{template}' gives duplicate names: {', '.join(duplicates[:5])}")
+    return names
+
+
+async def run_batch(primitive: str, parameter_sets: List[Dict[str, Any]], names: List[str], store,
+                    export_format: Optional[str] = None, export_dir: Optional[str] = None,
+                    pool: Optional[WorkerPool] = None,
+                    on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+                    cache: Optional[PrimitiveCache] = None) -> Dict[str, Any]:
+    """Build every variant on the pool and add the successful ones to the model store
+
+    Without an export, variants already in the cache are linked instead of built,
+    and identical variants within the batch are built once.
+    """
+    if export_format is not None and export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{export_format}', expected stl or step")
+    pool = pool or worker_pool
+    start = time.perf_counter()
+    completed = 0
+    # Submit no more than the pool can run, so each variant's timeout covers
+    # its build rather than its wait behind the rest of the batch
+    in_flight = asyncio.Semaphore(pool.max_workers)
+
+    builds: Dict[str, asyncio.Future] = {}
+    keys: Dict[str, str] = {}
+
+    async def build(params, export_path):
+        try:
+            async with in_flight:
+                return await pool.run(build_model, primitive, params, export_path, export_format)
+        except WorkerTimeout as e:
+            return {"error": str(e)}
+        except Exception as e:
+            # The worker itself died (e.g. a crash inside OpenCascade)
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    async def create(name, params):
+        nonlocal completed
+        export_path = os.path.join(export_dir, f"{name}.{export_format}") if export_format else None
+        key = None
+        if cache is not None and export_path is None:
+            try:
+                key = cache_key(primitive, params)
+            except ValueError:
+                pass  # reported by the worker like any other invalid variant
+        if key is not None and cache.link(key, name, store):
+            result = {"cached": True}
+        elif key is not None:
+            keys[name] = key
+            if key not in builds:
+                builds[key] = asyncio.ensure_future(build(params, None))
+            result = await builds[key]
+        else:
+            result = await build(params, export_path)
+        completed += 1
+        if on_progress is not None:
+            await on_progress(completed, len(names))
+        return result
+
+    results = await asyncio.gather(*(create(name, params) for name, params in zip(names, parameter_sets)))
+
+    created, failed = [], []
+    for name, params, result in zip(names, parameter_sets, results):
+        if "error" in result:
+            failed.append({"name": name, "parameters": params, "error": result["error"]})
+            continue
+        if "brep" in result:
+            blob = store.put_brep(name, result["brep"])
+            if name in keys:
+                cache.put(keys[name], blob)
+        created.append({"name": name, "parameters": params, "size_bytes": store.size_of(name),
+                        "export_path": result.get("export_path"), "cached": result.get("cached", False)})
+    return {"primitive": primitive, "created": created, "failed": failed,
+            "seconds": time.perf_counter() - start, "workers": pool.max_workers}
+
+
+def format_batch_result(result: Dict[str, Any]) -> str:
+    created, failed = result["created"], result["failed"]
+    total = len(created) + len(failed)
+    lines = [f"Created {len(created)}/{total} {result['primitive']} variants "
+             f"in {result['seconds']:.1f}s ({result['workers']} workers)"]
+    for item in created:
+        params = ", ".join(f"{key}={value}" for key, value in item["parameters"].items())
+        line = f"- {item['name']}: {params}"
+        if item["export_path"]:
+            line += f" -> {item['export_path']}"
+        elif item["cached"]:
+            line += " (cached)"
+        lines.append(line)
+    if failed:
+        lines.append("\nFailed:")
+        lines.extend(f"- {item['name']}: {item['error']}" for item in failed)
+    return "\n".join(lines)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+MCP Client Session Manager
+Keeps one MCP session open for the lifetime of an agent instead of one per
+task, reconnects when the connection drops, and lets callers issue several
+tool calls at once with a bound on how many are in flight.
+
+Works with the stdio server (spawned once) or the HTTP server
+(GENX_MCP_TRANSPORT=http in servers.py). A reconnect lands in a fresh
+server session with no models, so the create_* calls made so far are
+replayed before anything else runs.
+
+Each connection is held open by its own task: the SDK's transports use
+anyio cancel scopes, which must be entered and exited by the same task.
+"""
+
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import anyio
+
+MAX_IN_FLIGHT = int(os.getenv("GENX_MCP_CLIENT_MAX_IN_FLIGHT", "8"))
+RECONNECT_ATTEMPTS = int(os.getenv("GENX_MCP_CLIENT_RECONNECTS", "3"))
+RECONNECT_BACKOFF_SECONDS = float(os.getenv("GENX_MCP_CLIENT_BACKOFF", "0.5"))
+# Tools whose results live in the server session and are replayed after a reconnect
+STATEFUL_TOOLS = ("create_box", "create_cylinder", "create_flange", "create_batch")
+# JSON-RPC error code the SDK gives requests cut off by a closed connection
+CONNECTION_CLOSED = -32000
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """True for a dropped connection, False for errors the server returned"""
+    if isinstance(error, (ConnectionError, EOFError, anyio.ClosedResourceError,
+                          anyio.BrokenResourceError, anyio.EndOfStream)):
+        return True
+    if getattr(getattr(error, "error", None), "code", None) == CONNECTION_CLOSED:
+        return True
+    try:
+        import httpx
+        return isinstance(error, httpx.TransportError)
+    except ImportError:
+        return False
+
+
+def stdio_transport(server_path: str, command: str = "python3"):
+    """Transport factory that spawns the server script and talks to it over stdio"""
+    def open_transport():
+        from mcp import StdioServerParameters
+        from mcp.client.stdio import stdio_client
+        return stdio_client(StdioServerParameters(command=command, args=[server_path], env=None))
+    return open_transport
+
+
+def http_transport(url: str):
+    """Transport factory for a server running with GENX_MCP_TRANSPORT=http (e.g. http://host:8765/mcp)"""
+    def open_transport():
+        from mcp.client.streamable_http import streamablehttp_client
+        return streamablehttp_client(url)
+    return open_transport
+
+
+def _client_session(read_stream, write_stream):
+    from mcp import ClientSession
+    return ClientSession(read_stream, write_stream)
+
+
+def result_text(result) -> str:
+    """Text of a tool result's first content item"""
+    if result.content and len(result.content) > 0:
+        return result.content[0].text
+    return "No response"
+
+
+class MCPSessionManager:
+    """One long-lived MCP session with automatic reconnect and bounded concurrent calls"""
+
+    def __init__(self, open_transport: Callable[[], Any], max_in_flight: int = MAX_IN_FLIGHT,
+                 reconnect_attempts: int = RECONNECT_ATTEMPTS, backoff: float = RECONNECT_BACKOFF_SECONDS,
+                 session_factory: Callable[[Any, Any], Any] = _client_session):
+        self.open_transport = open_transport
+        self.session_factory = session_factory
+        self.max_in_flight = max_in_flight
+        self.reconnect_attempts = reconnect_attempts
+        self.backoff = backoff
+        self.session = None
+        self.generation = 0
+        self.stats = {"calls": 0, "reconnects": 0, "replayed": 0}
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._lock = asyncio.Lock()
+        self._stop: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Stateful calls so far, keyed by the model they create (latest arguments win)
+        self._journal: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+
+    async def __aenter__(self) -> "MCPSessionManager":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _hold_connection(self, ready: asyncio.Future, stop: asyncio.Event):
+        try:
+            async with self.open_transport() as streams:
+                async with self.session_factory(streams[0], streams[1]) as session:
+                    await session.initialize()
+                    ready.set_result(session)
+                    await stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                print(f"⚠️ MCP connection ended: {e}")
+        finally:
+            if not ready.done():
+                ready.set_exception(ConnectionError("MCP connection closed before initializing"))
+
+    async def _open(self):
+        ready = asyncio.get_running_loop().create_future()
+        self._stop = asyncio.Event()
+        self._task = asyncio.ensure_future(self._hold_connection(ready, self._stop))
+        self.session = await ready
+        self.generation += 1
+        if self.generation > 1:
+            self.stats["reconnects"] += 1
+            for name, arguments in list(self._journal.values()):
+                await self.session.call_tool(name, arguments)
+                self.stats["replayed"] += 1
+            print(f"🔌 Reconnected to MCP server, replayed {len(self._journal)} calls")
+
+    async def _close_connection(self):
+        self.session = None
+        if self._task is not None:
+            self._stop.set()
+            try:
+                await asyncio.wait_for(self._task, 5)
+            except (Exception, asyncio.TimeoutError):
+                pass  # the connection is already broken; nothing to flush
+            self._task = None
+
+    async def connect(self):
+        async with self._lock:
+            if self.session is None:
+                await self._open()
+
+    async def close(self):
+        async with self._lock:
+            await self._close_connection()
+
+    async def _drop(self, generation: int):
+        # Only the first caller to see a broken session tears it down
+        async with self._lock:
+            if self.generation == generation and self.session is not None:
+                await self._close_connection()
+
+    async def _request(self, description: str, operation: Callable[[Any], Awaitable[Any]]):
+        async with self._in_flight:
+            for attempt in range(self.reconnect_attempts + 1):
+                generation = self.generation
+                try:
+                    await self.connect()
+                    return await operation(self.session)
+                except Exception as e:
+                    if not is_connection_error(e) or attempt == self.reconnect_attempts:
+                        raise
+                    print(f"🔌 Connection lost during {description} ({e!r}), "
+                          f"reconnecting ({attempt + 1}/{self.reconnect_attempts})")
+                    await self._drop(generation)
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]):
+        """Call a tool, reconnecting (and replaying earlier models) if the connection dropped"""
+        result = await self._request(name, lambda session: session.call_tool(name, arguments))
+        self.stats["calls"] += 1
+        if name in STATEFUL_TOOLS and not getattr(result, "isError", False):
+            key = arguments.get("name") if name != "create_batch" else f"batch:{json.dumps(arguments, sort_keys=True)}"
+            self._journal.pop(key, None)
+            self._journal[key] = (name, arguments)
+        return result
+
+    async def call_many(self, calls: Sequence[Tuple[str, Dict[str, Any]]], return_exceptions: bool = False) -> List[Any]:
+        """Issue calls concurrently, at most max_in_flight at a time; results in call order"""
+        return await asyncio.gather(*(self.call_tool(name, arguments) for name, arguments in calls),
+                                    return_exceptions=return_exceptions)
+
+    async def list_tools(self):
+        return await self._request("list_tools", lambda session: session.list_tools())
@@ -6,52 +6,61 @@ Demonstrates the MCP CAD server by creating a flange and exporting it.
 
 import asyncio
 import json
-from typing import List, Dict, Any
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+import os
+from typing import List, Dict, Any, Tuple
+
+from client_sessions import MCPSessionManager, MAX_IN_FLIGHT, http_transport, result_text, stdio_transport
+
+SERVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "servers.py")
 
 class CADAgentClient:
     """Client for interacting with the CAD Geometry MCP server"""
     
-    def __init__(self):
-        self.session = None
-        
-    async def connect(self, server_path: str):
-        """Connect to the MCP server"""
-        server_params = StdioServerParameters(
-            command="python3",
-            args=[server_path],
-            env=None
-        )
-        
-        self.session = await stdio_client(server_params).__aenter__()
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT):
+        self.max_in_flight = max_in_flight
+        self.manager = None
+        
+    async def connect(self, server: str = SERVER_PATH):
+        """Connect to the MCP server: a script path (stdio) or an http(s):// URL"""
+        if server.startswith(("http://", "https://")):
+            transport = http_transport(server)
+        else:
+            transport = stdio_transport(server)
         
-        # Initialize the session
-        await self.session.initialize()
+        # One session for the client's lifetime; reconnects automatically
+        self.manager = MCPSessionManager(transport, max_in_flight=self.max_in_flight)
+        await self.manager.connect()
         
     async def disconnect(self):
         """Disconnect from the MCP server"""
-        if self.session:
-            await self.session.__aexit__(None, None, None)
+        if self.manager:
+            await self.manager.close()
+            self.manager = None
             
     async def call_tool(self, name: str, arguments: Dict[str, Any]) -> str:
         """Call a tool on the MCP server"""
-        if not self.session:
+        if not self.manager:
             raise RuntimeError("Not connected to server")
             
-        result = await self.session.call_tool(name, arguments)
+        result = await self.manager.call_tool(name, arguments)
         
         # Extract text content from the result
-        if result.content and len(result.content) > 0:
-            return result.content[0].text
-        return "No response"
+        return result_text(result)
+        
+    async def call_tools(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Call several tools concurrently (bounded by max_in_flight); results in call order"""
+        if not self.manager:
+            raise RuntimeError("Not connected to server")
+            
+        results = await self.manager.call_many(calls)
+        return [result_text(result) for result in results]
         
     async def list_available_tools(self) -> List[str]:
         """Get list of available tools"""
-        if not self.session:
+        if not self.manager:
             raise RuntimeError("Not connected to server")
             
-        tools = await self.session.list_tools()
+        tools = await self.manager.list_tools()
         return [tool.name for tool in tools.tools]
 
 class FlangeGenerator:
@@ -99,15 +108,10 @@ class FlangeGenerator:
         if formats is None:
             formats = ['stl', 'step']
             
-        results = []
-        for fmt in formats:
-            result = await self.client.call_tool('export_model', {
-                'name': name,
-                'format': fmt
-            })
-            results.append(result)
-            
-        return results
+        # All formats are exported concurrently over the one session
+        return await self.client.call_tools([
+            ('export_model', {'name': name, 'format': fmt}) for fmt in formats
+        ])
         
     async def get_properties(self, name: str) -> Dict[str, Any]:
         """Get mass properties of the flange"""
@@ -121,19 +125,13 @@ class FlangeGenerator:
         except json.JSONDecodeError:
             return {"error": result}
 
-async def demo_basic_operations():
+async def demo_basic_operations(client: CADAgentClient):
     """Demonstrate basic CAD operations"""
     
     print("🛠️  CAD Agent Demo - Basic Operations")
     print("=" * 50)
     
-    client = CADAgentClient()
-    
     try:
-        # Connect to server
-        print("📡 Connecting to CAD Geometry Server...")
-        await client.connect("servers/cad_geometry_server.py")
-        
         # List available tools
         print("\n🔧 Available Tools:")
         tools = await client.list_available_tools()
@@ -169,32 +167,25 @@ async def demo_basic_operations():
         # Export models
         print("\n💾 Exporting models...")
         
-        for model_name in ['test_box', 'test_cylinder']:
-            result = await client.call_tool('export_model', {
-                'name': model_name,
-                'format': 'stl'
-            })
+        results = await client.call_tools([
+            ('export_model', {'name': model_name, 'format': 'stl'})
+            for model_name in ['test_box', 'test_cylinder']
+        ])
+        for result in results:
             print(f"Export: {result}")
         
     except Exception as e:
         print(f"❌ Error: {e}")
-        
-    finally:
-        await client.disconnect()
 
-async def demo_flange_generation():
+async def demo_flange_generation(client: CADAgentClient):
     """Demonstrate advanced flange generation"""
     
     print("\n🔩 CAD Agent Demo - Flange Generation")
     print("=" * 50)
     
-    client = CADAgentClient()
     flange_gen = FlangeGenerator(client)
     
     try:
-        # Connect to server
-        await client.connect("servers/cad_geometry_server.py")
-        
         # Define flange specifications
         flange_specs = {
             'outer_diameter': 100,     # 100mm outer diameter
@@ -237,17 +228,13 @@ async def demo_flange_generation():
         
     except Exception as e:
         print(f"❌ Error: {e}")
-        
-    finally:
-        await client.disconnect()
 
-async def demo_batch_operations():
+async def demo_batch_operations(client: CADAgentClient):
     """Demonstrate batch operations for multiple flanges"""
     
     print("\n🏭 CAD Agent Demo - Batch Operations")
     print("=" * 50)
     
-    client = CADAgentClient()
     flange_gen = FlangeGenerator(client)
     
     # Define multiple flange sizes
@@ -288,11 +275,9 @@ async def demo_batch_operations():
     ]
     
     try:
-        await client.connect("servers/cad_geometry_server.py")
-        
         print("🏭 Creating flange series...")
         
-        for flange_data in flange_series:
+        async def build_flange(flange_data):
             name = flange_data['name']
             specs = flange_data['specs']
             
@@ -309,6 +294,9 @@ async def demo_batch_operations():
             # Export as STL
             export_results = await flange_gen.export_flange(name, ['stl'])
             print(f"   ✅ {export_results[0]}")
+            
+        # The flanges are independent, so their call chains run concurrently
+        await asyncio.gather(*(build_flange(flange_data) for flange_data in flange_series))
         
         # List all created models
         print("\n📋 Final model inventory:")
@@ -317,9 +305,6 @@ async def demo_batch_operations():
         
     except Exception as e:
         print(f"❌ Error: {e}")
-        
-    finally:
-        await client.disconnect()
 
 async def main():
     """Main demo function"""
@@ -328,10 +313,17 @@ async def main():
     print("Using MCP (Model Context Protocol) + CadQuery + LLM Architecture")
     print("=" * 70)
     
-    # Run all demos
-    await demo_basic_operations()
-    await demo_flange_generation() 
-    await demo_batch_operations()
+    # Run all demos over one session
+    client = CADAgentClient()
+    print("📡 Connecting to CAD Geometry Server...")
+    await client.connect(os.getenv("GENX_MCP_SERVER", SERVER_PATH))
+    
+    try:
+        await demo_basic_operations(client)
+        await demo_flange_generation(client)
+        await demo_batch_operations(client)
+    finally:
+        await client.disconnect()
     
     print("\n" + "=" * 70)
     print("✨ Demo completed! Check the output files in the temporary directory.")
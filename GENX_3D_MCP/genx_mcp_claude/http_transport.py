@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+HTTP Transports
+Serves the CAD MCP server over the network so one long-lived process (with
+CadQuery imported once and a warm worker pool) handles many agent sessions,
+instead of every client spawning its own stdio server.
+
+Two transports are mounted on one Starlette app:
+- Streamable HTTP at /mcp (MCP 2025-03-26 transport, sessions via the
+  Mcp-Session-Id header)
+- HTTP+SSE at /sse with messages posted to /messages/ (older clients)
+
+Each connection is its own MCP session and gets its own model namespace
+(see sessions.py).
+"""
+
+import contextlib
+import os
+from typing import AsyncIterator
+
+from mcp.server import Server
+from mcp.server.sse import SseServerTransport
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+
+HOST = os.getenv("GENX_MCP_HOST", "127.0.0.1")
+PORT = int(os.getenv("GENX_MCP_PORT", "8765"))
+
+
+def create_http_app(app: Server, health=None) -> Starlette:
+    """Starlette app exposing `app` over streamable HTTP and SSE; `health` returns extra /health fields"""
+    sse = SseServerTransport("/messages/")
+    session_manager = StreamableHTTPSessionManager(app=app, event_store=None, json_response=False)
+
+    async def handle_sse(request):
+        async with sse.connect_sse(request.scope, request.receive, request._send) as (read_stream, write_stream):
+            await app.run(read_stream, write_stream, app.create_initialization_options())
+        return Response()
+
+    async def handle_streamable_http(scope, receive, send):
+        await session_manager.handle_request(scope, receive, send)
+
+    async def handle_health(request):
+        return JSONResponse({"status": "ok", **(health() if health else {})})
+
+    @contextlib.asynccontextmanager
+    async def lifespan(starlette_app) -> AsyncIterator[None]:
+        async with session_manager.run():
+            print(f"📡 MCP HTTP transports ready on http://{HOST}:{PORT} (/mcp, /sse)")
+            yield
+
+    return Starlette(
+        routes=[
+            Mount("/mcp", app=handle_streamable_http),
+            Route("/sse", endpoint=handle_sse, methods=["GET"]),
+            Mount("/messages/", app=sse.handle_post_message),
+            Route("/health", endpoint=handle_health, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+async def serve_http(app: Server, health=None, host: str = HOST, port: int = PORT):
+    import uvicorn
+
+    config = uvicorn.Config(create_http_app(app, health), host=host, port=port, log_level="info")
+    await uvicorn.Server(config).serve()
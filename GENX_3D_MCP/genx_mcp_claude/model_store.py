@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Bounded Model Store
+Keeps created models in memory up to a byte and count budget and spills the
+least recently used ones to BREP files, reloading them transparently on access.
+
+Each model's size is measured by serializing its shape to BREP (the same
+bytes a spill writes). That is a proxy for the OpenCascade memory it holds.
+Spilled models stay listed and come back on the next access as a Workplane
+holding the reloaded shape.
+
+Geometry is content-addressed: names point at blobs keyed by the hash of their
+BREP, so identical models stored under different names share one shape in
+memory and one file on disk. Stored models are treated as immutable; storing
+under a name rebinds only that name (copy-on-write), and a blob is dropped
+once no name refers to it.
+"""
+
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import cadquery as cq
+
+MAX_MODEL_BYTES = int(float(os.getenv("GENX_MCP_MAX_MODEL_MB", "512")) * 2**20)
+MAX_MODELS = int(os.getenv("GENX_MCP_MAX_MODELS", "100"))
+
+
+def shape_of(model) -> cq.Shape:
+    """The shape a model exports: its single shape, or a compound of all of them"""
+    if isinstance(model, cq.Shape):
+        return model
+    shapes = [value for value in model.vals() if isinstance(value, cq.Shape)]
+    if len(shapes) == 1:
+        return shapes[0]
+    return cq.Compound.makeCompound(shapes)
+
+
+def brep_bytes(model) -> bytes:
+    buffer = io.BytesIO()
+    shape_of(model).exportBrep(buffer)
+    return buffer.getvalue()
+
+
+def blob_id(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class ModelStore:
+    """Name -> model mapping with LRU spill to disk (used like the old current_models dict)"""
+
+    def __init__(self, spill_dir: str, max_bytes: int = MAX_MODEL_BYTES, max_models: int = MAX_MODELS):
+        self.spill_dir = Path(spill_dir)
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_models = max_models
+        # Every name has an entry pointing at a blob; every blob counts the names using it
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._blobs: Dict[str, Dict[str, Any]] = {}
+        # Blobs with a live model, most recent last
+        self._resident: "OrderedDict[str, Any]" = OrderedDict()
+        self.resident_bytes = 0
+        self.stats = {"spills": 0, "reloads": 0, "shared": 0}
+        self._lock = threading.RLock()
+
+    def _spill_path(self, blob: str) -> Path:
+        return self.spill_dir / f"{blob}.brep"
+
+    def _bind(self, name: str, blob: str):
+        if name in self._entries:
+            if self._entries[name]["blob"] == blob:
+                return
+            self._discard(name)
+        self._entries[name] = {"blob": blob, "created_at": time.time(), "last_used": time.time()}
+        self._blobs[blob]["refs"] += 1
+        if self._blobs[blob]["refs"] > 1:
+            self.stats["shared"] += 1
+
+    def __setitem__(self, name: str, model):
+        data = brep_bytes(model)
+        blob = blob_id(data)
+        with self._lock:
+            if blob not in self._blobs:
+                self._blobs[blob] = {"size_bytes": len(data), "refs": 0}
+                self._resident[blob] = model
+                self.resident_bytes += len(data)
+            self._bind(name, blob)
+            self._evict(keep=blob)
+
+    def put_brep(self, name: str, data: bytes) -> str:
+        """Add a model already serialized to BREP (e.g. by a worker) as spilled; it loads on first access"""
+        blob = blob_id(data)
+        with self._lock:
+            if blob not in self._blobs:
+                self._spill_path(blob).write_bytes(data)
+                self._blobs[blob] = {"size_bytes": len(data), "refs": 0}
+            self._bind(name, blob)
+        return blob
+
+    def link(self, name: str, blob: str) -> bool:
+        """Point name at existing geometry without copying it; False if the blob is gone"""
+        with self._lock:
+            if blob not in self._blobs:
+                return False
+            self._bind(name, blob)
+            return True
+
+    def blob_of(self, name: str) -> str:
+        return self._entries[name]["blob"]
+
+    def size_of(self, name: str) -> int:
+        return self._blobs[self._entries[name]["blob"]]["size_bytes"]
+
+    def brep_path(self, name: str) -> Path:
+        """The model's BREP file, written first if it has never been spilled (for worker processes)"""
+        with self._lock:
+            blob = self._entries[name]["blob"]
+            path = self._spill_path(blob)
+            if not path.exists():
+                path.write_bytes(brep_bytes(self._resident[blob]))
+            return path
+
+    def __getitem__(self, name: str):
+        with self._lock:
+            entry = self._entries[name]
+            entry["last_used"] = time.time()
+            blob = entry["blob"]
+            if blob in self._resident:
+                self._resident.move_to_end(blob)
+                return self._resident[blob]
+            path = self._spill_path(blob)
+            if not path.exists():
+                raise KeyError(f"Spilled model '{name}' is missing its BREP file {path}")
+            # The file is kept: models are never modified in place, so it
+            # stays valid if this model is evicted again
+            model = cq.Workplane("XY").newObject([cq.Shape.importBrep(str(path))])
+            self._resident[blob] = model
+            self.resident_bytes += self._blobs[blob]["size_bytes"]
+            self.stats["reloads"] += 1
+            print(f"📥 Reloaded model '{name}' from disk")
+            self._evict(keep=blob)
+            return model
+
+    def __delitem__(self, name: str):
+        with self._lock:
+            if name not in self._entries:
+                raise KeyError(name)
+            self._discard(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def keys(self) -> List[str]:
+        return list(self._entries)
+
+    def get(self, name: str, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def is_resident(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry["blob"] in self._resident
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Per-model size, location and sharing, without loading anything"""
+        with self._lock:
+            return [{"name": name, "size_bytes": self._blobs[entry["blob"]]["size_bytes"],
+                     "last_used": entry["last_used"], "resident": entry["blob"] in self._resident,
+                     "shared_with": self._blobs[entry["blob"]]["refs"] - 1}
+                    for name, entry in self._entries.items()]
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"models": len(self._entries), "unique_models": len(self._blobs),
+                    "resident_models": len(self._resident), "resident_bytes": self.resident_bytes,
+                    "max_bytes": self.max_bytes, "max_models": self.max_models, **self.stats}
+
+    def _discard(self, name: str):
+        blob = self._entries.pop(name)["blob"]
+        info = self._blobs[blob]
+        info["refs"] -= 1
+        if info["refs"] > 0:
+            return
+        del self._blobs[blob]
+        if self._resident.pop(blob, None) is not None:
+            self.resident_bytes -= info["size_bytes"]
+        self._spill_path(blob).unlink(missing_ok=True)
+
+    def _evict(self, keep: Optional[str] = None):
+        # The model being used stays resident even if it alone exceeds the budget
+        while (self.resident_bytes > self.max_bytes or len(self._resident) > self.max_models) and \
+                any(blob != keep for blob in self._resident):
+            blob = next(blob for blob in self._resident if blob != keep)
+            model = self._resident.pop(blob)
+            path = self._spill_path(blob)
+            if not path.exists():
+                path.write_bytes(brep_bytes(model))
+            size = self._blobs[blob]["size_bytes"]
+            self.resident_bytes -= size
+            self.stats["spills"] += 1
+            name = next((name for name, entry in self._entries.items() if entry["blob"] == blob), blob)
+            print(f"💾 Spilled model '{name}' to disk ({size} bytes)")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Primitive Cache
+Memoizes create_box / create_cylinder / create_flange (and create_batch
+variants) by primitive and canonicalized parameters. A hit binds the new name
+to the geometry already in the model store instead of rebuilding it, so
+agents recreating the same standard part get it back immediately and the
+aliases share one shape (see ModelStore's copy-on-write blobs).
+
+Entries point at store blobs; an entry whose blob has since been dropped
+(every name using it deleted or overwritten) is a miss.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict
+
+from primitives import canonical_parameters
+
+PRIMITIVE_CACHE_SIZE = int(os.getenv("GENX_MCP_PRIMITIVE_CACHE_SIZE", "1024"))
+
+
+def cache_key(primitive: str, params: Dict[str, Any]) -> str:
+    """Stable key for a primitive build; ValueError if the parameters are incomplete"""
+    return json.dumps([primitive, canonical_parameters(primitive, params)], sort_keys=True)
+
+
+class PrimitiveCache:
+    """LRU map of cache_key -> model store blob"""
+
+    def __init__(self, store, max_entries: int = PRIMITIVE_CACHE_SIZE):
+        self.store = store
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def link(self, key: str, name: str, store=None) -> bool:
+        """Bind name (in store, e.g. a session namespace of the cache's store) to the cached geometry; False on a miss"""
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None and (self.store if store is None else store).link(name, blob):
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return True
+            self._entries.pop(key, None)
+            self.stats["misses"] += 1
+            return False
+
+    def put(self, key: str, blob: str):
+        with self._lock:
+            self._entries[key] = blob
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "max_entries": self.max_entries, **self.stats}
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+CAD Primitives
+Model construction and export shared by the MCP tool handlers and the batch
+worker processes. Nothing here imports mcp or prints to stdout, so it is safe
+to run inside a worker whose stdout is the MCP stdio transport.
+"""
+
+import itertools
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cadquery as cq
+from cadquery import exporters
+
+
+class Feature:
+    """One operation in a CADModelBuilder feature tree, with the shape it last produced"""
+
+    def __init__(self, feature_id: str, kind: str, params: Dict[str, Any], inputs: List[str]):
+        self.id = feature_id
+        self.kind = kind
+        self.params = params
+        self.inputs = inputs
+        self.result: Optional[cq.Workplane] = None
+
+
+def _base(inputs: List[cq.Workplane]) -> cq.Workplane:
+    return inputs[0] if inputs else cq.Workplane("XY")
+
+
+# Feature kind -> operation on the input workplanes (the previous feature, or both sides of a boolean)
+FEATURE_OPERATIONS: Dict[str, Callable[[List[cq.Workplane], Dict[str, Any]], cq.Workplane]] = {
+    "box": lambda inputs, p: _base(inputs).box(p["length"], p["width"], p["height"]),
+    "cylinder": lambda inputs, p: _base(inputs).cylinder(p["height"], p["radius"]),
+    "hole": lambda inputs, p: _base(inputs).faces(">Z").workplane().hole(p["diameter"]),
+    "fillet": lambda inputs, p: _base(inputs).edges(p["edges"]).fillet(p["radius"]),
+    "translate": lambda inputs, p: _base(inputs).translate((p["x"], p["y"], p["z"])),
+    "union": lambda inputs, p: inputs[0].union(inputs[1]),
+    "cut": lambda inputs, p: inputs[0].cut(inputs[1]),
+}
+
+
+class CADModelBuilder:
+    """Builder pattern for CAD model construction
+
+    Operations form a feature tree. Each feature caches the shape it produced,
+    and update() recomputes only the edited feature and the features that
+    depend on it. Operations chain on the previous feature; new_branch() and
+    from_feature() start other branches, which union/cut join.
+    """
+
+    def __init__(self):
+        self.features: "OrderedDict[str, Feature]" = OrderedDict()
+        self.head: Optional[str] = None
+        self.stats = {"computed": 0}
+        self._ids = itertools.count(1)
+
+    @property
+    def operations(self) -> List[Tuple[str, Dict[str, Any]]]:
+        return [(feature.kind, dict(feature.params)) for feature in self.features.values()]
+
+    @property
+    def workplane(self) -> cq.Workplane:
+        return self.build()
+
+    def _add(self, kind: str, params: Dict[str, Any], inputs: List[str], name: Optional[str]) -> 'CADModelBuilder':
+        feature_id = name or f"{kind}{next(self._ids)}"
+        if feature_id in self.features:
+            raise ValueError(f"Feature '{feature_id}' already exists")
+        for input_id in inputs:
+            if input_id not in self.features:
+                raise ValueError(f"Unknown feature '{input_id}'")
+        self.features[feature_id] = Feature(feature_id, kind, params, inputs)
+        self.head = feature_id
+        return self
+
+    def _chain(self) -> List[str]:
+        return [self.head] if self.head else []
+
+    def add_box(self, length: float, width: float, height: float, name: Optional[str] = None) -> 'CADModelBuilder':
+        return self._add("box", {"length": length, "width": width, "height": height}, self._chain(), name)
+
+    def add_cylinder(self, radius: float, height: float, name: Optional[str] = None) -> 'CADModelBuilder':
+        return self._add("cylinder", {"radius": radius, "height": height}, self._chain(), name)
+
+    def add_hole(self, diameter: float, name: Optional[str] = None) -> 'CADModelBuilder':
+        """Through hole at the centre of the top face"""
+        return self._add("hole", {"diameter": diameter}, self._chain(), name)
+
+    def add_fillet(self, radius: float, edges: str = "|Z", name: Optional[str] = None) -> 'CADModelBuilder':
+        return self._add("fillet", {"radius": radius, "edges": edges}, self._chain(), name)
+
+    def add_translate(self, x: float = 0, y: float = 0, z: float = 0, name: Optional[str] = None) -> 'CADModelBuilder':
+        return self._add("translate", {"x": x, "y": y, "z": z}, self._chain(), name)
+
+    def add_union(self, other: str, name: Optional[str] = None) -> 'CADModelBuilder':
+        return self._add("union", {}, self._chain() + [other], name)
+
+    def add_cut(self, tool: str, name: Optional[str] = None) -> 'CADModelBuilder':
+        return self._add("cut", {}, self._chain() + [tool], name)
+
+    def new_branch(self) -> 'CADModelBuilder':
+        """The next operation starts a new solid instead of chaining on the last one"""
+        self.head = None
+        return self
+
+    def from_feature(self, feature_id: str) -> 'CADModelBuilder':
+        """The next operation chains on feature_id (branching the tree there)"""
+        if feature_id not in self.features:
+            raise ValueError(f"Unknown feature '{feature_id}'")
+        self.head = feature_id
+        return self
+
+    def dependents(self, feature_id: str) -> List[str]:
+        """Features downstream of feature_id, in build order"""
+        # Inputs always precede a feature, so insertion order is a topological order
+        affected, result = {feature_id}, []
+        for feature in self.features.values():
+            if feature.id not in affected and affected.intersection(feature.inputs):
+                affected.add(feature.id)
+                result.append(feature.id)
+        return result
+
+    def update(self, feature_id: str, **params) -> 'CADModelBuilder':
+        """Change a feature's parameters; it and its dependents are recomputed on the next build"""
+        feature = self.features[feature_id]
+        unknown = set(params) - set(feature.params)
+        if unknown:
+            raise ValueError(f"Feature '{feature_id}' ({feature.kind}) has no parameter {', '.join(sorted(unknown))}")
+        feature.params.update(params)
+        for stale in [feature_id] + self.dependents(feature_id):
+            self.features[stale].result = None
+        return self
+
+    def evaluate(self, feature_id: str) -> cq.Workplane:
+        """Shape of feature_id, computing it and any stale features it depends on"""
+        # Collect the stale ancestors without recursing, so long chains of
+        # operations cannot hit the recursion limit
+        needed, stack = set(), [feature_id]
+        while stack:
+            current = self.features[stack.pop()]
+            if current.result is None and current.id not in needed:
+                needed.add(current.id)
+                stack.extend(current.inputs)
+        # Insertion order is a topological order, so inputs are computed first
+        for feature in self.features.values():
+            if feature.id in needed:
+                inputs = [self.features[input_id].result for input_id in feature.inputs]
+                feature.result = FEATURE_OPERATIONS[feature.kind](inputs, feature.params)
+                self.stats["computed"] += 1
+        return self.features[feature_id].result
+
+    def build(self, feature_id: Optional[str] = None) -> cq.Workplane:
+        feature_id = feature_id or self.head
+        if feature_id is None:
+            return cq.Workplane("XY")
+        return self.evaluate(feature_id)
+
+
+class CADExporter:
+    """Strategy pattern for different export formats"""
+
+    @staticmethod
+    def export_stl(model: cq.Workplane, filepath: str) -> bool:
+        try:
+            exporters.export(model, filepath, exportType=exporters.ExportTypes.STL)
+            return True
+        except Exception as e:
+            print(f"STL export failed: {e}", file=sys.stderr)
+            return False
+
+    @staticmethod
+    def export_step(model: cq.Workplane, filepath: str) -> bool:
+        try:
+            exporters.export(model, filepath, exportType=exporters.ExportTypes.STEP)
+            return True
+        except Exception as e:
+            print(f"STEP export failed: {e}", file=sys.stderr)
+            return False
+
+    @staticmethod
+    def export(model: cq.Workplane, filepath: str, export_format: str) -> bool:
+        if export_format == "stl":
+            return CADExporter.export_stl(model, filepath)
+        if export_format == "step":
+            return CADExporter.export_step(model, filepath)
+        return False
+
+
+# Primitive name -> parameter name -> (type, default); None means required
+PARAMETERS: Dict[str, Dict[str, Tuple[type, Any]]] = {
+    "box": {"length": (float, None), "width": (float, None), "height": (float, None)},
+    "cylinder": {"radius": (float, None), "height": (float, None)},
+    "flange": {"outer_diameter": (float, None), "inner_diameter": (float, None), "thickness": (float, None),
+               "bolt_circle_diameter": (float, None), "bolt_hole_diameter": (float, None), "num_bolts": (int, 6)},
+}
+
+
+def canonical_parameters(primitive: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """The primitive's parameters with defaults applied and types normalized (10, 10.0 and "10" agree)"""
+    if primitive not in PARAMETERS:
+        raise ValueError(f"Unknown primitive '{primitive}', expected one of {', '.join(PARAMETERS)}")
+    canonical = {}
+    for key, (kind, default) in PARAMETERS[primitive].items():
+        if key not in params and default is None:
+            raise ValueError(f"Missing parameter '{key}' for {primitive}")
+        try:
+            canonical[key] = kind(params.get(key, default))
+        except (TypeError, ValueError):
+            raise ValueError(f"Parameter '{key}' for {primitive} must be a number, got {params[key]!r}")
+    return canonical
+
+
+def build_box(params: Dict[str, Any]) -> cq.Workplane:
+    return CADModelBuilder().add_box(params["length"], params["width"], params["height"]).build()
+
+
+def build_cylinder(params: Dict[str, Any]) -> cq.Workplane:
+    return CADModelBuilder().add_cylinder(params["radius"], params["height"]).build()
+
+
+def build_flange(params: Dict[str, Any]) -> cq.Workplane:
+    outer_d = params["outer_diameter"]
+    inner_d = params["inner_diameter"]
+    bolt_circle_d = params["bolt_circle_diameter"]
+
+    # Validation
+    if inner_d >= outer_d:
+        raise ValueError("Inner diameter must be less than outer diameter")
+    if bolt_circle_d >= outer_d:
+        raise ValueError("Bolt circle diameter must be less than outer diameter")
+
+    return (cq.Workplane("XY")
+            .circle(outer_d/2)
+            .circle(inner_d/2)  # Inner hole
+            .extrude(params["thickness"])
+            .faces(">Z")  # Top face
+            .workplane()
+            .polarArray(bolt_circle_d/2, 0, 360, params["num_bolts"])
+            .circle(params["bolt_hole_diameter"]/2)
+            .cutThruAll())
+
+
+# Primitive name -> builder taking canonical parameters
+PRIMITIVES: Dict[str, Callable[[Dict[str, Any]], cq.Workplane]] = {
+    "box": build_box,
+    "cylinder": build_cylinder,
+    "flange": build_flange,
+}
+
+
+def build_primitive(primitive: str, params: Dict[str, Any]) -> cq.Workplane:
+    """Build a primitive; ValueError for unknown primitives or invalid dimensions"""
+    return PRIMITIVES[primitive](canonical_parameters(primitive, params))
@@ -39,53 +39,28 @@ except ImportError as e:
     print("Install with: conda install -c conda-forge cadquery")
     exit(1)
 
-class CADModelBuilder:
-    """Builder pattern for CAD model construction"""
-    
-    def __init__(self):
-        self.workplane = cq.Workplane("XY")
-        self.operations = []
-        
-    def add_box(self, length: float, width: float, height: float) -> 'CADModelBuilder':
-        self.operations.append(("box", {"length": length, "width": width, "height": height}))
-        self.workplane = self.workplane.box(length, width, height)
-        return self
-        
-    def add_cylinder(self, radius: float, height: float) -> 'CADModelBuilder':
-        self.operations.append(("cylinder", {"radius": radius, "height": height}))
-        self.workplane = self.workplane.cylinder(height, radius)
-        return self
-        
-    def build(self) -> cq.Workplane:
-        return self.workplane
+from model_store import ModelStore
+from primitive_cache import PrimitiveCache, cache_key
+from sessions import ModelNamespace, SessionNamespaces, export_filename
+from workers import WorkerTimeout, build_model, export_brep, worker_pool
+import batch
 
-class CADExporter:
-    """Strategy pattern for different export formats"""
-    
-    @staticmethod
-    def export_stl(model: cq.Workplane, filepath: str) -> bool:
-        try:
-            exporters.export(model, filepath, exportType=exporters.ExportTypes.STL)
-            return True
-        except Exception as e:
-            print(f"STL export failed: {e}")
-            return False
-            
-    @staticmethod
-    def export_step(model: cq.Workplane, filepath: str) -> bool:
-        try:
-            exporters.export(model, filepath, exportType=exporters.ExportTypes.STEP)
-            return True
-        except Exception as e:
-            print(f"STEP export failed: {e}")
-            return False
-
-# Global model storage
-current_models: Dict[str, cq.Workplane] = {}
+# Global model storage, bounded by GENX_MCP_MAX_MODEL_MB / GENX_MCP_MAX_MODELS;
+# least recently used models are spilled to BREP files and reloaded on access.
+# Geometry tools build in worker processes (workers.py) and store models as BREP,
+# so the loop serving stdio never runs CadQuery itself
 temp_dir = tempfile.mkdtemp()
+current_models = ModelStore(os.path.join(temp_dir, "spill"))
+# Identical create_* calls under different names share one cached shape
+primitive_cache = PrimitiveCache(current_models)
+# Each session (the stdio client, or every SSE/HTTP connection) sees only its own model names
+session_namespaces = SessionNamespaces(current_models)
 
 print(f"📁 Temporary directory: {temp_dir}")
 
+# stdio (one client per process) or http (streamable HTTP + SSE, many sessions per process)
+TRANSPORT = os.getenv("GENX_MCP_TRANSPORT", "stdio").lower()
+
 app = Server("cad-geometry-server")
 
 @app.list_tools()
@@ -136,6 +111,24 @@ async def handle_list_tools() -> List[Tool]:
                 "required": ["name", "outer_diameter", "inner_diameter", "thickness", "bolt_circle_diameter", "bolt_hole_diameter"],
             },
         ),
+        Tool(
+            name="create_batch",
+            description=("Create many variants of a primitive in one call, built in parallel. Variants are an explicit "
+                         "list of parameter sets and/or a Cartesian sweep of value lists over shared parameters"),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "primitive": {"type": "string", "enum": ["box", "cylinder", "flange"], "description": "Primitive to build"},
+                    "parameters": {"type": "object", "description": "Parameters shared by every variant"},
+                    "variants": {"type": "array", "items": {"type": "object"}, "description": "Explicit parameter sets (override shared parameters)"},
+                    "sweep": {"type": "object", "additionalProperties": {"type": "array"},
+                              "description": "Parameter name -> list of values; every combination is built for each variant"},
+                    "name_template": {"type": "string", "description": "Model name template using {index} and parameter names, default '<primitive>_{index:03d}'"},
+                    "export_format": {"type": "string", "enum": ["stl", "step"], "description": "Also export every variant (optional)"},
+                },
+                "required": ["primitive"],
+            },
+        ),
         Tool(
             name="export_model",
             description="Export model to file",
@@ -151,7 +144,7 @@ async def handle_list_tools() -> List[Tool]:
         ),
         Tool(
             name="list_models",
-            description="List all current models in memory",
+            description="List all current models (in memory or spilled to disk) with their sizes",
             inputSchema={
                 "type": "object",
                 "properties": {},
@@ -159,12 +152,56 @@ async def handle_list_tools() -> List[Tool]:
         ),
     ]
 
+async def report_progress(progress: float, total: Optional[float] = None):
+    """Send an MCP progress notification, if the client asked for them"""
+    try:
+        context = app.request_context
+    except LookupError:
+        return
+    token = getattr(context.meta, "progressToken", None) if context.meta else None
+    if token is not None:
+        await context.session.send_progress_notification(token, progress, total)
+
+def session_models() -> ModelNamespace:
+    """The calling session's models"""
+    try:
+        session = app.request_context.session
+    except LookupError:
+        session = app  # outside a request
+    return session_namespaces.for_session(session)
+
+def session_dir(models: ModelNamespace) -> str:
+    """Per-session directory for exported files"""
+    path = os.path.join(temp_dir, models.prefix.rstrip("/"))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+async def build_in_worker(primitive: str, arguments: Dict[str, Any], models: ModelNamespace) -> Optional[str]:
+    """Build a primitive on the worker pool (or reuse an identical one) and store it; returns the error, if any"""
+    params = {key: value for key, value in arguments.items() if key != "name"}
+    try:
+        key = cache_key(primitive, params)
+    except ValueError as e:
+        return str(e)
+    if primitive_cache.link(key, arguments["name"], models):
+        print(f"♻️ Reused cached {primitive} geometry for '{arguments['name']}'")
+        return None
+    try:
+        outcome = await worker_pool.run(build_model, primitive, params, on_progress=report_progress)
+    except WorkerTimeout as e:
+        return str(e)
+    if "error" in outcome:
+        return outcome["error"]
+    primitive_cache.put(key, models.put_brep(arguments["name"], outcome["brep"]))
+    return None
+
 @app.call_tool()
 async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
     """Handle tool calls"""
     
     try:
         print(f"🔧 Executing tool: {name} with args: {arguments}")
+        models = session_models()
         
         if name == "create_box":
             model_name = arguments["name"]
@@ -172,9 +209,9 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[TextCon
             width = float(arguments["width"])
             height = float(arguments["height"])
             
-            builder = CADModelBuilder()
-            model = builder.add_box(length, width, height).build()
-            current_models[model_name] = model
+            error = await build_in_worker("box", arguments, models)
+            if error:
+                return [TextContent(type="text", text=f"Error: {error}")]
             result = f"Created box '{model_name}': {length} x {width} x {height}"
             
             return [TextContent(type="text", text=result)]
@@ -184,9 +221,9 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[TextCon
             radius = float(arguments["radius"])
             height = float(arguments["height"])
             
-            builder = CADModelBuilder()
-            model = builder.add_cylinder(radius, height).build()
-            current_models[model_name] = model
+            error = await build_in_worker("cylinder", arguments, models)
+            if error:
+                return [TextContent(type="text", text=f"Error: {error}")]
             result = f"Created cylinder '{model_name}': r={radius}, h={height}"
             
             return [TextContent(type="text", text=result)]
@@ -196,68 +233,77 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[TextCon
             outer_d = float(arguments["outer_diameter"])
             inner_d = float(arguments["inner_diameter"])
             thickness = float(arguments["thickness"])
-            bolt_circle_d = float(arguments["bolt_circle_diameter"])
-            bolt_hole_d = float(arguments["bolt_hole_diameter"])
             num_bolts = int(arguments.get("num_bolts", 6))
             
-            # Validation
-            if inner_d >= outer_d:
-                return [TextContent(type="text", text="Error: Inner diameter must be less than outer diameter")]
-            if bolt_circle_d >= outer_d:
-                return [TextContent(type="text", text="Error: Bolt circle diameter must be less than outer diameter")]
-                
-            # Create flange
             print(f"Creating flange: OD={outer_d}, ID={inner_d}, thickness={thickness}")
-            flange = (cq.Workplane("XY")
-                     .circle(outer_d/2)
-                     .circle(inner_d/2)  # Inner hole
-                     .extrude(thickness)
-                     .faces(">Z")  # Top face
-                     .workplane()
-                     .polarArray(bolt_circle_d/2, 0, 360, num_bolts)
-                     .circle(bolt_hole_d/2)
-                     .cutThruAll())
-            
-            current_models[model_name] = flange
+            error = await build_in_worker("flange", arguments, models)
+            if error:
+                return [TextContent(type="text", text=f"Error: {error}")]
             result = f"Created flange '{model_name}': OD={outer_d}, ID={inner_d}, thickness={thickness}, {num_bolts} bolt holes"
             
             return [TextContent(type="text", text=result)]
             
+        elif name == "create_batch":
+            primitive = arguments["primitive"]
+            try:
+                parameter_sets = batch.expand_parameter_sets(arguments.get("parameters"), arguments.get("variants"),
+                                                             arguments.get("sweep"))
+                names = batch.variant_names(arguments.get("name_template", f"{primitive}_{{index:03d}}"), parameter_sets)
+                print(f"🏭 Building {len(parameter_sets)} {primitive} variants in {worker_pool.max_workers} workers")
+                export_format = arguments.get("export_format")
+                outcome = await batch.run_batch(primitive, parameter_sets, names, models,
+                                                export_format=export_format.lower() if export_format else None,
+                                                export_dir=session_dir(models), on_progress=report_progress,
+                                                cache=primitive_cache)
+            except ValueError as e:
+                return [TextContent(type="text", text=f"Error: {e}")]
+                
+            return [TextContent(type="text", text=batch.format_batch_result(outcome))]
+            
         elif name == "export_model":
             model_name = arguments["name"]
             export_format = arguments["format"].lower()
             filename = arguments.get("filename", f"{model_name}.{export_format}")
             
-            if model_name not in current_models:
+            if model_name not in models:
                 return [TextContent(type="text", text=f"Error: Model '{model_name}' not found")]
-                
-            filepath = os.path.join(temp_dir, filename)
-            model = current_models[model_name]
+            try:
+                filepath = os.path.join(session_dir(models), export_filename(filename))
+            except ValueError as e:
+                return [TextContent(type="text", text=f"Error: {e}")]
             
             print(f"Exporting {model_name} as {export_format} to {filepath}")
             
-            success = False
-            if export_format == "stl":
-                success = CADExporter.export_stl(model, filepath)
-            elif export_format == "step":
-                success = CADExporter.export_step(model, filepath)
+            try:
+                outcome = await worker_pool.run(export_brep, str(models.brep_path(model_name)), filepath,
+                                                export_format, on_progress=report_progress)
+            except WorkerTimeout as e:
+                outcome = {"error": str(e)}
                 
-            if success:
+            if "error" not in outcome:
                 result = f"Exported '{model_name}' to {filepath}"
             else:
-                result = f"Failed to export '{model_name}' as {export_format}"
+                result = f"Failed to export '{model_name}' as {export_format}: {outcome['error']}"
                 
             return [TextContent(type="text", text=result)]
             
         elif name == "list_models":
-            if not current_models:
+            if not models:
                 return [TextContent(type="text", text="No models currently loaded")]
                 
             model_list = []
-            for name in current_models.keys():
-                model_list.append(f"- {name}")
+            for entry in models.describe():
+                location = "in memory" if entry["resident"] else "on disk"
+                shared = f", shared with {entry['shared_with']} other(s)" if entry["shared_with"] else ""
+                model_list.append(f"- {entry['name']} ({entry['size_bytes'] / 1024:.1f} KB, {location}{shared})")
                 
+            summary = models.summary()
             result = f"Current models:\n" + "\n".join(model_list)
+            result += (f"\n\nServer memory (all sessions): {summary['resident_models']}/{summary['max_models']} models, "
+                       f"{summary['resident_bytes'] / 2**20:.1f}/{summary['max_bytes'] / 2**20:.0f} MB; "
+                       f"{summary['unique_models']} unique shapes")
+            cache = primitive_cache.snapshot()
+            result += f"\nPrimitive cache: {cache['entries']} entries, {cache['hits']} hits, {cache['misses']} misses"
             return [TextContent(type="text", text=result)]
             
         else:
@@ -268,6 +314,10 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[TextCon
         print(f"❌ {error_msg}")
         return [TextContent(type="text", text=error_msg)]
 
+def server_health() -> Dict[str, Any]:
+    return {"sessions": session_namespaces.active, "models": current_models.summary(),
+            "workers": worker_pool.snapshot(), "primitive_cache": primitive_cache.snapshot()}
+
 async def main():
     """Main server function with better error handling"""
     
@@ -276,6 +326,14 @@ async def main():
     print(f"Version: 0.1.0")
     
     try:
+        worker_pool.start()
+        print(f"🏭 Geometry worker pool ready with {worker_pool.max_workers} workers")
+        
+        if TRANSPORT == "http":
+            from http_transport import serve_http
+            await serve_http(app, health=server_health)
+            return
+            
         # Run the MCP server with simplified initialization
         async with stdio_server() as (read_stream, write_stream):
             print("📡 MCP server started successfully")
@@ -295,6 +353,8 @@ async def main():
         print(f"❌ Server error: {e}")
         print(traceback.format_exc())
         raise
+    finally:
+        worker_pool.shutdown()
 
 if __name__ == "__main__":
     import asyncio
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Session Namespaces
+Gives every MCP session its own model names on top of one shared ModelStore,
+so a long-lived HTTP server can host many agents without their models
+colliding, while identical geometry, the memory budget, the primitive cache
+and the worker pool stay shared across all of them.
+
+A namespace is a prefixed view of the store with the same interface. It is
+tied to the SDK's session object and its models are deleted when that
+session is garbage collected (the connection closed). Exported files go to a
+per-session directory; export_filename() keeps client-supplied names inside it.
+"""
+
+import itertools
+import os
+import threading
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from model_store import ModelStore
+
+
+def export_filename(filename: str) -> str:
+    """A client-supplied export file name, checked to stay in the session directory
+
+    Raises ValueError for anything but a plain file name: path separators,
+    absolute paths, '.' and '..' are rejected.
+    """
+    name = os.path.basename(filename)
+    if name != filename or "\\" in filename or name in ("", ".", ".."):
+        raise ValueError(f"Invalid file name '{filename}': expected a plain file name without directories")
+    return name
+
+
+class ModelNamespace:
+    """One session's view of a shared ModelStore; names are private to the session"""
+
+    def __init__(self, store: ModelStore, prefix: str):
+        self.store = store
+        self.prefix = prefix
+
+    def _qualify(self, name: str) -> str:
+        return f"{self.prefix}{name}"
+
+    def __setitem__(self, name: str, model):
+        self.store[self._qualify(name)] = model
+
+    def __getitem__(self, name: str):
+        return self.store[self._qualify(name)]
+
+    def __delitem__(self, name: str):
+        del self.store[self._qualify(name)]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self._qualify(name) in self.store
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def keys(self) -> List[str]:
+        return [name[len(self.prefix):] for name in self.store.keys() if name.startswith(self.prefix)]
+
+    def get(self, name: str, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def put_brep(self, name: str, data: bytes) -> str:
+        return self.store.put_brep(self._qualify(name), data)
+
+    def link(self, name: str, blob: str) -> bool:
+        return self.store.link(self._qualify(name), blob)
+
+    def blob_of(self, name: str) -> str:
+        return self.store.blob_of(self._qualify(name))
+
+    def size_of(self, name: str) -> int:
+        return self.store.size_of(self._qualify(name))
+
+    def brep_path(self, name: str) -> Path:
+        return self.store.brep_path(self._qualify(name))
+
+    def is_resident(self, name: str) -> bool:
+        return self.store.is_resident(self._qualify(name))
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [{**entry, "name": entry["name"][len(self.prefix):]}
+                for entry in self.store.describe() if entry["name"].startswith(self.prefix)]
+
+    def summary(self) -> Dict[str, Any]:
+        """The shared store's totals plus this session's model count"""
+        return {**self.store.summary(), "session_models": len(self)}
+
+    def clear(self):
+        for name in self.keys():
+            del self.store[self._qualify(name)]
+
+
+class SessionNamespaces:
+    """Session object -> ModelNamespace, created on first use"""
+
+    def __init__(self, store: ModelStore):
+        self.store = store
+        self._namespaces: "weakref.WeakKeyDictionary[Any, ModelNamespace]" = weakref.WeakKeyDictionary()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def for_session(self, session) -> ModelNamespace:
+        with self._lock:
+            namespace = self._namespaces.get(session)
+            if namespace is None:
+                namespace = ModelNamespace(self.store, f"s{next(self._ids)}/")
+                self._namespaces[session] = namespace
+                # Free the session's models once the SDK drops the session
+                weakref.finalize(session, self._close, namespace)
+            return namespace
+
+    def _close(self, namespace: ModelNamespace):
+        count = len(namespace)
+        namespace.clear()
+        print(f"🧹 Session {namespace.prefix.rstrip('/')} closed, released {count} models")
+
+    @property
+    def active(self) -> int:
+        return len(self._namespaces)
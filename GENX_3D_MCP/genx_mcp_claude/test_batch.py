@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for the batch / parameter sweep builder
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+import cadquery as cq
+
+from batch import expand_parameter_sets, format_batch_result, run_batch, variant_names
+from model_store import ModelStore
+from workers import WorkerPool
+
+FLANGE = {"inner_diameter": 20, "thickness": 8, "bolt_hole_diameter": 6, "num_bolts": 4}
+
+
+def test_expand_sweep_and_names():
+    """Shared parameters, explicit variants and the sweep combine into one list"""
+    print("🧪 Testing sweep expansion...")
+    parameter_sets = expand_parameter_sets({"height": 5}, [{"length": 10}, {"length": 20, "height": 7}],
+                                           {"width": [1, 2, 3]})
+    assert len(parameter_sets) == 6
+    assert parameter_sets[0] == {"height": 5, "length": 10, "width": 1}
+    assert parameter_sets[-1] == {"height": 7, "length": 20, "width": 3}
+    assert len(expand_parameter_sets({"a": 1}, sweep={"b": [1, 2], "c": [1, 2, 3]})) == 6
+
+    names = variant_names("box_{length}x{width}_{index:02d}", parameter_sets)
+    assert names[:2] == ["box_10x1_00", "box_10x2_01"]
+
+    for call in (lambda: expand_parameter_sets(sweep={"a": list(range(40)), "b": list(range(40))}, max_variants=1000),
+                 lambda: expand_parameter_sets(sweep={"a": []}),
+                 lambda: variant_names("box", parameter_sets),
+                 lambda: variant_names("box_{missing}", parameter_sets),
+                 lambda: variant_names("../s2/box_{index}", parameter_sets)):
+        try:
+            call()
+            assert False, "expected ValueError"
+        except ValueError as e:
+            print(f"🚫 {e}")
+    print("✅ Sweep expansion test completed")
+
+
+def test_batch_builds_in_pool():
+    """Variants are built in worker processes, exported and stored spilled; bad ones are reported"""
+    print("🧪 Testing batch build...")
+    temp_dir = tempfile.mkdtemp()
+    store = ModelStore(os.path.join(temp_dir, "spill"))
+    parameter_sets = expand_parameter_sets(FLANGE, sweep={"outer_diameter": [60, 80, 15],
+                                                          "bolt_circle_diameter": [40, 50]})
+    names = variant_names("flange_{outer_diameter}_{bolt_circle_diameter}", parameter_sets)
+
+    pool = WorkerPool(max_workers=2)
+    progress = []
+
+    async def on_progress(done, total):
+        progress.append((done, total))
+
+    try:
+        outcome = asyncio.run(run_batch("flange", parameter_sets, names, store, export_format="step",
+                                        export_dir=temp_dir, pool=pool, on_progress=on_progress))
+    finally:
+        pool.shutdown()
+    print(format_batch_result(outcome))
+
+    assert [item["name"] for item in outcome["created"]] == names[:4]
+    assert sorted(item["name"] for item in outcome["failed"]) == ["flange_15_40", "flange_15_50"]
+    assert "Inner diameter must be less than outer diameter" in outcome["failed"][0]["error"]
+    assert all(os.path.exists(item["export_path"]) for item in outcome["created"])
+    assert progress[-1] == (6, 6) and len(progress) == 6
+
+    # Stored as BREP on disk and loaded on first access
+    assert store.keys() == names[:4] and not store.is_resident("flange_80_50")
+    model = store["flange_80_50"]
+    assert store.is_resident("flange_80_50")
+    bbox = model.val().BoundingBox()
+    assert round(bbox.xlen) == 80 and round(bbox.zlen) == 8
+    print("✅ Batch build test completed")
+
+
+def test_unknown_primitive_is_reported_per_variant():
+    """A bad primitive or missing parameter fails the variants, not the whole call"""
+    print("🧪 Testing batch errors...")
+    store = ModelStore(tempfile.mkdtemp())
+    pool = WorkerPool(max_workers=1)
+    try:
+        outcome = asyncio.run(run_batch("box", [{"length": 1, "width": 1, "height": 1}, {"length": 1}],
+                                        ["ok", "missing"], store, pool=pool))
+    finally:
+        pool.shutdown()
+    assert [item["name"] for item in outcome["created"]] == ["ok"]
+    assert "Missing parameter 'width'" in outcome["failed"][0]["error"]
+    assert isinstance(store["ok"], cq.Workplane)
+    print("✅ Batch errors test completed")
+
+
+def main():
+    """Main function for running batch tests"""
+    print("🚀 Starting batch tests...")
+    test_expand_sweep_and_names()
+    test_batch_builds_in_pool()
+    test_unknown_primitive_is_reported_per_variant()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
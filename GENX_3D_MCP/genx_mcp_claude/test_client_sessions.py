@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test script for the MCP client session manager (reuse, reconnect, bounded concurrency)
+"""
+
+import asyncio
+import contextlib
+import os
+import sys
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(__file__))
+
+import anyio
+
+from client_sessions import MCPSessionManager, result_text
+
+
+class FakeServer:
+    """In-process stand-in for an MCP server: counts connections and concurrent calls"""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.connections = 0
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+        self.current = None
+
+    @contextlib.asynccontextmanager
+    async def transport(self):
+        self.connections += 1
+        yield (None, None)
+
+    def session(self, read_stream, write_stream):
+        self.current = FakeSession(self)
+        return self.current
+
+
+class FakeSession:
+    def __init__(self, server: FakeServer):
+        self.server = server
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+    async def initialize(self):
+        pass
+
+    async def call_tool(self, name, arguments):
+        if self.closed:
+            raise anyio.ClosedResourceError()
+        self.server.active += 1
+        self.server.peak = max(self.server.peak, self.server.active)
+        try:
+            await asyncio.sleep(self.server.latency)
+            if self.closed:
+                raise anyio.ClosedResourceError()
+        finally:
+            self.server.active -= 1
+        self.server.calls.append((self.server.connections, name, arguments.get("name")))
+        if name == "bad_tool":
+            return SimpleNamespace(content=[SimpleNamespace(text="Unknown tool")], isError=True)
+        return SimpleNamespace(content=[SimpleNamespace(text=f"{name} ok")], isError=False)
+
+    async def list_tools(self):
+        return SimpleNamespace(tools=[SimpleNamespace(name="create_box")])
+
+
+def manager_for(server: FakeServer, **kwargs) -> MCPSessionManager:
+    return MCPSessionManager(server.transport, session_factory=server.session, backoff=0, **kwargs)
+
+
+def test_one_session_and_bounded_concurrency():
+    """Many calls share one connection and never exceed max_in_flight"""
+    print("🧪 Testing bounded concurrency...")
+    server = FakeServer()
+
+    async def scenario():
+        async with manager_for(server, max_in_flight=3) as manager:
+            calls = [("export_model", {"name": f"part_{i}", "format": "stl"}) for i in range(10)]
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            results = await manager.call_many(calls)
+            return results, loop.time() - start, await manager.list_tools()
+
+    results, elapsed, tools = asyncio.run(scenario())
+    print(f"⏱️ 10 calls in {elapsed:.2f}s, peak {server.peak} in flight")
+    assert [result_text(result) for result in results] == ["export_model ok"] * 10
+    assert server.connections == 1 and server.peak == 3
+    assert elapsed < 10 * server.latency * 0.6
+    assert tools.tools[0].name == "create_box"
+    print("✅ Bounded concurrency test completed")
+
+
+def test_reconnect_replays_models():
+    """A dropped connection is reopened once and earlier models are recreated first"""
+    print("🧪 Testing reconnect...")
+    server = FakeServer(latency=0.02)
+
+    async def scenario():
+        async with manager_for(server) as manager:
+            await manager.call_tool("create_box", {"name": "a", "length": 1, "width": 1, "height": 1})
+            await manager.call_tool("create_box", {"name": "a", "length": 2, "width": 2, "height": 2})
+            await manager.call_tool("bad_tool", {"name": "ignored"})
+            await manager.call_tool("create_flange", {"name": "f", "outer_diameter": 100})
+            server.current.closed = True  # the server went away
+            results = await manager.call_many([("export_model", {"name": "a"}), ("export_model", {"name": "f"})])
+            return manager, results
+
+    manager, results = asyncio.run(scenario())
+    print(f"📊 {manager.stats}")
+    assert [result_text(result) for result in results] == ["export_model ok"] * 2
+    assert server.connections == 2 and manager.stats["reconnects"] == 1
+    # The latest create_box for "a" and the flange are replayed, then the exports run
+    replayed = [(name, model) for connection, name, model in server.calls if connection == 2]
+    assert replayed[:2] == [("create_box", "a"), ("create_flange", "f")]
+    assert sorted(replayed[2:]) == [("export_model", "a"), ("export_model", "f")]
+    print("✅ Reconnect test completed")
+
+
+def test_gives_up_after_retries():
+    """A server that cannot be reached surfaces the connection error"""
+    print("🧪 Testing reconnect limit...")
+
+    @contextlib.asynccontextmanager
+    async def unreachable():
+        raise ConnectionRefusedError("server not running")
+        yield
+
+    async def scenario():
+        manager = MCPSessionManager(unreachable, reconnect_attempts=2, backoff=0)
+        try:
+            await manager.call_tool("list_models", {})
+            assert False, "expected ConnectionRefusedError"
+        except ConnectionRefusedError as e:
+            print(f"🚫 {e}")
+        await manager.close()
+
+    asyncio.run(scenario())
+    print("✅ Reconnect limit test completed")
+
+
+def main():
+    """Main function for running client session tests"""
+    print("🚀 Starting client session tests...")
+    test_one_session_and_bounded_concurrency()
+    test_reconnect_replays_models()
+    test_gives_up_after_retries()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
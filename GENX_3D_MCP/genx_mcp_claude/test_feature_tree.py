@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental feature-tree recomputation in CADModelBuilder
+"""
+
+import math
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(__file__))
+
+from primitives import CADModelBuilder
+
+
+def test_chain_matches_and_edits_recompute_downstream_only():
+    """An edit recomputes the edited feature and what follows, nothing upstream"""
+    print("🧪 Testing incremental chain...")
+    builder = (CADModelBuilder()
+               .add_box(40, 40, 10, name="plate")
+               .add_hole(10, name="bore")
+               .add_fillet(2, name="round")
+               .add_translate(z=5, name="place"))
+    first = builder.build()
+    assert builder.stats["computed"] == 4
+    assert [kind for kind, _ in builder.operations] == ["box", "hole", "fillet", "translate"]
+
+    assert builder.build() is first and builder.stats["computed"] == 4
+    plate = builder.features["plate"].result
+
+    builder.update("bore", diameter=20)
+    assert builder.dependents("bore") == ["round", "place"]
+    second = builder.build()
+    assert builder.stats["computed"] == 7
+    assert builder.features["plate"].result is plate
+
+    removed = math.pi * (10**2 - 5**2) * 10
+    assert abs(first.val().Volume() - second.val().Volume() - removed) < 1e-3
+    assert abs(second.val().BoundingBox().zmin) < 1e-6
+    print("✅ Incremental chain test completed")
+
+
+def test_branches_and_booleans():
+    """Editing one branch leaves the other branch's cached shape alone"""
+    print("🧪 Testing branches...")
+    builder = (CADModelBuilder()
+               .add_box(30, 30, 10, name="base")
+               .new_branch()
+               .add_cylinder(4, 40, name="pin")
+               .add_translate(x=8, name="pin_moved")
+               .from_feature("base")
+               .add_cut("pin_moved", name="drilled"))
+    drilled = builder.build()
+    assert builder.features["drilled"].inputs == ["base", "pin_moved"]
+    base = builder.features["base"].result
+
+    builder.update("pin", radius=2)
+    assert builder.dependents("pin") == ["pin_moved", "drilled"]
+    builder.build()
+    assert builder.features["base"].result is base and builder.stats["computed"] == 4 + 3
+
+    removed_before = math.pi * 4**2 * 10
+    removed_after = math.pi * 2**2 * 10
+    assert abs(drilled.val().Volume() - (9000 - removed_before)) < 1e-3
+    assert abs(builder.build().val().Volume() - (9000 - removed_after)) < 1e-3
+
+    for bad in (lambda: builder.update("pin", diameter=3), lambda: builder.from_feature("missing"),
+                lambda: builder.add_union("missing"), lambda: builder.add_box(1, 1, 1, name="base")):
+        try:
+            bad()
+            assert False, "expected ValueError"
+        except ValueError as e:
+            print(f"🚫 {e}")
+    print("✅ Branches test completed")
+
+
+def test_late_edit_is_cheaper_than_rebuild():
+    """On a model with many boolean steps, editing the last step skips the rest"""
+    print("🧪 Testing edit cost...")
+    builder = CADModelBuilder().add_box(200, 20, 10, name="bar")
+    for i in range(15):
+        builder.new_branch().add_cylinder(3, 30).add_translate(x=-90 + i * 12)
+        tool = builder.head
+        builder.from_feature("bar" if i == 0 else f"cut{i}").add_cut(tool, name=f"cut{i + 1}")
+
+    start = time.perf_counter()
+    builder.build()
+    full = time.perf_counter() - start
+    computed = builder.stats["computed"]
+
+    last_pin = builder.features["cut15"].inputs[1]
+    builder.update(last_pin, x=88)
+    start = time.perf_counter()
+    builder.build()
+    edit = time.perf_counter() - start
+    print(f"⏱️ full build {full * 1000:.0f} ms, edit {edit * 1000:.0f} ms")
+    assert builder.stats["computed"] - computed == 2
+    assert edit < full
+    print("✅ Edit cost test completed")
+
+
+def test_long_chain_builds_without_recursion():
+    """Chains longer than the recursion limit build on first use"""
+    print("🧪 Testing long chains...")
+    builder = CADModelBuilder().add_box(1, 1, 1)
+    steps = sys.getrecursionlimit() + 100
+    for _ in range(steps):
+        builder.add_translate(x=1)
+    assert math.isclose(builder.build().val().Center().x, steps)
+    assert builder.stats["computed"] == steps + 1
+    print("✅ Long chain test completed")
+
+
+def main():
+    """Main function for running feature tree tests"""
+    print("🚀 Starting feature tree tests...")
+    test_chain_matches_and_edits_recompute_downstream_only()
+    test_branches_and_booleans()
+    test_late_edit_is_cheaper_than_rebuild()
+    test_long_chain_builds_without_recursion()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test script for the MCP HTTP transports (streamable HTTP and SSE routes)
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from mcp.server.lowlevel import Server
+from starlette.testclient import TestClient
+
+from http_transport import create_http_app
+
+INITIALIZE = {"jsonrpc": "2.0", "id": 1, "method": "initialize",
+              "params": {"protocolVersion": "2025-03-26", "capabilities": {},
+                         "clientInfo": {"name": "test-client", "version": "0.1.0"}}}
+
+
+def test_streamable_http_sessions_and_health():
+    """Each initialize opens its own session; /health reports server state"""
+    print("🧪 Testing HTTP transport...")
+    app = Server("cad-geometry-server")
+    with TestClient(create_http_app(app, health=lambda: {"sessions": 0})) as client:
+        assert client.get("/health").json() == {"status": "ok", "sessions": 0}
+
+        headers = {"Accept": "application/json, text/event-stream"}
+        first = client.post("/mcp/", json=INITIALIZE, headers=headers)
+        second = client.post("/mcp/", json=INITIALIZE, headers=headers)
+        assert first.status_code == second.status_code == 200
+        assert '"serverInfo"' in first.text
+        session_ids = {first.headers["mcp-session-id"], second.headers["mcp-session-id"]}
+        print(f"📡 sessions: {session_ids}")
+        assert len(session_ids) == 2
+    print("✅ HTTP transport test completed")
+
+
+def main():
+    """Main function for running HTTP transport tests"""
+    print("🚀 Starting HTTP transport tests...")
+    test_streamable_http_sessions_and_health()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
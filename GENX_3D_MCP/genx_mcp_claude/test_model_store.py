@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for the bounded MCP model store (LRU spill to BREP)
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+import cadquery as cq
+
+from model_store import ModelStore, brep_bytes
+
+
+def make_box(size: float) -> cq.Workplane:
+    return cq.Workplane("XY").box(size, size, size)
+
+
+def test_count_limit_spills_lru():
+    """Beyond max_models the least recently used model goes to disk and comes back on access"""
+    print("🧪 Testing count limit...")
+    store = ModelStore(tempfile.mkdtemp(), max_models=2)
+    store["a"], store["b"] = make_box(1), make_box(2)
+    store["a"]  # a is now more recent than b
+    store["c"] = make_box(3)
+    assert [store.is_resident(name) for name in ("a", "b", "c")] == [True, False, True]
+    assert store.keys() == ["a", "b", "c"] and len(store) == 3
+
+    reloaded = store["b"]
+    assert abs(reloaded.val().Volume() - 8.0) < 1e-6
+    assert store.is_resident("b") and not store.is_resident("a")
+    assert store.summary()["spills"] == 2 and store.summary()["reloads"] == 1
+    print("✅ Count limit test completed")
+
+
+def test_byte_limit_and_export_after_reload():
+    """The byte budget is enforced and reloaded models export like the originals"""
+    print("🧪 Testing byte limit...")
+    flange = (cq.Workplane("XY").circle(50).circle(20).extrude(10)
+              .faces(">Z").workplane().polarArray(35, 0, 360, 6).circle(4).cutThruAll())
+    thicker = (cq.Workplane("XY").circle(50).circle(20).extrude(12)
+               .faces(">Z").workplane().polarArray(35, 0, 360, 6).circle(4).cutThruAll())
+    size = len(brep_bytes(flange))
+    directory = tempfile.mkdtemp()
+    store = ModelStore(os.path.join(directory, "spill"), max_bytes=int(size * 1.5))
+    store["flange"] = flange
+    store["flange_thick"] = thicker
+    assert store.resident_bytes <= store.max_bytes
+    assert not store.is_resident("flange")
+
+    path = os.path.join(directory, "flange.step")
+    cq.exporters.export(store["flange"], path, exportType="STEP")
+    assert os.path.getsize(path) > 0
+    assert abs(store["flange"].val().Volume() - flange.val().Volume()) < 1e-6
+    print("✅ Byte limit test completed")
+
+
+def test_overwrite_and_delete_remove_spill_files():
+    """Replacing or deleting a model removes its BREP file"""
+    print("🧪 Testing spill file cleanup...")
+    spill_dir = tempfile.mkdtemp()
+    store = ModelStore(spill_dir, max_models=1)
+    store["a"] = make_box(1)
+    store["b"] = make_box(2)
+    assert len(os.listdir(spill_dir)) == 1
+    store["a"] = make_box(5)
+    del store["b"]
+    assert os.listdir(spill_dir) == []
+    assert abs(store["a"].val().Volume() - 125.0) < 1e-6
+    assert "b" not in store
+    try:
+        store["b"]
+        assert False, "expected KeyError"
+    except KeyError:
+        pass
+    print("✅ Spill file cleanup test completed")
+
+
+def test_identical_models_share_geometry():
+    """Aliased names share one shape and one file; rebinding a name leaves the others intact"""
+    print("🧪 Testing shared geometry...")
+    spill_dir = tempfile.mkdtemp()
+    store = ModelStore(spill_dir, max_models=1)
+    store["a"] = make_box(2)
+    store["b"] = make_box(2)
+    assert store["a"] is store["b"]
+    assert store.resident_bytes == len(brep_bytes(make_box(2)))
+    assert store.summary()["unique_models"] == 1 and store.summary()["shared"] == 1
+    assert [entry["shared_with"] for entry in store.describe()] == [1, 1]
+
+    shared = store.blob_of("a")
+    assert store.link("c", shared) and not store.link("d", "missing")
+    store["a"] = make_box(3)  # copy-on-write: only a changes
+    assert abs(store["b"].val().Volume() - 8.0) < 1e-6
+    assert abs(store["c"].val().Volume() - 8.0) < 1e-6
+    assert abs(store["a"].val().Volume() - 27.0) < 1e-6
+    assert os.path.exists(os.path.join(spill_dir, f"{shared}.brep"))
+
+    del store["b"], store["c"]
+    assert store.summary()["unique_models"] == 1
+    assert not os.path.exists(os.path.join(spill_dir, f"{shared}.brep"))
+    print("✅ Shared geometry test completed")
+
+
+def main():
+    """Main function for running model store tests"""
+    print("🚀 Starting model store tests...")
+    test_count_limit_spills_lru()
+    test_byte_limit_and_export_after_reload()
+    test_overwrite_and_delete_remove_spill_files()
+    test_identical_models_share_geometry()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
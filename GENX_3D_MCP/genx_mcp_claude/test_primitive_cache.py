@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for memoized primitives (canonical keys, shared geometry)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from batch import run_batch
+from model_store import ModelStore
+from primitive_cache import PrimitiveCache, cache_key
+from workers import WorkerPool
+
+FLANGE = {"outer_diameter": 100, "inner_diameter": 40, "thickness": 10,
+          "bolt_circle_diameter": 70, "bolt_hole_diameter": 8}
+
+
+def test_cache_key_is_canonical():
+    """Defaults, number types and extra keys do not change the key"""
+    print("🧪 Testing cache keys...")
+    assert cache_key("flange", FLANGE) == cache_key("flange", {**FLANGE, "num_bolts": 6, "thickness": "10"})
+    assert cache_key("flange", FLANGE) != cache_key("flange", {**FLANGE, "num_bolts": 8})
+    assert cache_key("box", {"length": 1, "width": 2, "height": 3, "name": "a"}) == \
+        cache_key("box", {"height": 3.0, "width": 2.0, "length": 1.0})
+    assert cache_key("box", {"length": 1, "width": 2, "height": 3}) != cache_key("cylinder", {"radius": 1, "height": 3})
+    for primitive, params in (("box", {"length": 1}), ("sphere", {}), ("box", {"length": "x", "width": 1, "height": 1})):
+        try:
+            cache_key(primitive, params)
+            assert False, "expected ValueError"
+        except ValueError as e:
+            print(f"🚫 {e}")
+    print("✅ Cache keys test completed")
+
+
+def test_hits_link_shared_geometry():
+    """A repeated primitive is linked, not rebuilt, and survives deleting the original name"""
+    print("🧪 Testing cache hits...")
+    store = ModelStore(tempfile.mkdtemp())
+    cache = PrimitiveCache(store, max_entries=2)
+    pool = WorkerPool(max_workers=2)
+    sweep = [{**FLANGE, "num_bolts": n} for n in (4, 6, 4, 6)]
+
+    try:
+        first = asyncio.run(run_batch("flange", sweep, ["a", "b", "c", "d"], store, pool=pool, cache=cache))
+        calls_after_first = pool.stats["calls"]
+        second = asyncio.run(run_batch("flange", sweep[:2], ["e", "f"], store, pool=pool, cache=cache))
+    finally:
+        pool.shutdown()
+
+    # Identical variants within a batch are built once, later batches hit the cache
+    assert calls_after_first == 2 and pool.stats["calls"] == 2
+    assert [item["cached"] for item in second["created"]] == [True, True]
+    assert store.summary()["unique_models"] == 2 and len(store) == 6
+    assert store.blob_of("a") == store.blob_of("c") == store.blob_of("e")
+    assert store["a"] is store["e"]
+    assert cache.snapshot()["hits"] == 2
+
+    # Entries outlive the name they were built under while any alias remains
+    del store["a"], store["c"]
+    assert cache.link(cache_key("flange", sweep[0]), "g")
+    del store["e"], store["g"]
+    assert not cache.link(cache_key("flange", sweep[0]), "h") and "h" not in store
+    print(f"📊 {cache.snapshot()}")
+    print("✅ Cache hits test completed")
+
+
+def main():
+    """Main function for running primitive cache tests"""
+    print("🚀 Starting primitive cache tests...")
+    test_cache_key_is_canonical()
+    test_hits_link_shared_geometry()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for per-session model namespaces
+"""
+
+import gc
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+import cadquery as cq
+
+from model_store import ModelStore
+from primitive_cache import PrimitiveCache
+from sessions import SessionNamespaces, export_filename
+
+
+class FakeSession:
+    """Stands in for the SDK's per-connection session object (only identity matters)"""
+
+
+def test_sessions_are_isolated_but_share_geometry():
+    """Two sessions can use the same names; identical parts still share one shape"""
+    print("🧪 Testing session isolation...")
+    store = ModelStore(tempfile.mkdtemp())
+    namespaces = SessionNamespaces(store)
+    alice, bob = FakeSession(), FakeSession()
+    a, b = namespaces.for_session(alice), namespaces.for_session(bob)
+    assert namespaces.for_session(alice) is a and a.prefix != b.prefix
+
+    a["part"] = cq.Workplane("XY").box(1, 1, 1)
+    b["part"] = cq.Workplane("XY").box(1, 1, 1)
+    b["other"] = cq.Workplane("XY").box(2, 2, 2)
+    assert a.keys() == ["part"] and sorted(b) == ["other", "part"]
+    assert "other" not in a and len(store) == 3
+    assert store.summary()["unique_models"] == 2
+    assert [entry["name"] for entry in a.describe()] == ["part"]
+    assert a.summary()["session_models"] == 1
+
+    # The cache links into the caller's namespace only
+    cache = PrimitiveCache(store)
+    cache.put("box-2", b.blob_of("other"))
+    assert cache.link("box-2", "copy", a) and a.keys() == ["part", "copy"]
+    assert "copy" not in b
+    print("✅ Session isolation test completed")
+
+
+def test_closed_session_releases_models():
+    """Dropping the session object deletes its models and nothing else"""
+    print("🧪 Testing session cleanup...")
+    spill_dir = tempfile.mkdtemp()
+    store = ModelStore(spill_dir)
+    namespaces = SessionNamespaces(store)
+    session, keeper = FakeSession(), FakeSession()
+    closing = namespaces.for_session(session)
+    closing.put_brep("bracket", b"brep data")
+    closing["plate"] = cq.Workplane("XY").box(5, 5, 1)
+    namespaces.for_session(keeper)["plate"] = cq.Workplane("XY").box(5, 5, 1)
+    assert namespaces.active == 2 and len(store) == 3
+
+    del session, closing
+    gc.collect()
+    assert namespaces.active == 1
+    assert store.keys() == ["s2/plate"]
+    assert len(os.listdir(spill_dir)) == 0
+    print("✅ Session cleanup test completed")
+
+
+def test_export_filename_stays_in_session_dir():
+    """Client file names cannot point outside the session's export directory"""
+    print("🧪 Testing export file names...")
+    assert export_filename("bracket.step") == "bracket.step"
+    for bad in ("../s2/x.stl", "/etc/passwd", "sub/part.stl", "..\\x.stl", "..", ".", ""):
+        try:
+            export_filename(bad)
+            assert False, "expected ValueError"
+        except ValueError as e:
+            print(f"🚫 {e}")
+    print("✅ Export file name test completed")
+
+
+def main():
+    """Main function for running session namespace tests"""
+    print("🚀 Starting session namespace tests...")
+    test_sessions_are_isolated_but_share_geometry()
+    test_closed_session_releases_models()
+    test_export_filename_stays_in_session_dir()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script for the geometry worker pool (offload, timeouts, progress)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures.process import BrokenProcessPool
+sys.path.append(os.path.dirname(__file__))
+
+import cadquery as cq
+
+from model_store import ModelStore
+from workers import WorkerPool, WorkerTimeout, build_model, export_brep
+
+
+def sleep_and_return(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def sleep_and_report_pid(seconds: float):
+    time.sleep(seconds)
+    return seconds, os.getpid()
+
+
+def crash():
+    os._exit(1)
+
+
+def test_calls_do_not_block_the_loop():
+    """Slow geometry runs in workers while the loop keeps answering, with progress callbacks"""
+    print("🧪 Testing non-blocking calls...")
+    pool = WorkerPool(max_workers=2, progress_interval=0.1)
+    progress = []
+
+    async def on_progress(elapsed):
+        progress.append(elapsed)
+
+    async def scenario():
+        slow = asyncio.gather(pool.run(sleep_and_return, 0.5, on_progress=on_progress),
+                              pool.run(sleep_and_return, 0.5))
+        ticks = 0
+        while not slow.done():
+            await asyncio.sleep(0.05)
+            ticks += 1
+        return await slow, ticks
+
+    try:
+        pool.start()
+        start = time.perf_counter()
+        results, ticks = asyncio.run(scenario())
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.shutdown()
+    print(f"⏱️ two 0.5s calls took {elapsed:.2f}s, loop ticked {ticks} times, progress {progress}")
+    assert results == [0.5, 0.5] and elapsed < 0.9
+    assert ticks >= 5 and len(progress) >= 3 and progress == sorted(progress)
+    print("✅ Non-blocking calls test completed")
+
+
+def test_timeout_kills_only_the_hung_worker():
+    """A call past its timeout gets only its own worker killed; calls on other workers carry on"""
+    print("🧪 Testing timeouts...")
+    pool = WorkerPool(max_workers=3, timeout=0.5)
+
+    async def scenario():
+        stuck = pool.run(sleep_and_return, 30)
+        bystander = pool.run(sleep_and_report_pid, 1.2, timeout=5)
+        late = pool.run(sleep_and_return, 30, timeout=0.8)
+        return await asyncio.gather(stuck, bystander, late, return_exceptions=True)
+
+    try:
+        pool.start()
+        start = time.perf_counter()
+        stuck, bystander, late = asyncio.run(scenario())
+        elapsed = time.perf_counter() - start
+        assert isinstance(stuck, WorkerTimeout) and isinstance(late, WorkerTimeout)
+        # The bystander ran through both timeouts on its original worker, which is still alive
+        assert bystander[0] == 1.2 and elapsed < 5
+        os.kill(bystander[1], 0)
+        assert pool.stats["calls"] == 3 and pool.stats["timeouts"] == 2 and pool.stats["restarts"] == 2
+        # The replaced workers keep working
+        assert asyncio.run(pool.run(sleep_and_return, 0)) == 0
+        # A crashed worker is replaced and its call resubmitted once
+        try:
+            asyncio.run(pool.run(crash))
+            assert False, "crash() should have broken its worker"
+        except BrokenProcessPool:
+            pass
+        assert pool.stats["restarts"] == 4
+        assert asyncio.run(pool.run(sleep_and_return, 0)) == 0
+    finally:
+        pool.shutdown()
+    print(f"⏱️ {elapsed:.2f}s, {pool.snapshot()}")
+    print("✅ Timeouts test completed")
+
+
+def test_build_and_export_tasks():
+    """Worker tasks round-trip models through BREP files in the store"""
+    print("🧪 Testing worker tasks...")
+    temp_dir = tempfile.mkdtemp()
+    store = ModelStore(temp_dir)
+    store["plate"] = cq.Workplane("XY").box(10, 20, 2)
+    pool = WorkerPool(max_workers=1)
+
+    async def scenario():
+        built = await pool.run(build_model, "cylinder", {"radius": 5, "height": 10})
+        store.put_brep("rod", built["brep"])
+        invalid = await pool.run(build_model, "flange", {"outer_diameter": 10, "inner_diameter": 20, "thickness": 2,
+                                                         "bolt_circle_diameter": 5, "bolt_hole_diameter": 1})
+        exported = await pool.run(export_brep, str(store.brep_path("plate")), os.path.join(temp_dir, "plate.stl"), "stl")
+        return invalid, exported
+
+    try:
+        invalid, exported = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert invalid["error"] == "Inner diameter must be less than outer diameter"
+    assert os.path.getsize(exported["export_path"]) > 0
+    assert round(store["rod"].val().BoundingBox().zlen) == 10
+    print("✅ Worker tasks test completed")
+
+
+def main():
+    """Main function for running worker pool tests"""
+    print("🚀 Starting worker pool tests...")
+    test_calls_do_not_block_the_loop()
+    test_timeout_kills_only_the_hung_worker()
+    test_build_and_export_tasks()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
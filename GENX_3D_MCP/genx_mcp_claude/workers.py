@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Geometry Worker Pool
+Runs CadQuery work (building, BREP serialization, STL/STEP export) in worker
+processes so the asyncio loop serving MCP stays free: heavy calls no longer
+block list_tools or each other, and several tool calls can run at once.
+
+Models cross the process boundary as BREP: workers return the bytes of what
+they build and export from the model store's BREP files. Each worker is its
+own single-process executor, so a call that overruns its timeout gets only its
+own worker killed and replaced; calls running on the other workers never see
+it. A worker that crashes is replaced the same way and its call resubmitted
+once. While a call runs, the caller gets a progress callback every
+PROGRESS_INTERVAL_SECONDS.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import cadquery as cq
+
+from model_store import brep_bytes
+from primitives import CADExporter, build_primitive
+
+WORKERS = int(os.getenv("GENX_MCP_WORKERS", str(os.cpu_count() or 1)))
+TOOL_TIMEOUT_SECONDS = float(os.getenv("GENX_MCP_TOOL_TIMEOUT", "120"))
+PROGRESS_INTERVAL_SECONDS = float(os.getenv("GENX_MCP_PROGRESS_INTERVAL", "2"))
+
+ProgressCallback = Callable[[float], Awaitable[None]]
+
+
+class WorkerTimeout(TimeoutError):
+    """A geometry call ran past its timeout and its worker was killed"""
+
+    def __init__(self, seconds: float):
+        super().__init__(f"Operation timed out after {seconds:g}s")
+        self.seconds = seconds
+
+
+def _init_worker():
+    # Workers inherit the server's stdout, which is the MCP stdio transport:
+    # anything they print (including OpenCascade messages) must go to stderr
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+
+def build_model(primitive: str, params: Dict[str, Any], export_path: Optional[str] = None,
+                export_format: Optional[str] = None) -> Dict[str, Any]:
+    """Worker task: build a primitive and return its BREP (or the error), optionally exporting it"""
+    start = time.perf_counter()
+    try:
+        model = build_primitive(primitive, params)
+        result = {"brep": brep_bytes(model)}
+        if export_path:
+            if not CADExporter.export(model, export_path, export_format):
+                raise ValueError(f"{export_format.upper()} export failed")
+            result["export_path"] = export_path
+    except Exception as e:
+        result = {"error": str(e)}
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def export_brep(brep_path: str, export_path: str, export_format: str) -> Dict[str, Any]:
+    """Worker task: export a stored model (by its BREP file) to STL or STEP"""
+    start = time.perf_counter()
+    try:
+        model = cq.Workplane("XY").newObject([cq.Shape.importBrep(brep_path)])
+        if not CADExporter.export(model, export_path, export_format):
+            raise ValueError(f"{export_format.upper()} export failed")
+        result = {"export_path": export_path}
+    except Exception as e:
+        result = {"error": str(e)}
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+class WorkerPool:
+    """Single-worker process slots with per-call timeouts and progress callbacks"""
+
+    def __init__(self, max_workers: int = WORKERS, timeout: float = TOOL_TIMEOUT_SECONDS,
+                 progress_interval: float = PROGRESS_INTERVAL_SECONDS):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.progress_interval = progress_interval
+        self.stats = {"calls": 0, "timeouts": 0, "restarts": 0}
+        self._slots: Optional[List[ProcessPoolExecutor]] = None
+        self._idle: List[ProcessPoolExecutor] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._available: Optional[asyncio.Semaphore] = None
+
+    def _new_slot(self) -> ProcessPoolExecutor:
+        # fork: spawn/forkserver would re-import servers.py as __main__ in each worker
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        return ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_worker)
+
+    def _get_slots(self) -> List[ProcessPoolExecutor]:
+        if self._slots is None:
+            self._slots = [self._new_slot() for _ in range(self.max_workers)]
+            self._idle = list(self._slots)
+        return self._slots
+
+    def _free_slots(self) -> asyncio.Semaphore:
+        # Semaphores belong to one event loop; scripts and tests may run several in turn
+        self._get_slots()
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._available = loop, asyncio.Semaphore(self.max_workers)
+        return self._available
+
+    def start(self):
+        """Fork the workers now, before the server starts its I/O threads"""
+        for slot in self._get_slots():
+            slot.submit(os.getpid).result()
+
+    def shutdown(self):
+        if self._slots is not None:
+            for slot in self._slots:
+                slot.shutdown(cancel_futures=True)
+            self._slots, self._idle = None, []
+
+    def _replace(self, slot: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """Kill one slot's worker and put a fresh slot in its place; the other workers keep running"""
+        for process in list((slot._processes or {}).values()):
+            process.kill()
+        slot.shutdown(wait=False, cancel_futures=True)
+        fresh = self._new_slot()
+        if self._slots is not None and slot in self._slots:
+            self._slots[self._slots.index(slot)] = fresh
+        self.stats["restarts"] += 1
+        print("♻️ Restarted a geometry worker", file=sys.stderr)
+        return fresh
+
+    async def run(self, fn, *args, timeout: Optional[float] = None,
+                  on_progress: Optional[ProgressCallback] = None):
+        """Run fn(*args) on a free worker; WorkerTimeout once the timeout passes"""
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        self.stats["calls"] += 1
+        async with self._free_slots():
+            slot = self._idle.pop()
+            try:
+                for attempt in range(2):
+                    start = loop.time()
+                    future = loop.run_in_executor(slot, fn, *args)
+                    try:
+                        while True:
+                            remaining = start + timeout - loop.time()
+                            done, _ = await asyncio.wait({future}, timeout=max(0, min(self.progress_interval, remaining)))
+                            if done:
+                                return future.result()
+                            if loop.time() >= start + timeout:
+                                self.stats["timeouts"] += 1
+                                raise WorkerTimeout(timeout)
+                            if on_progress is not None:
+                                await on_progress(round(loop.time() - start, 1))
+                    except BrokenProcessPool:
+                        # This call's own worker crashed; replace it and resubmit once
+                        slot = self._replace(slot)
+                        if attempt:
+                            raise
+                    except BaseException:
+                        # Timed out (or cancelled) with the task still running: kill only this worker
+                        if not future.done():
+                            future.cancel()
+                            slot = self._replace(slot)
+                        raise
+            finally:
+                if self._slots is not None and slot in self._slots:
+                    self._idle.append(slot)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"workers": self.max_workers, "timeout_seconds": self.timeout, **self.stats}
+
+
+worker_pool = WorkerPool()
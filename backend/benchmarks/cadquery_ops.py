@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+CadQuery execution benchmark with per-operation timings.
+
+Runs a fixed, versioned corpus of dataset snippets (cadquery_corpus.json)
+through CADModelGenerator.execute_cadquery_code with every public
+``cq.Workplane`` method, ``cq.exporters.export`` and the download sidecar
+compression instrumented. Each operation gets its call count, inclusive time
+and self time (excluding nested instrumented calls, so e.g. ``extrude`` does
+not also count the ``newObject`` it calls). Results are written as JSON so
+runs can be compared, and --baseline flags operations whose self time grew.
+
+Usage (from backend/):
+    python -m benchmarks.cadquery_ops --repeat 3 --json cadquery_ops.json
+    python -m benchmarks.cadquery_ops --baseline cadquery_ops.json
+    # Rebuild the corpus after the dataset changes (bumps its version)
+    python -m benchmarks.cadquery_ops --build-corpus --size 40
+"""
+
+import argparse
+import functools
+import hashlib
+import inspect
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import cadquery as cq
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+CORPUS_PATH = Path(__file__).resolve().parent / "cadquery_corpus.json"
+DATASET_PATH = BACKEND_DIR / "RAG_PineCone" / "rag_dataset_merged.jsonl"
+
+
+# -----------------------------
+# Instrumentation
+# -----------------------------
+class OperationTimer:
+    """Accumulates calls, inclusive and self time per operation name"""
+
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self._local = threading.local()
+
+    def _stack(self) -> List[List[Any]]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def reset(self):
+        self.stats = {}
+
+    def wrap(self, name: str, fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            stack = self._stack()
+            # Recursive calls of the same operation only count once inclusively
+            outermost = all(frame[0] != name for frame in stack)
+            frame = [name, 0.0]
+            stack.append(frame)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                stack.pop()
+                if stack:
+                    stack[-1][1] += elapsed
+                entry = self.stats.setdefault(name, {"calls": 0, "inclusive_seconds": 0.0, "self_seconds": 0.0})
+                entry["calls"] += 1
+                entry["self_seconds"] += elapsed - frame[1]
+                if outermost:
+                    entry["inclusive_seconds"] += elapsed
+        timed.__wrapped_operation__ = fn
+        return timed
+
+
+def _patch(patches: List, owner, attribute: str, timer: OperationTimer, name: str):
+    original = getattr(owner, attribute)
+    patches.append((owner, attribute, original))
+    setattr(owner, attribute, timer.wrap(name, original))
+
+
+@contextmanager
+def instrument(timer: OperationTimer, extra: Sequence = ()):
+    """Time every public Workplane method and cq.exporters.export.
+
+    ``extra`` holds additional (owner, attribute, name) triples to time.
+    Everything is restored on exit.
+    """
+    patches: List = []
+    try:
+        for name, value in list(vars(cq.Workplane).items()):
+            if not name.startswith("_") and inspect.isfunction(value):
+                _patch(patches, cq.Workplane, name, timer, name)
+        _patch(patches, cq.exporters, "export", timer, "export")
+        for owner, attribute, name in extra:
+            _patch(patches, owner, attribute, timer, name)
+        yield timer
+    finally:
+        for owner, attribute, original in reversed(patches):
+            setattr(owner, attribute, original)
+
+
+# -----------------------------
+# Corpus
+# -----------------------------
+def _code_hash(code: str) -> str:
+    return hashlib.sha256(code.encode()).hexdigest()[:16]
+
+
+def load_rows(path: Path = DATASET_PATH) -> List[Dict[str, str]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def build_corpus(rows: Sequence[Dict[str, str]], size: int, version: int, dataset: str) -> Dict[str, Any]:
+    """Snippets evenly spaced by code length, from trivial to the most complex"""
+    by_length = sorted(range(len(rows)), key=lambda i: (len(rows[i]["code"]), i))
+    step = (len(by_length) - 1) / max(size - 1, 1)
+    indices = sorted({by_length[round(i * step)] for i in range(size)})
+    return {
+        "version": version,
+        "dataset": dataset,
+        "entries": [{"index": i, "sha256": _code_hash(rows[i]["code"])} for i in indices],
+    }
+
+
+def load_corpus(corpus: Dict[str, Any], rows: Sequence[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """Resolve corpus entries against the dataset, refusing silently changed snippets"""
+    snippets = []
+    for entry in corpus["entries"]:
+        row = rows[entry["index"]]
+        if _code_hash(row["code"]) != entry["sha256"]:
+            raise ValueError(f"Dataset row {entry['index']} changed since corpus version {corpus['version']}; "
+                             "rebuild the corpus with --build-corpus")
+        snippets.append({"index": entry["index"], "prompt": row["prompt"].strip().strip("'\""),
+                         "code": row["code"]})
+    return snippets
+
+
+def corpus_digest(corpus: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(corpus["entries"], sort_keys=True).encode()).hexdigest()[:16]
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def _remove_outputs(step_path: str):
+    path = Path(step_path)
+    for candidate in (path, path.with_name(path.name + ".gz"), path.with_name(path.name + ".zst")):
+        candidate.unlink(missing_ok=True)
+
+
+def run_corpus(execute, snippets: Sequence[Dict[str, Any]], repeat: int, timer: OperationTimer) -> Dict[str, Any]:
+    """Execute every snippet `repeat` times; per-op stats are summed over all runs"""
+    results = []
+    wall_total = 0.0
+    for snippet in snippets:
+        walls, error, ops = [], None, {}
+        for _ in range(repeat):
+            before = {name: dict(entry) for name, entry in timer.stats.items()}
+            start = time.perf_counter()
+            try:
+                output = execute(snippet["code"])
+                _remove_outputs(output["step_path"])
+            except Exception as e:
+                error = str(e)
+            walls.append(time.perf_counter() - start)
+            for name, entry in timer.stats.items():
+                previous = before.get(name, {"calls": 0, "self_seconds": 0.0})
+                calls = entry["calls"] - previous["calls"]
+                if calls:
+                    op = ops.setdefault(name, {"calls": 0, "self_seconds": 0.0})
+                    op["calls"] += calls
+                    op["self_seconds"] += entry["self_seconds"] - previous["self_seconds"]
+        wall_total += sum(walls)
+        top = sorted(ops.items(), key=lambda item: -item[1]["self_seconds"])[:5]
+        results.append({
+            "index": snippet["index"],
+            "prompt": snippet["prompt"][:120],
+            "status": "error" if error else "ok",
+            "error": error,
+            "wall_seconds": statistics.median(walls),
+            "top_operations": {name: {"calls": op["calls"] // repeat, "self_seconds": op["self_seconds"] / repeat}
+                               for name, op in top},
+        })
+
+    operations = {}
+    for name, entry in sorted(timer.stats.items(), key=lambda item: -item[1]["self_seconds"]):
+        operations[name] = {**entry, "self_share": entry["self_seconds"] / wall_total if wall_total else None}
+    return {"snippets": results, "operations": operations, "wall_seconds": wall_total}
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+                        min_delta: float = 0.01) -> List[str]:
+    """Operations whose self time per run grew beyond `tolerance` (relative)"""
+    if baseline.get("corpus", {}).get("sha256") != report["corpus"]["sha256"]:
+        return [f"corpus changed ({baseline.get('corpus', {}).get('sha256')} -> {report['corpus']['sha256']}); "
+                "timings are not comparable"]
+    regressions = []
+    old_ops, new_ops = baseline.get("operations", {}), report["operations"]
+    old_repeat, new_repeat = baseline.get("repeat", 1), report["repeat"]
+    for name, entry in new_ops.items():
+        if name not in old_ops:
+            continue
+        old = old_ops[name]["self_seconds"] / old_repeat
+        new = entry["self_seconds"] / new_repeat
+        if new > old * (1 + tolerance) and new - old > min_delta:
+            regressions.append(f"{name}: {old * 1000:.1f} -> {new * 1000:.1f} ms self time per run")
+    return regressions
+
+
+def print_report(report: Dict[str, Any], top: int = 15):
+    errors = sum(1 for snippet in report["snippets"] if snippet["status"] == "error")
+    print(f"\n📊 {len(report['snippets'])} snippets x {report['repeat']} runs in {report['wall_seconds']:.2f}s "
+          f"({errors} failed), corpus v{report['corpus']['version']} {report['corpus']['sha256']}")
+    print(f"\n{'operation':<20}{'calls':>8}{'self s':>10}{'incl s':>10}{'share':>8}")
+    for name, entry in list(report["operations"].items())[:top]:
+        print(f"{name:<20}{entry['calls']:>8}{entry['self_seconds']:>10.3f}{entry['inclusive_seconds']:>10.3f}"
+              f"{(entry['self_share'] or 0) * 100:>7.1f}%")
+    slowest = sorted(report["snippets"], key=lambda snippet: -snippet["wall_seconds"])[:5]
+    print("\n🐢 Slowest snippets:")
+    for snippet in slowest:
+        print(f"   #{snippet['index']:<5} {snippet['wall_seconds'] * 1000:8.1f} ms  {snippet['prompt'][:60]}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="CadQuery execution benchmark with per-operation timings")
+    parser.add_argument("--corpus", default=str(CORPUS_PATH), help="Versioned corpus file")
+    parser.add_argument("--dataset", default=str(DATASET_PATH), help="Dataset the corpus indexes into")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per snippet")
+    parser.add_argument("--limit", type=int, help="Only run the first N corpus snippets")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Fail if operation self times regressed against this report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--build-corpus", action="store_true", help="(Re)build the corpus file and exit")
+    parser.add_argument("--size", type=int, default=40, help="Snippets in a rebuilt corpus")
+    args = parser.parse_args(argv)
+    for name in ("corpus", "dataset", "json", "baseline"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    rows = load_rows(Path(args.dataset))
+    if args.build_corpus:
+        version = 1
+        if os.path.exists(args.corpus):
+            with open(args.corpus) as f:
+                version = json.load(f)["version"] + 1
+        corpus = build_corpus(rows, args.size, version, os.path.relpath(args.dataset, BACKEND_DIR))
+        with open(args.corpus, "w") as f:
+            json.dump(corpus, f, indent=2)
+            f.write("\n")
+        print(f"💾 Wrote corpus v{version} with {len(corpus['entries'])} snippets to {args.corpus}")
+        return 0
+
+    with open(args.corpus) as f:
+        corpus = json.load(f)
+    snippets = load_corpus(corpus, rows)[:args.limit]
+
+    # Executing through the app keeps the benchmark honest about what a
+    # request pays (export, sidecar compression, artifact registration)
+    os.environ.setdefault("GENX_CLEANUP_AUTOSTART", "false")
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, str(BACKEND_DIR))
+    from graph import langgraph_app
+
+    timer = OperationTimer()
+    with instrument(timer, extra=[(langgraph_app, "write_sidecars", "write_sidecars")]):
+        # One untimed run so imports and OCC initialisation are not attributed to a snippet
+        langgraph_app.cad_generator.execute_cadquery_code("result = cq.Workplane('XY').box(1, 1, 1)")
+        timer.reset()
+        results = run_corpus(langgraph_app.cad_generator.execute_cadquery_code, snippets, args.repeat, timer)
+
+    report = {
+        "corpus": {"version": corpus["version"], "sha256": corpus_digest(corpus), "snippets": len(snippets)},
+        "environment": {"python": platform.python_version(), "cadquery": cq.__version__,
+                        "platform": platform.platform(), "machine": platform.machine()},
+        "created_at": time.time(),
+        "repeat": args.repeat,
+        **results,
+    }
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            return 1
+        print(f"\n✅ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
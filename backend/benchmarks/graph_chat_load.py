@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""
+Offline load test for /graph_chat.
+
+Drives the FastAPI app in-process at a fixed concurrency with a prompt mix
+drawn from rag_dataset_merged.jsonl, so it runs on a laptop with no network:
+
+- the LLM is a dataset-backed stand-in: routing goes through MockLLM and code
+  generation answers with the dataset code for the prompt (so CadQuery really
+  executes), with optional simulated latency;
+- Pinecone is replaced by a local brute-force cosine index over the same
+  records, embedded with the app's own SentenceTransformer;
+- CadQuery execution, retrieval, coalescing and exports are the real code.
+
+Client-side latency is reported per route (p50/p95/p99), and per-node / LLM /
+retrieval / CadQuery latency comes from /metrics histogram deltas. A saved
+report can be used as a baseline to fail the run on regressions.
+
+Usage (from backend/):
+    python -m benchmarks.graph_chat_load --requests 200 --concurrency 8
+    python -m benchmarks.graph_chat_load --json report.json
+    python -m benchmarks.graph_chat_load --baseline report.json --tolerance 0.25
+
+With --url the same workload is sent to a running server instead (no stand-ins;
+node metrics are read from that server's /metrics). To benchmark offline with
+real model outputs, record a run against a server started with
+GENX_CASSETTE_MODE=record, then replay it in-process with the same seed:
+    python -m benchmarks.graph_chat_load --url http://localhost:8000 --seed 1
+    python -m benchmarks.graph_chat_load --seed 1 --cassette cassettes/graph.jsonl
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DATASET_PATH = BACKEND_DIR / "RAG_PineCone" / "rag_dataset_merged.jsonl"
+
+# Provider settings that would make the app call a real LLM
+PROVIDER_ENV = ("GROQ_API_KEY", "OPENAI_API_KEY", "ANTHROPIC_API_KEY", "USE_OLLAMA", "LLM_OPENAI_COMPAT_PROVIDERS")
+
+DEFAULT_MIX = "generate=0.6,code_gen=0.3,help=0.1"
+# "write code" routes to code_gen in MockLLM; the rest of the message is a dataset prompt
+CODE_GEN_PREFIX = "Write code to "
+HELP_QUESTIONS = [
+    "What is the difference between STEP and STL?",
+    "Explain what a fillet is",
+    "How to choose wall thickness for 3D printing?",
+    "What is a B-rep?",
+    "Why does my loft fail?",
+    "Explain constraints in sketches",
+    "What tolerances should I use for a press fit?",
+    "How to export for CNC machining?",
+]
+
+# Histograms read from /metrics, keyed by report section
+METRIC_HISTOGRAMS = {
+    "nodes": "genx_node_duration_seconds",
+    "llm": "genx_llm_duration_seconds",
+    "retrieval": "genx_retrieval_duration_seconds",
+    "cad_execution": "genx_cad_execution_duration_seconds",
+    "bulkhead_wait": "genx_bulkhead_wait_seconds",
+}
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+# -----------------------------
+# Workload
+# -----------------------------
+def clean_prompt(prompt: str) -> str:
+    """First line of a dataset prompt without the surrounding quotes"""
+    line = next((line for line in prompt.splitlines() if line.strip()), "")
+    return line.strip().strip("'\"").strip()
+
+
+def load_dataset(path: Path = DATASET_PATH) -> List[Dict[str, str]]:
+    records = []
+    with open(path) as f:
+        for line in f:
+            row = json.loads(line)
+            prompt = clean_prompt(row.get("prompt", ""))
+            if prompt and row.get("code"):
+                records.append({"prompt": prompt, "code": row["code"]})
+    return records
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        route, _, weight = part.partition("=")
+        if route.strip():
+            mix[route.strip()] = float(weight)
+    if not mix or any(weight < 0 for weight in mix.values()) or sum(mix.values()) <= 0:
+        raise ValueError(f"invalid mix: {text!r}")
+    unknown = set(mix) - {"generate", "code_gen", "help"}
+    if unknown:
+        raise ValueError(f"unknown routes in mix: {sorted(unknown)}")
+    return mix
+
+
+def build_workload(records: Sequence[Dict[str, str]], count: int, mix: Dict[str, float],
+                   seed: int = 0) -> List[Tuple[str, str]]:
+    """(intended route, message) pairs; the same seed gives the same workload"""
+    rng = random.Random(seed)
+    routes = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    workload = []
+    for route in routes:
+        if route == "help":
+            workload.append((route, rng.choice(HELP_QUESTIONS)))
+        elif route == "code_gen":
+            prompt = rng.choice(records)["prompt"]
+            workload.append((route, CODE_GEN_PREFIX + prompt[0].lower() + prompt[1:]))
+        else:
+            workload.append((route, rng.choice(records)["prompt"]))
+    return workload
+
+
+# -----------------------------
+# Offline stand-ins
+# -----------------------------
+class _Response:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class DatasetLLM:
+    """LLM stand-in: routes and answers help like MockLLM, writes code from the dataset"""
+
+    def __init__(self, fallback, records: Sequence[Dict[str, str]], latency: float = 0.0,
+                 jitter: float = 0.5, seed: int = 0):
+        self.fallback = fallback
+        self.records = list(records)
+        self.codes = {record["prompt"].lower(): record["code"] for record in self.records}
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+
+    def code_for(self, request: str) -> str:
+        key = request.lower()
+        if key.startswith(CODE_GEN_PREFIX.lower()):
+            key = key[len(CODE_GEN_PREFIX):]
+        code = self.codes.get(key)
+        if code is None:
+            # Unknown request: any dataset model, picked deterministically
+            digest = int(hashlib.sha1(key.encode()).hexdigest(), 16)
+            code = self.records[digest % len(self.records)]["code"]
+        # Dataset code leaves the solid in `solid`; code_gen expects an explicit export
+        return code + "\nresult = solid\ncq.exporters.export(result, step_file_path, exportType='STEP')\n"
+
+    async def ainvoke(self, messages):
+        if self.latency > 0:
+            await asyncio.sleep(self.latency * self.rng.uniform(1 - self.jitter, 1 + self.jitter))
+        content = messages[-1].content if messages else ""
+        if "CADQuery programmer" in content:
+            match = re.search(r'User request: "(.*)"', content)
+            return _Response(self.code_for(match.group(1) if match else content))
+        return await self.fallback.ainvoke(messages)
+
+
+class LocalPineconeIndex:
+    """Brute-force cosine index with the Pinecone query() interface"""
+
+    def __init__(self, records: Sequence[Dict[str, str]], latency: float = 0.0):
+        self.records = list(records)
+        self.latency = latency
+        self.vectors: Optional[np.ndarray] = None
+
+    def build(self, encoder, batch_size: int = 256):
+        vectors = np.asarray(encoder.encode([record["prompt"] for record in self.records],
+                                            batch_size=batch_size), dtype="float32")
+        self.vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def query(self, vector=None, top_k: int = 10, include_metadata: bool = False, **kwargs) -> Dict[str, Any]:
+        if self.vectors is None:
+            raise RuntimeError("local index has not been built")
+        if self.latency > 0:
+            time.sleep(self.latency)
+        query = np.asarray(vector, dtype="float32")
+        scores = self.vectors @ (query / max(np.linalg.norm(query), 1e-12))
+        top = np.argsort(-scores)[:top_k]
+        matches = []
+        for i in top:
+            match = {"id": str(i), "score": float(scores[i])}
+            if include_metadata:
+                match["metadata"] = dict(self.records[i])
+            matches.append(match)
+        return {"matches": matches}
+
+
+def install_local_pinecone(index: LocalPineconeIndex):
+    """Make pinecone.Pinecone(...).Index(...) return the local index"""
+    import pinecone
+
+    class LocalPinecone:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def Index(self, *args, **kwargs):
+            return index
+
+    pinecone.Pinecone = LocalPinecone
+
+
+def offline_app(records: Sequence[Dict[str, str]], llm_latency: float, retrieval_latency: float, seed: int,
+                cassette: Optional[str] = None, cassette_latency_scale: float = 1.0):
+    """Import the app with every external service replaced by a local stand-in
+    (or by a recorded cassette)"""
+    for name in PROVIDER_ENV:
+        os.environ.pop(name, None)
+    os.environ.setdefault("GENX_CLEANUP_AUTOSTART", "false")
+    if cassette:
+        os.environ.update({"GENX_CASSETTE_MODE": "replay", "GENX_CASSETTE_PATH": cassette,
+                           "GENX_CASSETTE_LATENCY_SCALE": str(cassette_latency_scale)})
+    else:
+        index = LocalPineconeIndex(records, latency=retrieval_latency)
+        install_local_pinecone(index)
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, str(BACKEND_DIR))
+    from graph import langgraph_app
+    import main
+
+    if cassette:
+        return main.app
+    print(f"🧮 Embedding {len(records)} records for the local Pinecone index...")
+    index.build(langgraph_app.cad_generator.rag_service.model)
+    langgraph_app.llm = DatasetLLM(langgraph_app.MockLLM(), records, latency=llm_latency, seed=seed)
+    return main.app
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+_SAMPLE = re.compile(r"^(\w+)(?:\{(.*)\})? (\S+)$")
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_histograms(text: str, name: str) -> Dict[str, Dict[str, Any]]:
+    """Cumulative buckets and sums of one histogram, keyed by its labels ("node=analyze")"""
+    series: Dict[str, Dict[str, Any]] = {}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if not match or not match.group(1).startswith(name):
+            continue
+        metric, label_text, value = match.groups()
+        labels = dict(_LABEL.findall(label_text or ""))
+        le = labels.pop("le", None)
+        key = ",".join(f"{k}={v}" for k, v in labels.items())
+        entry = series.setdefault(key, {"buckets": [], "sum": 0.0, "count": 0})
+        if metric == f"{name}_bucket":
+            entry["buckets"].append((float(le), float(value)))
+        elif metric == f"{name}_sum":
+            entry["sum"] = float(value)
+        elif metric == f"{name}_count":
+            entry["count"] = float(value)
+    return series
+
+
+def histogram_delta(before: Dict[str, Dict[str, Any]], after: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Observations recorded between two scrapes"""
+    delta = {}
+    for key, entry in after.items():
+        previous = before.get(key)
+        old_buckets = dict(previous["buckets"]) if previous else {}
+        count = entry["count"] - (previous["count"] if previous else 0)
+        if count <= 0:
+            continue
+        delta[key] = {
+            "buckets": [(le, cumulative - old_buckets.get(le, 0)) for le, cumulative in entry["buckets"]],
+            "sum": entry["sum"] - (previous["sum"] if previous else 0.0),
+            "count": count,
+        }
+    return delta
+
+
+def histogram_quantile(q: float, buckets: Sequence[Tuple[float, float]]) -> Optional[float]:
+    """Estimate a quantile from cumulative buckets, interpolating like Prometheus"""
+    if not buckets or buckets[-1][1] <= 0:
+        return None
+    rank = q * buckets[-1][1]
+    lower, below = 0.0, 0.0
+    for le, cumulative in buckets:
+        if cumulative >= rank:
+            if le == float("inf"):
+                return lower
+            if cumulative == below:
+                return le
+            return lower + (le - lower) * (rank - below) / (cumulative - below)
+        lower, below = le, cumulative
+    return lower
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Exact percentile with linear interpolation between closest ranks"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = q * (len(ordered) - 1)
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _summary(values: Sequence[float]) -> Dict[str, Any]:
+    summary = {"count": len(values), "mean": sum(values) / len(values) if values else None}
+    for q in QUANTILES:
+        summary[f"p{int(q * 100)}"] = percentile(values, q)
+    return summary
+
+
+def _histogram_summary(series: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    summaries = {}
+    for key, entry in sorted(series.items()):
+        summary = {"count": int(entry["count"]), "mean": entry["sum"] / entry["count"]}
+        for q in QUANTILES:
+            summary[f"p{int(q * 100)}"] = histogram_quantile(q, entry["buckets"])
+        summaries[key.split("=", 1)[-1] if key.count("=") == 1 else key] = summary
+    return summaries
+
+
+# -----------------------------
+# Load generation
+# -----------------------------
+def observed_route(payload: Dict[str, Any]) -> str:
+    """Route that served a /graph_chat response (GenBot covers generate and code_gen,
+    CADBot covers create_cad and the primitive fast path)"""
+    agent = payload.get("agent")
+    if agent == "HelpBot":
+        return "help"
+    try:
+        body = json.loads(payload.get("response") or "{}")
+    except (TypeError, ValueError):
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
+    if agent == "CADBot":
+        return "primitive" if body.get("method") == "deterministic_primitive" else "create_cad"
+    if agent == "GenBot":
+        return "code_gen" if "attempts" in body else "generate"
+    return agent or "unknown"
+
+
+def _failed(payload: Dict[str, Any]) -> bool:
+    if not payload.get("success"):
+        return True
+    try:
+        body = json.loads(payload.get("response") or "{}")
+    except (TypeError, ValueError):
+        return False
+    return isinstance(body, dict) and "error" in body
+
+
+async def run_load(client, workload: Sequence[Tuple[str, str]], concurrency: int) -> List[Dict[str, Any]]:
+    """Send the workload with at most `concurrency` requests in flight"""
+    queue: "asyncio.Queue[Tuple[str, str]]" = asyncio.Queue()
+    for item in workload:
+        queue.put_nowait(item)
+    results = []
+
+    async def worker():
+        while not queue.empty():
+            intended, message = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.post("/graph_chat", json={"message": message})
+                payload = response.json()
+                route = observed_route(payload)
+                failed = response.status_code != 200 or _failed(payload)
+                rejected = response.status_code == 429
+                if rejected:
+                    route = "rejected"
+            except Exception as e:
+                print(f"❌ Request failed: {e}")
+                route, failed, rejected = "unknown", True, False
+            results.append({"intended": intended, "route": route, "failed": failed, "rejected": rejected,
+                            "latency": time.perf_counter() - start})
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+def build_report(results: List[Dict[str, Any]], duration: float, metrics_before: str, metrics_after: str,
+                 config: Dict[str, Any]) -> Dict[str, Any]:
+    routes: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for result in results:
+        routes.setdefault(result["route"], []).append(result["latency"])
+        errors[result["route"]] = errors.get(result["route"], 0) + int(result["failed"])
+
+    report = {
+        "config": config,
+        "requests": len(results),
+        "errors": sum(errors.values()),
+        # 429s from full route bulkheads (also counted as errors)
+        "rejected": sum(1 for result in results if result.get("rejected")),
+        "misrouted": sum(1 for result in results if result["route"] != result["intended"]),
+        "duration_seconds": duration,
+        "throughput_rps": len(results) / duration if duration > 0 else None,
+        "latency": _summary([result["latency"] for result in results]),
+        "routes": {route: {**_summary(latencies), "errors": errors[route]}
+                   for route, latencies in sorted(routes.items())},
+    }
+    for section, name in METRIC_HISTOGRAMS.items():
+        delta = histogram_delta(parse_histograms(metrics_before, name), parse_histograms(metrics_after, name))
+        report[section] = _histogram_summary(delta)
+    return report
+
+
+def _ms(value: Optional[float]) -> str:
+    return f"{value * 1000:9.1f}" if value is not None else f"{'-':>9}"
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n📊 {report['requests']} requests in {report['duration_seconds']:.1f}s "
+          f"({report['throughput_rps']:.2f} req/s), {report['errors']} errors ({report.get('rejected', 0)} rejected), "
+          f"{report['misrouted']} misrouted")
+    sections = [("route", {"all": report["latency"], **report["routes"]})]
+    sections += [(section, report[section]) for section in METRIC_HISTOGRAMS]
+    for title, rows in sections:
+        if not rows:
+            continue
+        print(f"\n{title:<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+        for name, row in rows.items():
+            print(f"{name:<16}{row['count']:>7} {_ms(row['p50'])} {_ms(row['p95'])} {_ms(row['p99'])} {_ms(row['mean'])}")
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+                        min_delta: float = 0.005) -> List[str]:
+    """Regressions beyond `tolerance` (relative) in p95 latency or throughput"""
+    regressions = []
+    if baseline.get("throughput_rps") and report.get("throughput_rps") is not None:
+        if report["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"throughput {baseline['throughput_rps']:.2f} -> {report['throughput_rps']:.2f} req/s")
+    for section in ("routes", *METRIC_HISTOGRAMS):
+        for name, row in report.get(section, {}).items():
+            old = baseline.get(section, {}).get(name, {}).get("p95")
+            new = row.get("p95")
+            if old is not None and new is not None and new > old * (1 + tolerance) and new - old > min_delta:
+                regressions.append(f"{section}/{name} p95 {old * 1000:.1f} -> {new * 1000:.1f} ms")
+    return regressions
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    import httpx
+
+    rng = random.Random(args.seed)
+    records = load_dataset(Path(args.dataset))
+    if args.index_size and args.index_size < len(records):
+        records = rng.sample(records, args.index_size)
+    mix = parse_mix(args.mix)
+    workload = build_workload(records, args.requests, mix, seed=args.seed)
+    warmup = build_workload(records, args.warmup, mix, seed=args.seed + 1)
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=None)
+    else:
+        app = offline_app(records, args.llm_latency, args.retrieval_latency, args.seed,
+                          cassette=args.cassette, cassette_latency_scale=args.cassette_latency_scale)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=None)
+
+    async with client:
+        if warmup:
+            print(f"🔥 Warming up with {len(warmup)} requests...")
+            await run_load(client, warmup, 1)
+        metrics_before = (await client.get("/metrics")).text
+        print(f"🚀 Sending {len(workload)} requests at concurrency {args.concurrency}...")
+        start = time.perf_counter()
+        results = await run_load(client, workload, args.concurrency)
+        duration = time.perf_counter() - start
+        metrics_after = (await client.get("/metrics")).text
+
+    config = {"requests": args.requests, "concurrency": args.concurrency, "mix": mix, "seed": args.seed,
+              "llm_latency": args.llm_latency, "retrieval_latency": args.retrieval_latency,
+              "index_size": len(records), "url": args.url, "cassette": args.cassette}
+    return build_report(results, duration, metrics_before, metrics_after, config)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline load test for /graph_chat")
+    parser.add_argument("--requests", type=int, default=100, help="Requests to send (after warmup)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Route weights, e.g. generate=0.6,code_gen=0.3,help=0.1")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the prompt sample and simulated latency")
+    parser.add_argument("--warmup", type=int, default=3, help="Requests sent before measuring")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated LLM latency per call (seconds)")
+    parser.add_argument("--retrieval-latency", type=float, default=0.0,
+                        help="Simulated Pinecone latency per query (seconds)")
+    parser.add_argument("--index-size", type=int, default=1000,
+                        help="Dataset records to sample for prompts and the local index (0 = all)")
+    parser.add_argument("--dataset", default=str(DATASET_PATH), help="Prompt/code dataset (JSONL)")
+    parser.add_argument("--url", help="Load a running server instead of the offline in-process app")
+    parser.add_argument("--cassette", help="Replay recorded LLM/Pinecone calls instead of the stand-ins")
+    parser.add_argument("--cassette-latency-scale", type=float, default=1.0,
+                        help="Multiplier for recorded latencies on replay (0 = instant)")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Fail if p95 latency or throughput regressed against this report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    args = parser.parse_args(argv)
+    # The offline app runs from backend/, so resolve file arguments first
+    for name in ("dataset", "json", "baseline", "cassette"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            return 1
+        print(f"\n✅ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
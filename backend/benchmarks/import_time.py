@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Cold import-time report and startup budget.
+
+Imports a module in fresh interpreters with ``python -X importtime`` and
+reports the wall time of the import (median over --runs), the packages that
+account for it (self time grouped by top-level package) and which heavy
+subsystems were loaded. Exits non-zero when the median exceeds the budget
+(--budget, default GENX_IMPORT_BUDGET_SECONDS), so CLI tools, test runs and
+autoscaled workers notice when a heavy import creeps back to module level.
+
+Usage (from backend/):
+    python -m benchmarks.import_time graph.langgraph_app main --runs 5
+    python -m benchmarks.import_time graph.langgraph_app --budget 2 --json import_time.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_BUDGET_SECONDS = float(os.getenv("GENX_IMPORT_BUDGET_SECONDS", "3.0"))
+# Subsystems langgraph_app must only load on first use (or in warmup())
+HEAVY_MODULES = ("cadquery", "OCP", "sentence_transformers", "torch", "transformers", "faiss", "pandas",
+                 "pinecone", "langgraph", "langchain_openai")
+
+_RESULT_PREFIX = "IMPORT_TIME_RESULT "
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print({prefix!r} + json.dumps({{"seconds": seconds, "heavy": [m for m in {heavy!r} if m in sys.modules]}}), flush=True)
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Entries of ``-X importtime`` output: module, self and cumulative seconds, depth"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_seconds": int(self_us) / 1e6,
+            "cumulative_seconds": int(cumulative_us) / 1e6,
+        })
+    return entries
+
+
+def package_totals(entries: Sequence[Dict[str, Any]]) -> Dict[str, float]:
+    """Self time summed per top-level package, largest first"""
+    totals: Dict[str, float] = {}
+    for entry in entries:
+        package = entry["module"].split(".")[0]
+        totals[package] = totals.get(package, 0.0) + entry["self_seconds"]
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def profile_import(module: str, runs: int = 3, cwd: Optional[Path] = None,
+                   env: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, Any]:
+    """Import `module` in `runs` fresh interpreters and summarise the cost (None in `env` unsets a variable)"""
+    child_env = {**os.environ, **(env or {})}
+    child_env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND_DIR), child_env.get("PYTHONPATH")]))
+    child_env = {name: value for name, value in child_env.items() if value is not None}
+
+    timings, heavy, packages = [], [], {}
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                                    _CHILD.format(module=module, heavy=HEAVY_MODULES, prefix=_RESULT_PREFIX)],
+                                   cwd=str(cwd or BACKEND_DIR), env=child_env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+        result = json.loads(next(line for line in completed.stdout.splitlines()
+                                 if line.startswith(_RESULT_PREFIX))[len(_RESULT_PREFIX):])
+        timings.append(result["seconds"])
+        heavy = result["heavy"]
+        packages = package_totals(parse_importtime(completed.stderr))
+
+    return {
+        "module": module,
+        "runs": timings,
+        "median_seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+        "heavy_modules_loaded": heavy,
+        "packages": packages,
+    }
+
+
+def print_report(profile: Dict[str, Any], budget: float, top: int = 12):
+    status = "✅" if profile["median_seconds"] <= budget else "❌"
+    print(f"\n{status} {profile['module']}: median {profile['median_seconds']:.3f}s "
+          f"(min {profile['min_seconds']:.3f}s, budget {budget:.1f}s)")
+    print(f"   heavy modules loaded: {', '.join(profile['heavy_modules_loaded']) or 'none'}")
+    for package, seconds in list(profile["packages"].items())[:top]:
+        print(f"   {seconds * 1000:9.1f} ms  {package}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cold import-time report and startup budget")
+    parser.add_argument("modules", nargs="*", default=["graph.langgraph_app"], help="Modules to import")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per module")
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS,
+                        help="Fail if the median import time exceeds this (seconds)")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args(argv)
+
+    profiles = [profile_import(module, runs=args.runs) for module in args.modules]
+    for profile in profiles:
+        print_report(profile, args.budget)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"budget_seconds": args.budget, "profiles": profiles}, f, indent=2)
+        print(f"\n💾 Report written to {args.json}")
+    return 0 if all(profile["median_seconds"] <= args.budget for profile in profiles) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""
+Persistent index of generated model artifacts (STEP, STL, GLB, ...).
+
+Every exported file is registered with its size, expiry time and last access
+time in a small SQLite database shared by all workers:
+
+- expiry: rows are ordered by an indexed ``expires_at`` column, so the sweeper
+  pops due artifacts from the front of that queue and sleeps until the next
+  one is due instead of scanning the directory;
+- quota: when registering a file pushes the total over the byte quota, the
+  least recently accessed artifacts are evicted right away rather than at the
+  next sweep;
+- stats: per-format file and byte totals are updated in the same transaction
+  as every insert and delete, so reading them never touches the filesystem.
+
+The index survives restarts; files already on disk but unknown to it are
+adopted on startup using their mtime.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from . import metrics
+from .workers import ProcessLocal
+
+ARTIFACTS_DB_PATH = os.getenv("GENX_ARTIFACTS_DB", "artifacts.db")
+# Default lifetime of a generated artifact
+ARTIFACT_MAX_AGE_MINUTES = float(os.getenv("GENX_TEMP_MODELS_MAX_AGE_MINUTES", "30"))
+# Total size of temp_models before least recently used artifacts are evicted
+ARTIFACT_QUOTA_MB = float(os.getenv("GENX_TEMP_MODELS_QUOTA_MB", "1024"))
+# Compressed download sidecars (model.step.gz, ...) live and die with their model
+COMPANION_SUFFIXES = (".gz", ".zst")
+
+
+def companions(path: Path) -> List[Path]:
+    return [path.with_name(path.name + suffix) for suffix in COMPANION_SUFFIXES]
+
+
+def artifact_format(path: Path) -> str:
+    """File format used for stats, e.g. 'step' for model_x.step"""
+    return path.suffix.lstrip(".").lower() or "other"
+
+
+class ArtifactIndex:
+    """SQLite-backed expiry queue, LRU and size accounting for one directory.
+
+    Several directories can share a database; every row is scoped by the
+    directory's absolute path.
+    """
+
+    def __init__(self, directory: Union[str, Path], db_path: Union[str, Path] = ARTIFACTS_DB_PATH,
+                 max_age_seconds: float = ARTIFACT_MAX_AGE_MINUTES * 60,
+                 quota_bytes: int = int(ARTIFACT_QUOTA_MB * 1024 * 1024)):
+        self.directory = Path(directory)
+        self._dir = str(self.directory.resolve())
+        self.db_path = Path(db_path)
+        self.max_age_seconds = max_age_seconds
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+        self._local = ProcessLocal(self._connect)
+        metrics.ARTIFACT_STORE_BYTES.set_function(self.total_bytes)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use in each worker, never inherited across fork()
+        return self._local.get()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    directory TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    format TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (directory, name)
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS artifacts_expiry ON artifacts (directory, expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS artifacts_lru ON artifacts (directory, last_access)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS artifact_totals (
+                    directory TEXT NOT NULL,
+                    format TEXT NOT NULL,
+                    files INTEGER NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    PRIMARY KEY (directory, format)
+                )""")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front so read-then-write sequences
+        # stay consistent when several workers share the database
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    # ----- bookkeeping (callers run inside _transaction) -----
+
+    def _add_totals(self, fmt: str, files: int, size: int):
+        self._conn.execute(
+            "INSERT INTO artifact_totals (directory, format, files, bytes) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(directory, format) DO UPDATE SET "
+            "files = files + excluded.files, bytes = bytes + excluded.bytes",
+            (self._dir, fmt, files, size))
+
+    def _insert(self, name: str, size: int, created_at: float, expires_at: float):
+        fmt = artifact_format(Path(name))
+        previous = self._conn.execute("SELECT format, size FROM artifacts WHERE directory = ? AND name = ?",
+                                      (self._dir, name)).fetchone()
+        if previous is not None:
+            self._add_totals(previous["format"], -1, -previous["size"])
+        self._conn.execute(
+            "INSERT OR REPLACE INTO artifacts (directory, name, format, size, created_at, expires_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", (self._dir, name, fmt, size, created_at, expires_at, created_at))
+        self._add_totals(fmt, 1, size)
+
+    def _delete(self, rows: List[sqlite3.Row], reason: str) -> List[str]:
+        removed = []
+        for row in rows:
+            cursor = self._conn.execute("DELETE FROM artifacts WHERE directory = ? AND name = ?",
+                                        (self._dir, row["name"]))
+            if cursor.rowcount != 1:
+                continue  # Another worker got there first
+            self._add_totals(row["format"], -1, -row["size"])
+            for path in [self.directory / row["name"], *companions(self.directory / row["name"])]:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"❌ Failed to remove {path.name}: {e}")
+            metrics.ARTIFACT_REMOVALS.inc(reason=reason)
+            removed.append(row["name"])
+        return removed
+
+    def _evict_over_quota(self, keep: Optional[str] = None) -> List[str]:
+        total = self._total_bytes()
+        if total <= self.quota_bytes:
+            return []
+        victims, freed = [], 0
+        for row in self._conn.execute(
+                "SELECT name, format, size FROM artifacts WHERE directory = ? AND name IS NOT ? "
+                "ORDER BY last_access", (self._dir, keep)):
+            if total - freed <= self.quota_bytes:
+                break
+            victims.append(row)
+            freed += row["size"]
+        return self._delete(victims, "quota")
+
+    # ----- public API -----
+
+    def register(self, path: Union[str, Path], ttl_seconds: Optional[float] = None) -> List[str]:
+        """Track a newly written artifact (and its sidecars); returns names evicted to stay under quota"""
+        path = Path(path)
+        now = time.time()
+        size = path.stat().st_size + sum(c.stat().st_size for c in companions(path) if c.exists())
+        ttl = self.max_age_seconds if ttl_seconds is None else ttl_seconds
+        with self._transaction():
+            self._insert(path.name, size, now, now + ttl)
+            evicted = self._evict_over_quota(keep=path.name)
+        for name in evicted:
+            print(f"🗑️ Evicted least recently used artifact to stay under quota: {name}")
+        return evicted
+
+    def touch(self, name: str):
+        """Record an access for LRU eviction"""
+        with self._transaction():
+            self._conn.execute("UPDATE artifacts SET last_access = ? WHERE directory = ? AND name = ?",
+                               (time.time(), self._dir, name))
+
+    def expire(self, now: Optional[float] = None, batch: int = 500) -> List[str]:
+        """Remove every artifact whose expiry has passed"""
+        now = time.time() if now is None else now
+        removed = []
+        while True:
+            with self._transaction():
+                rows = self._conn.execute(
+                    "SELECT name, format, size FROM artifacts WHERE directory = ? AND expires_at <= ? "
+                    "ORDER BY expires_at LIMIT ?", (self._dir, now, batch)).fetchall()
+                removed.extend(self._delete(rows, "expired"))
+            if len(rows) < batch:
+                return removed
+
+    def next_expiry(self) -> Optional[float]:
+        """Expiry time at the front of the queue, if any"""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(expires_at) FROM artifacts WHERE directory = ?",
+                                     (self._dir,)).fetchone()
+        return row[0]
+
+    def reconcile(self) -> Dict[str, int]:
+        """Adopt untracked files on disk and drop rows whose file is gone"""
+        files = {path.name: path for path in self.directory.iterdir()
+                 if path.is_file() and not path.name.startswith(".")}
+        # Sidecars are accounted to their model file
+        on_disk = {name: path for name, path in files.items()
+                   if not (path.suffix in COMPANION_SUFFIXES and path.stem in files)}
+        with self._transaction():
+            known = {row["name"]: row for row in self._conn.execute(
+                "SELECT name, format, size FROM artifacts WHERE directory = ?", (self._dir,))}
+            adopted = 0
+            for name, path in on_disk.items():
+                if name not in known:
+                    stat = path.stat()
+                    size = stat.st_size + sum(c.stat().st_size for c in companions(path) if c.exists())
+                    self._insert(name, size, stat.st_mtime, stat.st_mtime + self.max_age_seconds)
+                    adopted += 1
+            missing = [row for name, row in known.items() if name not in on_disk]
+            self._delete(missing, "missing")
+            self._evict_over_quota()
+        return {"adopted": adopted, "missing": len(missing)}
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM artifact_totals WHERE directory = ?",
+                                  (self._dir,)).fetchone()[0]
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT format, files, bytes FROM artifact_totals WHERE directory = ? AND files > 0 ORDER BY format",
+                (self._dir,)).fetchall()
+        by_format = {row["format"]: {"files": row["files"], "bytes": row["bytes"]} for row in rows}
+        return {
+            "files": sum(entry["files"] for entry in by_format.values()),
+            "bytes": sum(entry["bytes"] for entry in by_format.values()),
+            "quota_bytes": self.quota_bytes,
+            "by_format": by_format,
+        }
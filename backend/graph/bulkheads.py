@@ -0,0 +1,169 @@
+"""
+Per-route bulkheads: bounded concurrency and bounded wait queues.
+
+Every graph route (analyze, help, generate, code_gen, create_cad, edit,
+primitive) gets its own pool of execution slots and its own wait queue, so a
+burst of expensive code_gen requests queues behind code_gen's slots instead
+of starving cheap help answers of LLM calls and event loop time. Parameter
+edits of generated models run outside the graph in their own ``parametric``
+bulkhead. When a route's queue is full new work is rejected with
+BulkheadFull, which /graph_chat answers with 429 Too Many Requests and a
+Retry-After estimated from the route's recent service time.
+
+Limits are per worker process and configured with GENX_BULKHEADS as
+``route=concurrency:queue`` pairs. Active slots, queue depth, queue wait
+time and rejections are exported in /metrics for autoscaling.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Tuple
+
+from . import metrics
+from . import tracing
+
+BULKHEADS = os.getenv("GENX_BULKHEADS", "analyze=32:128,help=16:64,generate=4:16,code_gen=4:16,create_cad=16:64,edit=4:16,primitive=16:64,parametric=4:16")
+# Service time assumed for Retry-After before a route has finished any work
+DEFAULT_SERVICE_SECONDS = float(os.getenv("GENX_BULKHEAD_DEFAULT_SERVICE_SECONDS", "5"))
+MAX_RETRY_AFTER_SECONDS = int(os.getenv("GENX_BULKHEAD_MAX_RETRY_AFTER", "60"))
+# Weight of the newest sample in the service time moving average
+SERVICE_TIME_ALPHA = 0.2
+
+
+class BulkheadFull(Exception):
+    """A route's concurrency slots and wait queue are all taken"""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"The {name} route is at capacity, please retry in {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    """At most max_concurrent holders; up to max_queue more wait in FIFO order"""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int):
+        if max_concurrent < 1 or max_queue < 0:
+            raise ValueError(f"Bulkhead {name} needs concurrency >= 1 and queue >= 0")
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.active = 0
+        self.service_time = None
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0}
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead of a new request has likely drained"""
+        service_time = self.service_time if self.service_time is not None else DEFAULT_SERVICE_SECONDS
+        estimate = service_time * (self.queue_depth + 1) / self.max_concurrent
+        return max(1, min(MAX_RETRY_AFTER_SECONDS, math.ceil(estimate)))
+
+    async def acquire(self) -> float:
+        """Take a slot, waiting in the queue if needed; returns the wait in seconds"""
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self.stats["admitted"] += 1
+            return 0.0
+        if self.queue_depth >= self.max_queue:
+            self.stats["rejected"] += 1
+            metrics.BULKHEAD_REJECTIONS.inc(route=self.name)
+            raise BulkheadFull(self.name, self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.stats["queued"] += 1
+        start = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the caller gave up; pass it on
+                self.release()
+            elif future in self._waiters:
+                self._waiters.remove(future)
+            raise
+        self.stats["admitted"] += 1
+        return time.perf_counter() - start
+
+    def release(self):
+        # Hand the slot straight to the oldest waiter so newcomers cannot jump the queue
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        with tracing.span(f"queue.{self.name}") as span:
+            wait = await self.acquire()
+            span.set(wait_ms=round(wait * 1000, 3))
+        metrics.BULKHEAD_WAIT.observe(wait, route=self.name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.service_time = elapsed if self.service_time is None else \
+                SERVICE_TIME_ALPHA * elapsed + (1 - SERVICE_TIME_ALPHA) * self.service_time
+            self.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queue_depth,
+            "service_time_seconds": self.service_time,
+            "retry_after_seconds": self.retry_after(),
+            **self.stats,
+        }
+
+
+def parse_bulkheads(spec: str) -> Dict[str, Tuple[int, int]]:
+    """Parse ``route=concurrency:queue`` pairs (comma-separated)"""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        try:
+            route, limit = item.split("=")
+            concurrency, queue = limit.split(":")
+            limits[route.strip()] = (int(concurrency), int(queue))
+        except ValueError:
+            raise ValueError(f"Invalid GENX_BULKHEADS entry {item!r}, expected route=concurrency:queue")
+    return limits
+
+
+def build_bulkheads(spec: str) -> Dict[str, Bulkhead]:
+    return {route: Bulkhead(route, concurrency, queue) for route, (concurrency, queue) in parse_bulkheads(spec).items()}
+
+
+route_bulkheads = build_bulkheads(BULKHEADS)
+for _route, _bulkhead in route_bulkheads.items():
+    metrics.BULKHEAD_ACTIVE.set_function(lambda bulkhead=_bulkhead: bulkhead.active, route=_route)
+    metrics.BULKHEAD_QUEUE_DEPTH.set_function(lambda bulkhead=_bulkhead: bulkhead.queue_depth, route=_route)
+    metrics.BULKHEAD_CAPACITY.set(_bulkhead.max_concurrent, route=_route, kind="concurrency")
+    metrics.BULKHEAD_CAPACITY.set(_bulkhead.max_queue, route=_route, kind="queue")
+
+
+def guarded(route: str, node, bulkheads: Dict[str, Bulkhead] = None):
+    """Wrap an async graph node so it runs inside its route's bulkhead"""
+    bulkhead = (route_bulkheads if bulkheads is None else bulkheads).get(route)
+    if bulkhead is None:
+        return node
+
+    async def wrapper(state):
+        async with bulkhead.slot():
+            return await node(state)
+    return wrapper
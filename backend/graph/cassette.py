@@ -0,0 +1,214 @@
+"""
+Record/replay cassettes for LLM and vector-store calls.
+
+Perf experiments on the full graph should not spend API credits or depend
+on provider latency noise. With GENX_CASSETTE_MODE=record every
+``llm.ainvoke`` and ``pinecone_index.query`` call is appended to a JSONL
+cassette with its request key, response and original latency. With
+GENX_CASSETTE_MODE=replay the same calls are served from the cassette
+without touching the network, optionally sleeping for the recorded latency
+(scaled by GENX_CASSETTE_LATENCY_SCALE; 0 replays instantly).
+
+Requests are keyed by a hash of their content (prompt messages, or the query
+vector rounded to VECTOR_DECIMALS plus query options). When a key was
+recorded several times, replays cycle through the recordings in order. A
+replay miss raises CassetteMiss instead of silently calling the provider.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from langchain_core.messages import AIMessage
+
+from . import metrics
+
+CASSETTE_MODES = ("off", "record", "replay")
+CASSETTE_MODE = os.getenv("GENX_CASSETTE_MODE", "off").lower()
+CASSETTE_PATH = os.getenv("GENX_CASSETTE_PATH", "cassettes/graph.jsonl")
+# Multiplier for recorded latencies on replay (1.0 = original timing)
+CASSETTE_LATENCY_SCALE = float(os.getenv("GENX_CASSETTE_LATENCY_SCALE", "0"))
+# Embeddings differ in the last float bits across machines and BLAS builds
+VECTOR_DECIMALS = 4
+
+
+class CassetteMiss(KeyError):
+    """A replayed call has no recording"""
+
+
+def _message_request(messages) -> List[Dict[str, str]]:
+    return [{"type": getattr(message, "type", type(message).__name__),
+             "content": getattr(message, "content", str(message))} for message in messages]
+
+
+def _query_request(args: Tuple, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    request = dict(kwargs)
+    if args:
+        request["args"] = list(args)
+    vector = request.pop("vector", None)
+    if vector is not None:
+        request["vector"] = [round(float(value), VECTOR_DECIMALS) for value in vector]
+    return request
+
+
+def _dump_llm_response(response) -> Dict[str, Any]:
+    if isinstance(response, str):
+        # LLM (not chat model) wrappers such as Ollama return plain text
+        return {"text": response}
+    return {"content": response.content,
+            "usage_metadata": getattr(response, "usage_metadata", None),
+            "response_metadata": getattr(response, "response_metadata", None) or {}}
+
+
+def _load_llm_response(data: Dict[str, Any]):
+    if "text" in data:
+        return data["text"]
+    kwargs = {"content": data["content"], "response_metadata": data.get("response_metadata") or {}}
+    if data.get("usage_metadata"):
+        kwargs["usage_metadata"] = data["usage_metadata"]
+    return AIMessage(**kwargs)
+
+
+def _dump_query_response(response) -> Dict[str, Any]:
+    if hasattr(response, "to_dict"):
+        return response.to_dict()
+    return dict(response)
+
+
+class Cassette:
+    """JSONL store of recorded calls, keyed by request content"""
+
+    def __init__(self, path: Union[str, Path], mode: str = "off", latency_scale: float = 0.0):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"GENX_CASSETTE_MODE must be one of {CASSETTE_MODES}, got {mode!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._recordings: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._replayed: Dict[str, int] = {}
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @staticmethod
+    def key(kind: str, request: Any) -> str:
+        payload = json.dumps([kind, request], sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def record(self, kind: str, request: Any, response: Dict[str, Any], latency: float):
+        entry = {"kind": kind, "key": self.key(kind, request), "latency": latency,
+                 "recorded_at": time.time(), "response": response}
+        if kind == "llm":
+            # Prompts are kept for inspection; query vectors only in the key
+            entry["request"] = request
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                # Several workers may record into the same cassette
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.write(line)
+                f.flush()
+                fcntl.flock(f, fcntl.LOCK_UN)
+            if self._recordings is not None:
+                self._recordings.setdefault(entry["key"], []).append(entry)
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        recordings: Dict[str, List[Dict[str, Any]]] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        recordings.setdefault(entry["key"], []).append(entry)
+            print(f"📼 Loaded {sum(len(v) for v in recordings.values())} recordings from {self.path}")
+        return recordings
+
+    def lookup(self, kind: str, request: Any) -> Dict[str, Any]:
+        """Next recording for a request (cycling through repeats)"""
+        key = self.key(kind, request)
+        with self._lock:
+            if self._recordings is None:
+                self._recordings = self._load()
+            entries = self._recordings.get(key)
+            if not entries:
+                metrics.record_cache(f"cassette_{kind}", False)
+                raise CassetteMiss(f"No {kind} recording in {self.path} for request {key[:12]}")
+            index = self._replayed.get(key, 0)
+            self._replayed[key] = index + 1
+        metrics.record_cache(f"cassette_{kind}", True)
+        return entries[index % len(entries)]
+
+    def replay_delay(self, entry: Dict[str, Any]) -> float:
+        return entry["latency"] * self.latency_scale
+
+    def wrap_llm(self, llm):
+        return CassetteLLM(llm, self) if self.mode != "off" else llm
+
+    def wrap_index(self, index):
+        return CassetteIndex(index, self) if self.mode != "off" else index
+
+
+class CassetteLLM:
+    """Records or replays ainvoke() of any LangChain-style LLM"""
+
+    def __init__(self, llm, cassette: Cassette):
+        self.llm = llm
+        self.cassette = cassette
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        request = _message_request(messages)
+        if self.cassette.replaying:
+            entry = self.cassette.lookup("llm", request)
+            delay = self.cassette.replay_delay(entry)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return _load_llm_response(entry["response"])
+
+        start = time.perf_counter()
+        response = await self.llm.ainvoke(messages, *args, **kwargs)
+        self.cassette.record("llm", request, _dump_llm_response(response), time.perf_counter() - start)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+class CassetteIndex:
+    """Records or replays query() of a Pinecone index (no index needed on replay)"""
+
+    def __init__(self, index, cassette: Cassette):
+        self.index = index
+        self.cassette = cassette
+
+    def query(self, *args, **kwargs):
+        request = _query_request(args, kwargs)
+        if self.cassette.replaying:
+            entry = self.cassette.lookup("pinecone", request)
+            delay = self.cassette.replay_delay(entry)
+            if delay > 0:
+                time.sleep(delay)
+            return entry["response"]
+
+        start = time.perf_counter()
+        response = self.index.query(*args, **kwargs)
+        self.cassette.record("pinecone", request, _dump_query_response(response), time.perf_counter() - start)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.index, name)
+
+
+default_cassette = Cassette(CASSETTE_PATH, CASSETTE_MODE, CASSETTE_LATENCY_SCALE)
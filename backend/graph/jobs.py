@@ -0,0 +1,281 @@
+"""
+Asynchronous job API with checkpointed graph state.
+
+A job runs the LangGraph pipeline in the background and checkpoints the graph
+state to a local SQLite store after every node (and after every failed
+code_gen attempt). When the worker restarts, unfinished jobs resume from their
+latest checkpoint instead of starting over. With several workers, each job is
+owned by the worker running it and only jobs whose owner has exited are
+resumed, by exactly one of the surviving workers.
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from .workers import ProcessLocal, worker_alive, worker_id
+
+JOBS_DB_PATH = os.getenv("GENX_JOBS_DB", "jobs.db")
+
+# Checkpoint hook for the job currently running in this context. Nodes call
+# checkpoint() unconditionally; it is a no-op outside of a job.
+_current_checkpointer: contextvars.ContextVar[Optional[Callable[[str, dict], None]]] = \
+    contextvars.ContextVar("current_checkpointer", default=None)
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+def checkpoint(node: str, state: dict):
+    """Checkpoint graph state for the current job (no-op outside a job)"""
+    hook = _current_checkpointer.get()
+    if hook is not None:
+        hook(node, state)
+
+
+def checkpointed(name: str, node):
+    """Wrap a graph node so its output state is checkpointed"""
+    async def wrapper(state):
+        new_state = await node(state)
+        checkpoint(name, new_state)
+        return new_state
+    return wrapper
+
+
+class JobStore:
+    """SQLite store for jobs and their state checkpoints"""
+
+    def __init__(self, db_path: str = JOBS_DB_PATH, encoder: Optional[type] = None):
+        self.db_path = Path(db_path)
+        self.encoder = encoder
+        self._lock = threading.Lock()
+        self._local = ProcessLocal(self._connect)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use in each worker, never inherited across fork()
+        return self._local.get()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    message TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    route TEXT,
+                    result TEXT,
+                    error TEXT,
+                    owner TEXT,
+                    session_id TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    node TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                )""")
+            columns = [row["name"] for row in conn.execute("PRAGMA table_info(jobs)")]
+            for column in ("owner", "session_id"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+        return conn
+
+    def _dumps(self, value) -> str:
+        return json.dumps(value, cls=self.encoder, default=str)
+
+    def create_job(self, message: str, owner: Optional[str] = None, session_id: Optional[str] = None) -> str:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, message, status, owner, session_id, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, message, owner, session_id, now, now))
+        return job_id
+
+    def claim_job(self, job_id: str, previous_owner: Optional[str], owner: str) -> bool:
+        """Take over a job only if its owner is still previous_owner (compare-and-swap)"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET owner = ?, updated_at = ? WHERE id = ? AND owner IS ?",
+                (owner, time.time(), job_id, previous_owner))
+        return cursor.rowcount == 1
+
+    def update_job(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def add_checkpoint(self, job_id: str, node: str, state: dict) -> int:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM checkpoints WHERE job_id = ?", (job_id,)).fetchone()
+            seq = row[0]
+            self._conn.execute(
+                "INSERT INTO checkpoints (job_id, seq, node, state, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, seq, node, self._dumps(state), time.time()))
+            self._conn.execute(
+                "UPDATE jobs SET route = COALESCE(?, route), updated_at = ? WHERE id = ?",
+                (state.get("route"), time.time(), job_id))
+        return seq
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM checkpoints WHERE job_id = ?", (job_id,)).fetchone()[0]
+        job = dict(row)
+        job["checkpoints"] = count
+        return job
+
+    def get_checkpoints(self, job_id: str, after_seq: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, node, state, created_at FROM checkpoints WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after_seq)).fetchall()
+        return [{**dict(row), "state": json.loads(row["state"])} for row in rows]
+
+    def latest_state(self, job_id: str) -> Optional[dict]:
+        checkpoints = self.get_checkpoints(job_id)
+        return checkpoints[-1]["state"] if checkpoints else None
+
+    def pending_jobs(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at").fetchall()
+        return [row["id"] for row in rows]
+
+
+class JobManager:
+    """Runs graph jobs in the background and notifies subscribers"""
+
+    def __init__(self, store: JobStore, run_fn: Callable[[dict], Awaitable[dict]]):
+        self.store = store
+        self.run_fn = run_fn
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    @property
+    def owner(self) -> str:
+        # Looked up per call: a manager built in the gunicorn master before
+        # fork() must report the worker it runs in, not the master
+        return worker_id()
+
+    def submit(self, message: str, session_id: Optional[str] = None) -> str:
+        """Create a job and start running it; returns the job ID immediately
+
+        run_fn gets the session_id with the input state, also when the job is resumed.
+        """
+        job_id = self.store.create_job(message, owner=self.owner, session_id=session_id)
+        self._start(job_id, {"message": message, "session_id": session_id})
+        print(f"📥 Job {job_id} queued: '{message}'")
+        return job_id
+
+    async def resume_pending(self) -> List[str]:
+        """Resume jobs left unfinished by a previous worker from their latest checkpoint"""
+        resumed = []
+        for job_id in self.store.pending_jobs():
+            if job_id in self._tasks:
+                continue
+            job = self.store.get_job(job_id)
+            # Jobs of live sibling workers are theirs; orphans go to whoever claims first
+            if job["owner"] != self.owner and worker_alive(job["owner"]):
+                continue
+            if not self.store.claim_job(job_id, job["owner"], self.owner):
+                continue
+            state = self.store.latest_state(job_id) or {"message": job["message"]}
+            state = {**state, "session_id": job["session_id"]}
+            if state.get("result") is not None:
+                # Final node already checkpointed; only the status update was lost
+                self.store.update_job(job_id, status="succeeded", route=state.get("route"),
+                                      result=self.store._dumps(state["result"]))
+                continue
+            self._start(job_id, state)
+            resumed.append(job_id)
+            print(f"♻️ Resuming job {job_id} from checkpoint {job['checkpoints']}")
+        return resumed
+
+    def _start(self, job_id: str, state: dict):
+        task = asyncio.ensure_future(self._run(job_id, state))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def _run(self, job_id: str, state: dict):
+        def hook(node: str, node_state: dict):
+            seq = self.store.add_checkpoint(job_id, node, node_state)
+            self._publish(job_id, {"event": "checkpoint", "seq": seq, "node": node})
+
+        token = _current_checkpointer.set(hook)
+        try:
+            self.store.update_job(job_id, status="running")
+            self._publish(job_id, {"event": "running"})
+            final_state = await self.run_fn(state)
+            self.store.update_job(job_id, status="succeeded", route=final_state.get("route"),
+                                  result=self.store._dumps(final_state.get("result")))
+            self._publish(job_id, {"event": "succeeded"})
+            print(f"✅ Job {job_id} succeeded")
+        except asyncio.CancelledError:
+            # Leave the job pending so the next worker resumes it
+            raise
+        except Exception as e:
+            self.store.update_job(job_id, status="failed", error=str(e))
+            self._publish(job_id, {"event": "failed", "error": str(e)})
+            print(f"❌ Job {job_id} failed: {e}")
+        finally:
+            _current_checkpointer.reset(token)
+
+    def _publish(self, job_id: str, event: dict):
+        for queue in self._subscribers.get(job_id, []):
+            queue.put_nowait(event)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[dict]:
+        """Yield job events until the job reaches a terminal status"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        try:
+            job = self.store.get_job(job_id)
+            if job is None:
+                return
+            for cp in self.store.get_checkpoints(job_id):
+                yield {"event": "checkpoint", "seq": cp["seq"], "node": cp["node"]}
+            if job["status"] in TERMINAL_STATUSES:
+                yield {"event": job["status"], "error": job["error"]} if job["error"] else {"event": job["status"]}
+                return
+            last_seq = job["checkpoints"]
+            while True:
+                event = await queue.get()
+                if event["event"] == "checkpoint":
+                    if event["seq"] <= last_seq:
+                        continue
+                    last_seq = event["seq"]
+                yield event
+                if event["event"] in TERMINAL_STATUSES:
+                    return
+        finally:
+            self._subscribers[job_id].remove(queue)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    async def shutdown(self):
+        """Cancel running jobs; they stay pending and resume on next start"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
@@ -1,24 +1,35 @@
-from typing import TypedDict, Literal, Union
-from langchain_openai import ChatOpenAI
+from typing import TypedDict, Literal, Optional, Union
 from langchain_core.messages import HumanMessage
-from langgraph.graph import StateGraph, END
+import asyncio
 import os
 import uuid
-import tempfile
-import shutil
 import time
 import threading
 from pathlib import Path
-from datetime import datetime, timedelta
 
-from sentence_transformers import SentenceTransformer
-import pinecone
 import json
-import pickle
-import faiss
 import numpy as np
-import pandas as pd
-from pathlib import Path
+
+# Heavy subsystems are imported on first use so CLI tools, tests and
+# help-only processes start fast: CadQuery in load_cadquery(), the embedding
+# model / FAISS / Pinecone in HybridRAGService, LangGraph in get_graph() and
+# langchain_openai only for configured providers. warmup() loads them all.
+
+from .prompt_assembly import assemble_examples, count_tokens
+from .single_flight import SingleFlight, normalize_message
+from .jobs import JobManager, JobStore, checkpoint, checkpointed
+from .llm_providers import LLMProvider, ProviderPool, openai_compatible_providers_from_env
+from .shared_index import load_faiss_index, load_shared_records
+from .workers import LeaderLock
+from .artifacts import ArtifactIndex, ARTIFACT_MAX_AGE_MINUTES
+from .downloads import write_sidecars
+from .cassette import default_cassette
+from .bulkheads import BulkheadFull, guarded
+from .parametric import ParametricStore, apply_overrides, compile_template, extract_parameters, render_code
+from .sessions import SessionStore, ShapeCache, parse_edit, result_variable, strip_exports
+from .primitives import describe, parse_primitive
+from . import metrics
+from . import tracing
 
 # Custom JSON encoder to handle NumPy types
 class NumpyEncoder(json.JSONEncoder):
@@ -31,33 +42,58 @@ class NumpyEncoder(json.JSONEncoder):
             return obj.tolist()
         return super(NumpyEncoder, self).default(obj)
 
-# CADQuery imports
-import cadquery as cq
-from cadquery import Workplane
+# CADQuery imports (OpenCascade takes seconds to load)
 CADQUERY_AVAILABLE = True
-print("✅ CadQuery is available and ready to generate real CAD models!")
+_cadquery = None
+
+def load_cadquery():
+    """Import CadQuery on first use"""
+    global _cadquery
+    if _cadquery is None:
+        with tracing.span("cadquery_import"):
+            import cadquery
+        _cadquery = cadquery
+        print("✅ CadQuery is available and ready to generate real CAD models!")
+    return _cadquery
 
 # -----------------------------
 # Temp Models Cleanup Service
 # -----------------------------
+# How often a standby worker retries to take over cleanup from the leader
+LEADER_RETRY_SECONDS = 60
+
 class TempModelsCleanupService:
-    def __init__(self, temp_dir: Path, cleanup_interval_minutes: int = 30):
+    def __init__(self, temp_dir: Path, cleanup_interval_minutes: int = 30, leader_lock: LeaderLock = None,
+                 quota_bytes: int = None, index_path: Path = None):
         self.temp_dir = temp_dir
-        self.cleanup_interval = cleanup_interval_minutes * 60  # Convert to seconds
+        self.cleanup_interval = cleanup_interval_minutes * 60  # Max age of an artifact, in seconds
         self.running = False
         self.cleanup_thread = None
-        self.file_timestamps = {}  # Track when files were created
+        self._stop_event = threading.Event()
+        # With several workers only the lock holder cleans; the others stand by
+        self.leader_lock = leader_lock
         
         # Ensure temp directory exists
         self.temp_dir.mkdir(exist_ok=True)
         
+        # Persistent artifact index: expiry queue, LRU and size totals for all formats
+        index_kwargs = {"max_age_seconds": self.cleanup_interval}
+        if quota_bytes is not None:
+            index_kwargs["quota_bytes"] = quota_bytes
+        if index_path is not None:
+            index_kwargs["db_path"] = index_path
+        self.index = ArtifactIndex(self.temp_dir, **index_kwargs)
+        
         print(f"🧹 Temp cleanup service initialized for {temp_dir}")
-        print(f"⏰ Cleanup interval: {cleanup_interval_minutes} minutes")
+        print(f"⏰ Max artifact age: {cleanup_interval_minutes} minutes, quota: {self.index.quota_bytes / 2**20:.0f} MB")
     
     def start_cleanup_service(self):
         """Start the background cleanup service"""
-        if not self.running:
+        # Threads do not survive fork(), so a worker forked from a preloaded
+        # app sees running=True with a dead thread
+        if not self.running or not (self.cleanup_thread and self.cleanup_thread.is_alive()):
             self.running = True
+            self._stop_event.clear()
             self.cleanup_thread = threading.Thread(target=self._cleanup_worker, daemon=True)
             self.cleanup_thread.start()
             print("✅ Temp cleanup service started")
@@ -65,66 +101,67 @@ class TempModelsCleanupService:
     def stop_cleanup_service(self):
         """Stop the background cleanup service"""
         self.running = False
+        self._stop_event.set()
         if self.cleanup_thread:
             self.cleanup_thread.join(timeout=5)
+        if self.leader_lock is not None:
+            self.leader_lock.release()
         print("🛑 Temp cleanup service stopped")
     
     def register_file(self, file_path: Path):
-        """Register a file for cleanup tracking"""
-        self.file_timestamps[str(file_path)] = time.time()
+        """Register a file for cleanup tracking; evicts LRU artifacts if over quota"""
+        self.index.register(file_path)
         print(f"📝 Registered file for cleanup: {file_path.name}")
     
+    def touch_file(self, filename: str):
+        """Record a download so recently used artifacts are evicted last"""
+        self.index.touch(filename)
+    
     def _cleanup_worker(self):
-        """Background worker that periodically cleans up old files"""
+        """Background worker that removes artifacts as they expire"""
+        adopted = False
         while self.running:
             try:
+                if self.leader_lock is not None and not self.leader_lock.acquire():
+                    # Another worker is leader; check again in case it exits
+                    self._stop_event.wait(min(self.cleanup_interval, LEADER_RETRY_SECONDS))
+                    continue
+                if not adopted:
+                    # Pick up files written before the index existed or by a crashed worker
+                    print(f"🧹 Artifact index reconciled: {self.index.reconcile()}")
+                    adopted = True
                 self._cleanup_old_files()
-                # Sleep for the cleanup interval
-                time.sleep(self.cleanup_interval)
+                # Sleep until the next artifact is due (new ones expire after existing ones)
+                next_expiry = self.index.next_expiry()
+                delay = self.cleanup_interval if next_expiry is None else next_expiry - time.time()
+                self._stop_event.wait(min(max(delay, 1), self.cleanup_interval))
             except Exception as e:
                 print(f"❌ Error in cleanup worker: {e}")
                 # Continue running even if there's an error
-                time.sleep(60)  # Wait a minute before retrying
+                self._stop_event.wait(60)  # Wait a minute before retrying
     
     def _cleanup_old_files(self):
-        """Remove files older than the cleanup interval"""
-        current_time = time.time()
-        files_to_remove = []
-        
-        # Check all files in the temp directory
-        for file_path in self.temp_dir.glob("*.step"):
-            file_age = current_time - file_path.stat().st_mtime
-            if file_age > self.cleanup_interval:
-                files_to_remove.append(file_path)
-        
-        # Remove old files
-        for file_path in files_to_remove:
-            try:
-                file_path.unlink()
-                # Remove from tracking
-                file_str = str(file_path)
-                if file_str in self.file_timestamps:
-                    del self.file_timestamps[file_str]
-                print(f"🗑️ Cleaned up old file: {file_path.name}")
-            except Exception as e:
-                print(f"❌ Failed to remove {file_path.name}: {e}")
-        
-        if files_to_remove:
-            print(f"🧹 Cleanup completed: removed {len(files_to_remove)} old files")
-        else:
-            print(f"🧹 Cleanup check: no files older than {self.cleanup_interval/60:.1f} minutes found")
+        """Remove artifacts whose expiry has passed"""
+        removed = self.index.expire()
+        for name in removed:
+            print(f"🗑️ Cleaned up old file: {name}")
+        if removed:
+            print(f"🧹 Cleanup completed: removed {len(removed)} expired files")
+        return removed
     
     def get_stats(self):
-        """Get cleanup service statistics"""
-        current_time = time.time()
-        total_files = len(list(self.temp_dir.glob("*.step")))
-        tracked_files = len(self.file_timestamps)
-        
+        """Get cleanup service statistics (maintained incrementally, no directory scan)"""
+        stats = self.index.stats()
         return {
-            "total_files": total_files,
-            "tracked_files": tracked_files,
+            "total_files": stats["files"],
+            "tracked_files": stats["files"],
+            "total_bytes": stats["bytes"],
+            "quota_bytes": stats["quota_bytes"],
+            "by_format": stats["by_format"],
+            "next_expiry": self.index.next_expiry(),
             "cleanup_interval_minutes": self.cleanup_interval / 60,
-            "service_running": self.running
+            "service_running": self.running,
+            "leader": self.leader_lock.held if self.leader_lock is not None else self.running
         }
 
 # -----------------------------
@@ -133,6 +170,7 @@ class TempModelsCleanupService:
 class HybridRAGService:
     def __init__(self):
         # Initialize embedding model
+        from sentence_transformers import SentenceTransformer
         self.model = SentenceTransformer("all-MiniLM-L6-v2")
         
         # Initialize Pinecone (cloud-based)
@@ -176,8 +214,13 @@ class HybridRAGService:
     def _init_pinecone(self):
         """Initialize Pinecone cloud-based retrieval"""
         try:
-            self.pc = pinecone.Pinecone(api_key=self.pinecone_api_key)
-            self.pinecone_index = self.pc.Index(self.pinecone_index_name)
+            if default_cassette.replaying:
+                # Replayed queries never reach Pinecone
+                self.pinecone_index = default_cassette.wrap_index(None)
+            else:
+                import pinecone
+                self.pc = pinecone.Pinecone(api_key=self.pinecone_api_key)
+                self.pinecone_index = default_cassette.wrap_index(self.pc.Index(self.pinecone_index_name))
             self.pinecone_available = True
             print("✅ Pinecone cloud RAG initialized")
         except Exception as e:
@@ -189,10 +232,9 @@ class HybridRAGService:
         try:
             if (self.local_index_path and self.local_data_path and 
                 self.local_index_path.exists() and self.local_data_path.exists()):
-                # Load existing FAISS index and data
-                self.local_index = faiss.read_index(str(self.local_index_path))
-                with open(self.local_data_path, "rb") as f:
-                    self.local_data = pickle.load(f)
+                # Memory-map the index and records so workers share their pages
+                self.local_index = load_faiss_index(self.local_index_path)
+                self.local_data = load_shared_records(self.local_data_path)
                 self.local_faiss_available = True
                 print(f"✅ Local FAISS RAG initialized with {len(self.local_data)} examples")
             else:
@@ -217,7 +259,9 @@ class HybridRAGService:
         # Try local FAISS first (faster)
         if self.local_faiss_available:
             try:
-                local_results = self._retrieve_local_faiss(query, top_k)
+                with metrics.RETRIEVAL_LATENCY.time(backend="local_faiss"), tracing.span("retrieval.local_faiss") as span:
+                    local_results = self._retrieve_local_faiss(query, top_k)
+                    span.set(matches=len(local_results))
                 results.extend(local_results)
                 print(f"🔍 Local FAISS: Found {len(local_results)} matches")
             except Exception as e:
@@ -226,7 +270,9 @@ class HybridRAGService:
         # Try Pinecone if available and we need more results
         if self.pinecone_available and (len(results) < top_k or not use_hybrid):
             try:
-                pinecone_results = self._retrieve_pinecone(query, top_k)
+                with metrics.RETRIEVAL_LATENCY.time(backend="pinecone"), tracing.span("retrieval.pinecone") as span:
+                    pinecone_results = self._retrieve_pinecone(query, top_k)
+                    span.set(matches=len(pinecone_results))
                 results.extend(pinecone_results)
                 print(f"☁️ Pinecone: Found {len(pinecone_results)} matches")
             except Exception as e:
@@ -235,7 +281,8 @@ class HybridRAGService:
         # If no results from either system, use fallback
         if not results:
             print("⚠️ No results from RAG systems, using fallback data")
-            results = self._get_fallback_matches(query, top_k)
+            with metrics.RETRIEVAL_LATENCY.time(backend="fallback"), tracing.span("retrieval.fallback"):
+                results = self._get_fallback_matches(query, top_k)
         
         # Remove duplicates and sort by score
         unique_results = self._deduplicate_results(results)
@@ -258,7 +305,7 @@ class HybridRAGService:
         results = []
         for i, (distance, idx) in enumerate(zip(D[0], I[0])):
             if idx < len(self.local_data):
-                row = self.local_data.iloc[idx]
+                row = self.local_data[idx]
                 # Convert distance to similarity score (1 - normalized distance)
                 score = 1.0 - (distance / 2.0)  # Normalize to 0-1 range
                 results.append({
@@ -379,16 +426,57 @@ cq.exporters.export(result, step_file_path, exportType='STEP')
 # -----------------------------
 class CADModelGenerator:
     def __init__(self):
-        self.rag_service = HybridRAGService()
+        self._rag_service = None
+        self._rag_lock = threading.Lock()
         self.temp_dir = Path("temp_models")
         self.temp_dir.mkdir(exist_ok=True)
         
-        # Initialize cleanup service
-        self.cleanup_service = TempModelsCleanupService(self.temp_dir, cleanup_interval_minutes=30)
-        self.cleanup_service.start_cleanup_service()
+        # Initialize cleanup service (one leader across all workers on this host)
+        self.cleanup_service = TempModelsCleanupService(self.temp_dir,
+                                                        cleanup_interval_minutes=ARTIFACT_MAX_AGE_MINUTES,
+                                                        leader_lock=LeaderLock())
+        # Under gunicorn --preload the app is imported in the master; workers
+        # start the service from the FastAPI startup event instead
+        if os.getenv("GENX_CLEANUP_AUTOSTART", "true").lower() != "false":
+            self.cleanup_service.start_cleanup_service()
+        
+        # Templates of successful code, so parameter edits skip the LLM
+        self.parametric_store = ParametricStore()
+        # Executed variables (the kernel shape included) of recent models, for session edits
+        self.shape_cache = ShapeCache()
+        # Nodes run code in worker threads to keep the event loop free, but
+        # CadQuery is not thread-safe (its selector parser shares state), so
+        # one model is executed at a time per process
+        self._kernel_lock = threading.Lock()
+
+    @property
+    def rag_service(self) -> HybridRAGService:
+        """Embedding model, FAISS index and Pinecone are loaded on first retrieval"""
+        if self._rag_service is None:
+            with self._rag_lock:
+                if self._rag_service is None:
+                    self._rag_service = HybridRAGService()
+        return self._rag_service
     
-    def execute_cadquery_code(self, code: str) -> dict:
-        """Execute CADQuery code and return path to generated STEP file"""
+    def execute_cadquery_code(self, code, parameters: dict = None, variables: dict = None) -> dict:
+        """Execute CADQuery code (source or a compiled template) and return path to generated STEP file.
+        
+        ``variables`` seeds the code's namespace, e.g. with a cached model to modify.
+        Blocking; async callers run it with asyncio.to_thread.
+        """
+        with self._kernel_lock:
+            start_time = time.perf_counter()
+            try:
+                with tracing.span("cad_execution"):
+                    result = self._execute_cadquery_code(code, parameters, variables)
+            except Exception:
+                metrics.EXECUTION_LATENCY.observe(time.perf_counter() - start_time, status="error")
+                raise
+        metrics.EXECUTION_LATENCY.observe(time.perf_counter() - start_time, status="ok")
+        metrics.ARTIFACT_BYTES.observe(Path(result["step_path"]).stat().st_size, format="step")
+        return result
+
+    def _execute_cadquery_code(self, code, parameters: dict = None, variables: dict = None) -> dict:
         try:
             # Create a unique filename
             model_id = str(uuid.uuid4())
@@ -396,14 +484,19 @@ class CADModelGenerator:
             
             # Execute the CADQuery code
             # We need to create a safe execution environment
+            cq = load_cadquery()
             local_vars = {
+                **(variables or {}),
                 'cq': cq,
-                'Workplane': Workplane,
+                'Workplane': cq.Workplane,
                 'step_file_path': str(step_file_path)
             }
             
-            # Execute the code
-            exec(code, {}, local_vars)
+            # Execute the code (exports done by the code itself are included)
+            # Templates read their values from __params__
+            exec_globals = {"__params__": parameters} if parameters is not None else {}
+            with tracing.span("cad_exec"):
+                exec(code, exec_globals, local_vars)
             
             # Look for a solid object in the local variables
             solid = None
@@ -418,12 +511,18 @@ class CADModelGenerator:
             # Export to STEP format
             if not step_file_path.exists():
                 print(f"Adding STEP export statement for {type(solid)}...")
-                cq.exporters.export(solid, str(step_file_path), exportType='STEP')
+                with tracing.span("cad_export"):
+                    cq.exporters.export(solid, str(step_file_path), exportType='STEP')
             
             # Check if STEP file was created
             if step_file_path.exists():
+                # Pre-compress once so downloads never compress on the fly
+                with tracing.span("compress_sidecars"):
+                    write_sidecars(step_file_path)
                 # Register file with cleanup service
                 self.cleanup_service.register_file(step_file_path)
+                self.shape_cache.put(model_id, {name: value for name, value in local_vars.items()
+                                                if name != 'step_file_path'})
                 
                 print(f"✅ Successfully generated STEP file: {step_file_path}")
                 return {
@@ -478,6 +577,7 @@ class CADModelGenerator:
             
             # Execute the code to generate the model
             file_paths = self.execute_cadquery_code(code)
+            parameters = self.remember_parametric(file_paths['model_id'], code, user_query)
             
             # Create relative URL for the frontend
             step_relative_path = f"/temp_models/{Path(file_paths['step_path']).name}"
@@ -488,7 +588,8 @@ class CADModelGenerator:
                 "model_type": "step",
                 "original_prompt": prompt,
                 "similarity_score": score,
-                "model_id": file_paths['model_id']
+                "model_id": file_paths['model_id'],
+                "parameters": parameters
             }
             
         except Exception as e:
@@ -497,6 +598,55 @@ class CADModelGenerator:
                 "error": str(e)
             }
     
+    def remember_parametric(self, model_id: str, code: str, message: str = "") -> dict:
+        """Store code that just ran as a parametric template; returns its parameters"""
+        try:
+            template, parameters = extract_parameters(code)
+            self.parametric_store.put(model_id, template, parameters, message)
+            return parameters
+        except Exception as e:
+            # Editing by parameter is optional; the model itself is fine
+            print(f"⚠️ Could not extract parameters for {model_id}: {e}")
+            return {}
+    
+    def model_code(self, model_id: str):
+        """Current code of a generated model (parameter edits included), or None"""
+        record = self.parametric_store.get(model_id)
+        return render_code(record["template"], record["parameters"]) if record else None
+    
+    def get_parameters(self, model_id: str):
+        """Parameters of a generated model, or None if it has no template"""
+        record = self.parametric_store.get(model_id)
+        return record["parameters"] if record else None
+    
+    def reexecute(self, model_id: str, overrides: dict) -> dict:
+        """Re-run a model's template with some parameters changed, without the LLM.
+        
+        Raises KeyError for unknown models and ValueError for bad overrides;
+        the new model gets its own template so edits can be chained.
+        """
+        record = self.parametric_store.get(model_id)
+        if record is None:
+            raise KeyError(model_id)
+        parameters = apply_overrides(record["parameters"], overrides)
+        
+        result = self.execute_cadquery_code(compile_template(record["template"]), parameters)
+        self.parametric_store.put(result["model_id"], record["template"], parameters,
+                                  record["message"], parent_id=model_id)
+        metrics.PARAMETRIC_REEXECUTIONS.inc()
+        
+        changed = {name: value for name, value in parameters.items() if record["parameters"][name] != value}
+        print(f"🎛️ Re-executed {model_id} with {changed}: {result['model_id']}")
+        return {
+            "text": f"✅ Updated model parameters: {', '.join(f'{name}={value}' for name, value in changed.items()) or 'no changes'}",
+            "step_url": f"/temp_models/{Path(result['step_path']).name}",
+            "model_type": "step",
+            "model_id": result["model_id"],
+            "parent_model_id": model_id,
+            "parameters": parameters,
+            "method": "parametric_reexecution"
+        }
+    
     def get_cleanup_stats(self):
         """Get cleanup service statistics"""
         return self.cleanup_service.get_stats()
@@ -514,8 +664,14 @@ cad_generator = CADModelGenerator()
 # -----------------------------
 class AppState(TypedDict):
     message: str
-    route: Union[Literal["help"], Literal["generate"], Literal["create_cad"], Literal["code_gen"]]
+    route: Union[Literal["help"], Literal["generate"], Literal["create_cad"], Literal["code_gen"],
+                 Literal["edit"], Literal["primitive"]]
     result: str
+    # code_gen retry progress, checkpointed so a restarted job resumes
+    attempt: int
+    last_error: str
+    # Conversation session: last model_id and recent requests (see graph/sessions.py)
+    session: dict
 
 # -----------------------------
 # LLM Setup
@@ -559,8 +715,17 @@ class MockLLM:
                 "concept", "guide", "tutorial", "question", "why", "when", "where"
             ]
             
+            # Follow-up edits of the session's current model
+            edit_keywords = [
+                "make it", "taller", "shorter", "wider", "narrower", "thicker", "thinner",
+                "bigger", "smaller", "increase", "decrease", "change", "add a", "remove"
+            ]
+            
+            if '"edit"' in message_content and any(keyword in user_message_lower for keyword in edit_keywords):
+                return MockResponse("edit")
+            
             # Check for code generation requests first
-            if any(keyword in user_message_lower for keyword in code_gen_keywords):
+            elif any(keyword in user_message_lower for keyword in code_gen_keywords):
                 return MockResponse("code_gen")
             
             # Check for generation requests (RAG-based)
@@ -580,44 +745,59 @@ class MockLLM:
             return MockResponse("This is a mock response for testing. Set up a real LLM API key for full functionality.")
 
 # LLM Configuration
-# Choose one of the following options:
+# Every configured provider joins the pool; with more than one, requests are
+# hedged and failed over across providers (see graph/llm_providers.py).
+llm_providers = []
 
 # Option 1: Groq (Fast & Free tier available)
 # Get API key from: https://console.groq.com/
 if os.getenv("GROQ_API_KEY"):
-    llm = ChatOpenAI(
+    from langchain_openai import ChatOpenAI
+    llm_providers.append(LLMProvider("groq", ChatOpenAI(
         base_url="https://api.groq.com/openai/v1",
         openai_api_key=os.getenv("GROQ_API_KEY"),
         model="llama-3.3-70b-versatile"  # Fast and powerful
-    )
+    )))
     print("✅ Using Groq LLM")
 
 # Option 2: OpenAI (Requires API key)
-elif os.getenv("OPENAI_API_KEY"):
-    llm = ChatOpenAI(
+if os.getenv("OPENAI_API_KEY"):
+    from langchain_openai import ChatOpenAI
+    llm_providers.append(LLMProvider("openai", ChatOpenAI(
         openai_api_key=os.getenv("OPENAI_API_KEY"),
         model="gpt-4o-mini"  # Fast and cost-effective
-    )
+    )))
     print("✅ Using OpenAI LLM")
 
 # Option 3: Anthropic Claude (Requires API key)
-elif os.getenv("ANTHROPIC_API_KEY"):
+if os.getenv("ANTHROPIC_API_KEY"):
     from langchain_anthropic import ChatAnthropic
-    llm = ChatAnthropic(
+    llm_providers.append(LLMProvider("anthropic", ChatAnthropic(
         anthropic_api_key=os.getenv("ANTHROPIC_API_KEY"),
         model="claude-3-haiku-20240307"  # Fast and cost-effective
-    )
+    )))
     print("✅ Using Anthropic Claude LLM")
 
 # Option 4: Local Ollama (Free, requires Ollama installation)
-elif os.getenv("USE_OLLAMA"):
+if os.getenv("USE_OLLAMA"):
     from langchain_community.llms import Ollama
-    llm = Ollama(
+    llm_providers.append(LLMProvider("ollama", Ollama(
         model="llama3.2:3b",  # Fast local model
         base_url="http://localhost:11434"
-    )
+    )))
     print("✅ Using local Ollama LLM")
 
+# Option 5: Any OpenAI-compatible endpoint (vLLM, llama.cpp, local stubs)
+for provider in openai_compatible_providers_from_env():
+    llm_providers.append(provider)
+    print(f"✅ Using OpenAI-compatible LLM '{provider.name}'")
+
+if len(llm_providers) > 1:
+    llm = ProviderPool(llm_providers, hedging=os.getenv("LLM_HEDGING", "true").lower() != "false")
+    print(f"🔀 LLM provider pool: {', '.join(provider.name for provider in llm_providers)}")
+elif llm_providers:
+    llm = llm_providers[0].llm
+
 # Fallback to mock LLM
 else:
     llm = MockLLM()
@@ -627,12 +807,46 @@ else:
     print("   - OPENAI_API_KEY")
     print("   - ANTHROPIC_API_KEY")
     print("   - USE_OLLAMA=true (requires Ollama installation)")
+    print("   - LLM_OPENAI_COMPAT_PROVIDERS=name|base_url|model (OpenAI-compatible servers)")
+
+# Record or replay LLM calls (GENX_CASSETTE_MODE, see graph/cassette.py)
+if default_cassette.mode != "off":
+    llm = default_cassette.wrap_llm(llm)
+    print(f"📼 LLM and Pinecone calls: {default_cassette.mode} ({default_cassette.path})")
+
+async def call_llm(node: str, prompt: str):
+    """Invoke the LLM for a graph node, recording latency and token counts"""
+    start_time = time.perf_counter()
+    with tracing.span("llm", node=node) as span:
+        try:
+            response = await llm.ainvoke([HumanMessage(content=prompt)])
+        except Exception:
+            metrics.LLM_ERRORS.inc(node=node)
+            raise
+        finally:
+            metrics.LLM_LATENCY.observe(time.perf_counter() - start_time, node=node)
+
+        # Prefer provider-reported usage; estimate when the provider has none
+        usage = metrics.usage_tokens(response)
+        if usage is None:
+            usage = (count_tokens(prompt), count_tokens(getattr(response, "content", "") or ""))
+        metrics.LLM_TOKENS.observe(usage[0], node=node, direction="in")
+        metrics.LLM_TOKENS.observe(usage[1], node=node, direction="out")
+        span.set(input_tokens=usage[0], output_tokens=usage[1])
+    return response
 
 # -----------------------------
 # Analyzer Node
 # -----------------------------
 async def analyze_node(state: AppState) -> AppState:
     message = state["message"]
+    session = state.get("session")
+    
+    # In a session with a model, follow-ups can edit that model
+    edit_action = ""
+    if session:
+        edit_action = f"""5. "edit" - For changes to the user's current model (made from: "{session['history'][-1]}"), e.g. dimensions, adding or removing features
+"""
     
     # Enhanced routing logic with better prompts
     routing_prompt = f"""You are an intelligent router for a CAD assistant system. Analyze the user's message and determine the best action to take.
@@ -644,7 +858,7 @@ Available actions:
 2. "generate" - For requests to create, build, make, design, or generate CAD models, parts, or 3D objects (using RAG)
 3. "code_gen" - For requests to generate custom CADQuery code from scratch, complex designs, or when user wants code generation
 4. "create_cad" - For specific CAD modeling requests, technical design questions, or parametric modeling
-
+{edit_action}
 Examples:
 - "How do I create a cylinder?" → generate
 - "What is parametric modeling?" → help  
@@ -658,14 +872,14 @@ Examples:
 - "Write code to create a custom part" → code_gen
 - "Create CADQuery code for a complex assembly" → code_gen
 
-Respond with ONLY one word: help, generate, code_gen, or create_cad."""
+Respond with ONLY one word: help, generate, code_gen, {"create_cad, or edit" if session else "or create_cad"}."""
 
     try:
-        response = await llm.ainvoke([HumanMessage(content=routing_prompt)])
+        response = await call_llm("analyze", routing_prompt)
         route = response.content.strip().lower()
         
         # Validate the route
-        valid_routes = ["help", "generate", "create_cad", "code_gen"]
+        valid_routes = ["help", "generate", "create_cad", "code_gen"] + (["edit"] if session else [])
         if route not in valid_routes:
             print(f"⚠️ Invalid route '{route}' from LLM, defaulting to 'help'")
             route = "help"
@@ -698,7 +912,7 @@ Guidelines:
 Assistant:"""
     
     try:
-        response = await llm.ainvoke([HumanMessage(content=prompt)])
+        response = await call_llm("help", prompt)
         return {**state, "result": response.content}
     except Exception as e:
         error_response = f"I'm sorry, I encountered an error while processing your question. Please try again or contact support if the issue persists. Error: {str(e)}"
@@ -710,8 +924,8 @@ async def generate_node(state: AppState) -> AppState:
     print(f"🎯 Generating CAD model for: '{message}'")
     
     try:
-        # Use RAG to generate CAD model
-        result = cad_generator.generate_model(message)
+        # Use RAG to generate CAD model (retrieval and CAD execution block, so off the event loop)
+        result = await asyncio.to_thread(cad_generator.generate_model, message)
         
         # Convert result to string for state
         if isinstance(result, dict):
@@ -738,6 +952,32 @@ async def create_cad_node(state: AppState) -> AppState:
     }
     return {**state, "result": response}
 
+async def primitive_node(state: AppState) -> AppState:
+    """Build a fully specified primitive directly: no router LLM, retrieval or code generation"""
+    message = state["message"]
+    primitive = parse_primitive(message)
+    print(f"⚡ Building {describe(primitive)} for: '{message}'")
+    
+    try:
+        # The kernel run, STEP export and sidecars block; keep them off the event loop
+        result = await asyncio.to_thread(cad_generator.execute_cadquery_code, primitive["code"])
+    except Exception as e:
+        error_msg = f"❌ Error building {primitive['shape']}: {str(e)}"
+        print(error_msg)
+        return {**state, "route": "primitive", "result": json.dumps({"error": error_msg}, cls=NumpyEncoder)}
+    
+    response = {
+        "text": f"✅ Built {describe(primitive)} for '{message}'",
+        "step_url": f"/temp_models/{Path(result['step_path']).name}",
+        "model_type": "step",
+        "model_id": result['model_id'],
+        "parameters": cad_generator.remember_parametric(result['model_id'], primitive["code"], message),
+        "generated_code": primitive["code"],
+        "method": "deterministic_primitive",
+        "primitive": primitive["shape"]
+    }
+    return {**state, "route": "primitive", "result": json.dumps(response, cls=NumpyEncoder)}
+
 async def code_gen_node(state: AppState) -> AppState:
     """Generate CADQuery code using LLM and execute it to create a model"""
     message = state["message"]
@@ -745,7 +985,11 @@ async def code_gen_node(state: AppState) -> AppState:
     print(f"🤖 Generating CADQuery code for: '{message}'")
     
     max_retries = 3
-    attempt = 0
+    # Resume from the last checkpointed attempt when a job is restarted
+    attempt = state.get("attempt", 0)
+    last_error = state.get("last_error", "")
+    if attempt:
+        print(f"♻️ Resuming code generation after attempt {attempt}/{max_retries}")
     
     while attempt < max_retries:
         attempt += 1
@@ -754,23 +998,18 @@ async def code_gen_node(state: AppState) -> AppState:
         try:
             # Step 1: Retrieve relevant examples from hybrid RAG (local FAISS + Pinecone)
             print(f"🔍 Retrieving relevant CADQuery examples from hybrid RAG...")
-            rag_examples = cad_generator.rag_service.retrieve_code(message, top_k=3, use_hybrid=True)
+            # In a thread: the first use (or a running warmup) loads the embedding
+            # model and indexes under the RAG lock, and retrieval itself blocks
+            rag_examples = await asyncio.to_thread(
+                lambda: cad_generator.rag_service.retrieve_code(message, top_k=3, use_hybrid=True))
             
-            # Step 2: Build examples string for the prompt
-            examples_text = ""
-            if rag_examples and len(rag_examples) > 0:
-                examples_text = "\n\nHere are some relevant CADQuery examples from our knowledge base:\n"
-                for i, example in enumerate(rag_examples[:2], 1):
-                    example_code = example["metadata"].get("code", "")
-                    example_prompt = example["metadata"].get("prompt", "")
-                    similarity_score = example.get("score", 0)
-                    
-                    if example_code:
-                        examples_text += f"\nExample {i} (similarity: {similarity_score:.3f}):\n"
-                        examples_text += f"Prompt: {example_prompt}\n"
-                        examples_text += f"Code:\n```python\n{example_code}\n```\n"
-                
-                print(f"📚 Found {len(rag_examples)} relevant examples")
+            # Step 2: Build examples string for the prompt (compacted, within token budget)
+            with tracing.span("prompt_assembly") as span:
+                assembled = assemble_examples(rag_examples or [])
+                span.set(examples=len(assembled["examples"]))
+            examples_text = assembled["text"]
+            if examples_text:
+                print(f"📚 Found {len(rag_examples)} relevant examples, using {len(assembled['examples'])}")
             else:
                 examples_text = "\n\nNo specific examples found, but here's a basic structure:\n"
                 examples_text += "```python\nimport cadquery as cq\nfrom cadquery import Workplane\n\n# Create the model\nresult = cq.Workplane(\"XY\").box(10, 5, 3)\n\n# Export to STEP (use the provided step_file_path variable)\ncq.exporters.export(result, step_file_path, exportType='STEP')\n```\n"
@@ -835,11 +1074,12 @@ Requirements:
 IMPORTANT: Generate ONLY the Python code. Do NOT include any explanations, markdown formatting, or text outside of the code. The response should be pure Python code that can be executed directly."""
 
             # Generate the code
-            code_response = await llm.ainvoke([HumanMessage(content=code_generation_prompt)])
+            code_response = await call_llm("code_gen", code_generation_prompt)
             generated_code = code_response.content.strip()
             
             # Enhanced code cleaning logic
             print(f"🔧 Raw LLM response:\n{generated_code}")
+            cleaning_span = tracing.start_span("code_cleaning")
             
             # Remove markdown code blocks
             if "```python" in generated_code:
@@ -924,6 +1164,7 @@ IMPORTANT: Generate ONLY the Python code. Do NOT include any explanations, markd
             
             generated_code = '\n'.join(cleaned_lines)
             generated_code = generated_code.strip()
+            cleaning_span.end()
             
             print(f"📝 Generated CADQuery code (attempt {attempt}):\n{generated_code}")
             
@@ -944,7 +1185,8 @@ IMPORTANT: Generate ONLY the Python code. Do NOT include any explanations, markd
                 raise Exception("Generated code contains hardcoded file paths. Please use the provided 'step_file_path' variable instead.")
             
             # Step 3: Execute the generated code
-            result = cad_generator.execute_cadquery_code(generated_code)
+            result = await asyncio.to_thread(cad_generator.execute_cadquery_code, generated_code)
+            parameters = cad_generator.remember_parametric(result['model_id'], generated_code, message)
             
             # Step 4: Create response
             step_relative_path = f"/temp_models/{Path(result['step_path']).name}"
@@ -967,6 +1209,7 @@ IMPORTANT: Generate ONLY the Python code. Do NOT include any explanations, markd
                 "model_type": "step",
                 "generated_code": generated_code,
                 "model_id": result['model_id'],
+                "parameters": parameters,
                 "method": "llm_code_generation_with_hybrid_rag",
                 "attempts": attempt,
                 "rag_examples_used": rag_info,
@@ -974,6 +1217,7 @@ IMPORTANT: Generate ONLY the Python code. Do NOT include any explanations, markd
                 "rag_sources": list(rag_sources)
             }
             
+            metrics.CODE_GEN_ATTEMPTS.observe(attempt, status="ok")
             print(f"✅ Code generation successful on attempt {attempt}: {result['model_id']}")
             return {**state, "result": json.dumps(response, cls=NumpyEncoder)}
             
@@ -985,6 +1229,7 @@ IMPORTANT: Generate ONLY the Python code. Do NOT include any explanations, markd
                 # Final failure - provide detailed error response
                 error_msg = f"❌ Code generation failed after {max_retries} attempts. Last error: {last_error}"
                 print(error_msg)
+                metrics.CODE_GEN_ATTEMPTS.observe(attempt, status="error")
                 
                 # Try to provide a fallback response with debugging info
                 fallback_response = {
@@ -997,46 +1242,308 @@ IMPORTANT: Generate ONLY the Python code. Do NOT include any explanations, markd
                 }
                 return {**state, "result": json.dumps(fallback_response, cls=NumpyEncoder)}
             else:
-                # Continue to next attempt
+                # Checkpoint the failed attempt, then continue to next attempt
+                metrics.CODE_GEN_RETRIES.inc()
+                checkpoint("code_gen", {**state, "attempt": attempt, "last_error": last_error})
                 print(f"🔄 Retrying with error context...")
                 continue
 
+async def edit_node(state: AppState) -> AppState:
+    """Apply a follow-up request to the session's current model as a small edit"""
+    message = state["message"]
+    session = state.get("session") or {}
+    model_id = session.get("model_id")
+    record = cad_generator.parametric_store.get(model_id) if model_id else None
+    if record is None:
+        # The model's template is gone (or it never had one); build it anew
+        print(f"⚠️ No editable model for this session, generating from scratch")
+        return await code_gen_node(state)
+    
+    code = render_code(record["template"], record["parameters"])
+    variable = result_variable(code)
+    history = "\n".join(f"- {request}" for request in session.get("history", []))
+    print(f"✏️ Editing model {model_id} for: '{message}'")
+    
+    max_retries = 3
+    attempt = state.get("attempt", 0)
+    last_error = state.get("last_error", "")
+    
+    while attempt < max_retries:
+        attempt += 1
+        print(f"🔄 Attempt {attempt}/{max_retries}")
+        
+        try:
+            retry_note = f'\nThe previous edit failed with this error: "{last_error}"\n' if last_error else ""
+            edit_prompt = f"""You are editing an existing CadQuery model. Make the smallest change that satisfies the user's request.
+
+Earlier requests in this session:
+{history}
+
+Current code:
+```python
+{code}
+```
+
+Named parameters and their current values: {json.dumps(record["parameters"])}
+
+Requested change: "{message}"
+{retry_note}
+Respond with ONLY a JSON object, using the first form that can express the change:
+1. {{"parameters": {{"name": value}}}} - if the change only alters values of the named parameters above
+2. {{"append": "python statements"}} - if the change adds or modifies features; the statements run after the code above, find the current shape in `{variable}` and must leave the updated shape in `{variable}`. Do not export.
+3. {{"code": "complete python code"}} - only if neither works; the final shape must be in `result`
+
+Do NOT include any explanations or text outside the JSON object."""
+            
+            llm_response = await call_llm("edit", edit_prompt)
+            kind, payload = parse_edit(llm_response.content)
+            print(f"📝 Edit ({kind}, attempt {attempt}): {payload}")
+            
+            if kind == "parameters":
+                # Same code, new values: one kernel run of the stored template
+                response = await asyncio.to_thread(cad_generator.reexecute, model_id, payload)
+                new_code = render_code(record["template"], response["parameters"])
+            else:
+                if kind == "append":
+                    new_code = f"{strip_exports(code)}\n{payload.strip()}"
+                    namespace = cad_generator.shape_cache.get(model_id)
+                    metrics.record_cache("session_shape", namespace is not None)
+                    if namespace is not None:
+                        # Only the new operations run, on the cached shape
+                        result = await asyncio.to_thread(cad_generator.execute_cadquery_code, payload,
+                                                         variables=namespace)
+                    else:
+                        result = await asyncio.to_thread(cad_generator.execute_cadquery_code, new_code)
+                else:
+                    new_code = payload
+                    result = await asyncio.to_thread(cad_generator.execute_cadquery_code, new_code)
+                response = {
+                    "step_url": f"/temp_models/{Path(result['step_path']).name}",
+                    "model_type": "step",
+                    "model_id": result['model_id'],
+                    "parent_model_id": model_id,
+                    "parameters": cad_generator.remember_parametric(result['model_id'], new_code, message)
+                }
+            
+            response.update({
+                "text": f"✅ Updated your model for '{message}' ({kind} edit, attempt {attempt})",
+                "generated_code": new_code,
+                "method": f"session_edit_{kind}",
+                "edit": kind,
+                "attempts": attempt
+            })
+            metrics.SESSION_EDITS.inc(kind=kind)
+            print(f"✅ Edit successful on attempt {attempt}: {response['model_id']}")
+            return {**state, "result": json.dumps(response, cls=NumpyEncoder)}
+            
+        except Exception as e:
+            last_error = str(e)
+            print(f"❌ Edit attempt {attempt} failed: {last_error}")
+            
+            if attempt >= max_retries:
+                error_msg = f"❌ Editing the model failed after {max_retries} attempts. Last error: {last_error}"
+                print(error_msg)
+                return {**state, "result": json.dumps({
+                    "error": error_msg,
+                    "attempts": max_retries,
+                    "last_error": last_error,
+                    "model_id": model_id,
+                    "suggestion": "Try describing the change differently, or ask for a new model."
+                }, cls=NumpyEncoder)}
+            else:
+                checkpoint("edit", {**state, "attempt": attempt, "last_error": last_error})
+                print(f"🔄 Retrying with error context...")
+                continue
+
+# -----------------------------
+# Request Coalescing
+# -----------------------------
+# Concurrent duplicates (same normalized message) share one graph run, and
+# route nodes are coalesced by (route, message) so callers that enter the
+# graph separately still share the expensive retrieval/LLM/CAD work.
+graph_flight = SingleFlight("graph")
+node_flight = SingleFlight("node")
+metrics.IN_FLIGHT.set_function(graph_flight.in_flight, scope="graph")
+metrics.IN_FLIGHT.set_function(node_flight.in_flight, scope="node")
+
+def coalesce_node(route: str, node):
+    async def coalesced(state: AppState) -> AppState:
+        key = (route, normalize_message(state["message"]))
+        result, shared = await node_flight.do(key, lambda: node(state))
+        metrics.record_cache("node_coalescing", shared)
+        # The route is set here too: fast-path runs never went through the analyzer
+        return {**state, "route": route, "result": result["result"]}
+    return coalesced
+
 # -----------------------------
 # Router Function
 # -----------------------------
 def route_from_analyzer(state: AppState) -> str:
     return state["route"]
 
+def route_from_entry(state: AppState) -> str:
+    # Jobs resumed from a checkpoint already know their route
+    if state.get("route"):
+        return state["route"]
+    # Fully specified primitives ("box 10x5x3") skip the router and the LLM
+    fast_path = parse_primitive(state["message"]) is not None
+    metrics.record_cache("primitive_fast_path", fast_path)
+    return "primitive" if fast_path else "analyze"
+
 # -----------------------------
 # Graph Build
 # -----------------------------
-builder = StateGraph(AppState)
+# Every node runs inside its route's bulkhead, records latency metrics and a
+# tracing span, and checkpoints its output state when running inside a job.
+# Coalesced followers share the leader's slot. The graph (and LangGraph
+# itself) is built on first use.
+_graph = None
+_graph_lock = threading.Lock()
+
+def graph_node(name: str, node, coalesce: bool = False):
+    node = guarded(name, node)
+    if coalesce:
+        node = coalesce_node(name, node)
+    return checkpointed(name, metrics.instrumented(name, tracing.traced(f"node.{name}", node)))
 
-builder.add_node("analyze", analyze_node)
-builder.add_node("help", help_node)
-builder.add_node("generate", generate_node)
-builder.add_node("create_cad", create_cad_node)
-builder.add_node("code_gen", code_gen_node)
+def build_graph():
+    from langgraph.graph import StateGraph, END
 
-builder.set_entry_point("analyze")
+    builder = StateGraph(AppState)
 
-builder.add_conditional_edges("analyze", route_from_analyzer, {
-    "help": "help",
-    "generate": "generate",
-    "create_cad": "create_cad",
-    "code_gen": "code_gen"
-})
+    builder.add_node("analyze", graph_node("analyze", analyze_node))
+    builder.add_node("help", graph_node("help", help_node, coalesce=True))
+    builder.add_node("generate", graph_node("generate", generate_node, coalesce=True))
+    builder.add_node("create_cad", graph_node("create_cad", create_cad_node))
+    builder.add_node("code_gen", graph_node("code_gen", code_gen_node, coalesce=True))
+    builder.add_node("edit", graph_node("edit", edit_node))
+    builder.add_node("primitive", graph_node("primitive", primitive_node, coalesce=True))
 
-builder.add_edge("help", END)
-builder.add_edge("generate", END)
-builder.add_edge("create_cad", END)
-builder.add_edge("code_gen", END)
+    builder.set_conditional_entry_point(route_from_entry, {
+        "analyze": "analyze",
+        "help": "help",
+        "generate": "generate",
+        "create_cad": "create_cad",
+        "code_gen": "code_gen",
+        "edit": "edit",
+        "primitive": "primitive"
+    })
 
-graph = builder.compile()
+    builder.add_conditional_edges("analyze", route_from_analyzer, {
+        "help": "help",
+        "generate": "generate",
+        "create_cad": "create_cad",
+        "code_gen": "code_gen",
+        "edit": "edit"
+    })
+
+    builder.add_edge("help", END)
+    builder.add_edge("generate", END)
+    builder.add_edge("create_cad", END)
+    builder.add_edge("code_gen", END)
+    builder.add_edge("edit", END)
+    builder.add_edge("primitive", END)
+
+    return builder.compile()
+
+def get_graph():
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = build_graph()
+    return _graph
+
+async def get_graph_async():
+    """get_graph() for request handlers: a first build (LangGraph import, or
+    waiting on a warmup that holds the lock) runs in a thread, off the event loop"""
+    return _graph if _graph is not None else await asyncio.to_thread(get_graph)
+
+# -----------------------------
+# Background Jobs
+# -----------------------------
+async def run_job_graph(state: dict):
+    """Run a job through the graph; jobs wait out full bulkheads instead of failing"""
+    state = dict(state)
+    session_id = state.pop("session_id", None)
+    if "session" not in state:
+        # Resumed jobs keep the session they were checkpointed with
+        state = load_session(state, session_id)
+    while True:
+        try:
+            result = await (await get_graph_async()).ainvoke(state)
+            break
+        except BulkheadFull as e:
+            print(f"⏳ {e}; job retrying in {e.retry_after}s")
+            await asyncio.sleep(e.retry_after)
+            if e.name != "analyze":
+                # The analyzer already picked the route; go straight to it
+                state = {**state, "route": e.name}
+    if session_id:
+        remember_session(session_id, state["message"], result)
+    return result
+
+job_manager = JobManager(JobStore(encoder=NumpyEncoder), run_job_graph)
+
+# -----------------------------
+# Sessions
+# -----------------------------
+session_store = SessionStore()
+
+def load_session(state: dict, session_id: Optional[str]) -> dict:
+    """Input state with the session's last model and recent requests, if it has any"""
+    session = session_store.get(session_id) if session_id else None
+    return {**state, "session": session} if session else state
+
+def remember_session(session_id: str, message: str, result: dict):
+    """Point the session at the model a graph run produced, if it produced one"""
+    response = result.get("result")
+    try:
+        if isinstance(response, str):
+            response = json.loads(response)
+    except ValueError:
+        return  # A help answer; the session keeps its model
+    if isinstance(response, dict) and response.get("model_id") and not response.get("error"):
+        session_store.save(session_id, response["model_id"], message)
 
 # -----------------------------
 # Run Function
 # -----------------------------
 async def run_graph(input_data: dict):
-    state = {"message": input_data.get("message", "")}
-    return await graph.ainvoke(state)
+    message = input_data.get("message", "")
+    session_id = input_data.get("session_id")
+    state = load_session({"message": message}, session_id)
+    key = normalize_message(message)
+    if state.get("session"):
+        # Edits depend on the session's model: only identical edits of one model coalesce
+        key = (state["session"]["model_id"], key)
+    with tracing.span("graph") as span:
+        graph = await get_graph_async()
+        result, shared = await graph_flight.do(key, lambda: graph.ainvoke(state))
+        span.set(route=result.get("route"), shared=shared)
+    metrics.record_cache("graph_coalescing", shared)
+    if shared:
+        print(f"🔗 Shared in-flight result for: '{message}'")
+    if session_id:
+        remember_session(session_id, message, result)
+    # Each caller gets its own copy of the shared state
+    return {**result, "message": message}
+
+# -----------------------------
+# Warmup
+# -----------------------------
+def warmup():
+    """Load every lazily imported subsystem now.
+
+    Servers call this before taking traffic; under gunicorn --preload it runs
+    in the master so the models are shared copy-on-write by all workers.
+    """
+    start_time = time.perf_counter()
+    try:
+        load_cadquery()
+        cad_generator.rag_service
+        get_graph()
+        print(f"🔥 Warmed up in {time.perf_counter() - start_time:.1f}s")
+    except Exception as e:
+        # Requests will retry the failed import on first use
+        print(f"⚠️ Warmup failed: {e}")
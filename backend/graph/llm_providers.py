@@ -0,0 +1,221 @@
+"""
+LLM provider pool with hedged requests and latency-aware failover.
+
+Every configured provider (Groq, OpenAI, Anthropic, Ollama, or any
+OpenAI-compatible endpoint) joins the pool. The pool tracks rolling latency and
+error rates per provider, sends each request to the best-ranked provider, fires
+a hedged duplicate at the next provider when the first is slower than its own
+p95, and fails over on errors. The first successful response wins.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from . import metrics
+
+# Rolling window of requests kept per provider
+STATS_WINDOW = int(os.getenv("LLM_STATS_WINDOW", "100"))
+# Samples needed before a provider's own p95 is trusted for hedging
+MIN_SAMPLES_FOR_P95 = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+# Hedge delay (seconds) used until enough samples are collected
+DEFAULT_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "5.0"))
+# Never hedge sooner than this (seconds), even for very fast providers
+MIN_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.25"))
+# Providers above this rolling error rate are ranked after healthy ones
+MAX_ERROR_RATE = float(os.getenv("LLM_MAX_ERROR_RATE", "0.5"))
+# Prompts longer than this (characters) are tracked separately from short ones
+LONG_PROMPT_CHARS = 2000
+
+
+def _prompt_bucket(messages) -> str:
+    """Router prompts and code generation prompts have very different latencies"""
+    size = sum(len(getattr(message, "content", "") or "") for message in messages or [])
+    return "long" if size > LONG_PROMPT_CHARS else "short"
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class ProviderStats:
+    """Rolling latency and error statistics for one provider"""
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.window = window
+        self.requests = 0
+        self.errors = 0
+        self.hedges = 0
+        self.wins = 0
+
+    def record_success(self, bucket: str, latency: float):
+        self.latencies.setdefault(bucket, deque(maxlen=self.window)).append(latency)
+        self.outcomes.append(True)
+        self.requests += 1
+
+    def record_error(self):
+        self.outcomes.append(False)
+        self.requests += 1
+        self.errors += 1
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+    def percentile(self, bucket: str, fraction: float) -> Optional[float]:
+        samples = self.latencies.get(bucket)
+        if not samples or len(samples) < MIN_SAMPLES_FOR_P95:
+            return None
+        return _percentile(list(samples), fraction)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate(), 3),
+            "hedges": self.hedges,
+            "wins": self.wins,
+            "latency": {
+                bucket: {
+                    "samples": len(samples),
+                    "p50": round(_percentile(list(samples), 0.5), 3),
+                    "p95": round(_percentile(list(samples), 0.95), 3),
+                }
+                for bucket, samples in self.latencies.items() if samples
+            },
+        }
+
+
+class LLMProvider:
+    """A named LLM client (anything with an async ainvoke) plus its stats"""
+
+    def __init__(self, name: str, llm):
+        self.name = name
+        self.llm = llm
+        self.stats = ProviderStats()
+
+    def __repr__(self):
+        return f"LLMProvider({self.name!r})"
+
+
+class ProviderPool:
+    """Drop-in replacement for a single LLM that hedges and fails over across providers"""
+
+    def __init__(self, providers: List[LLMProvider], hedging: bool = True,
+                 default_hedge_delay: float = DEFAULT_HEDGE_DELAY):
+        if not providers:
+            raise ValueError("ProviderPool needs at least one provider")
+        self.providers = providers
+        self.hedging = hedging
+        self.default_hedge_delay = default_hedge_delay
+
+    def ranked(self, bucket: str) -> List[LLMProvider]:
+        """Healthy providers first, then by median latency; unknown latency keeps config order"""
+        def key(indexed):
+            index, provider = indexed
+            unhealthy = provider.stats.error_rate() > MAX_ERROR_RATE
+            p50 = provider.stats.percentile(bucket, 0.5)
+            return (unhealthy, p50 if p50 is not None else float("inf"), index)
+        return [provider for _, provider in sorted(enumerate(self.providers), key=key)]
+
+    def hedge_delay(self, provider: LLMProvider, bucket: str) -> float:
+        p95 = provider.stats.percentile(bucket, 0.95)
+        return max(MIN_HEDGE_DELAY, p95 if p95 is not None else self.default_hedge_delay)
+
+    async def _call(self, provider: LLMProvider, messages, bucket: str):
+        start = time.perf_counter()
+        try:
+            response = await provider.llm.ainvoke(messages)
+        except asyncio.CancelledError:
+            # Lost the hedge race; not an error and not a latency sample
+            metrics.LLM_PROVIDER_REQUESTS.inc(provider=provider.name, outcome="cancelled")
+            raise
+        except Exception:
+            provider.stats.record_error()
+            metrics.LLM_PROVIDER_REQUESTS.inc(provider=provider.name, outcome="error")
+            raise
+        provider.stats.record_success(bucket, time.perf_counter() - start)
+        metrics.LLM_PROVIDER_REQUESTS.inc(provider=provider.name, outcome="ok")
+        return response
+
+    async def ainvoke(self, messages):
+        bucket = _prompt_bucket(messages)
+        queue = self.ranked(bucket)
+        pending: Dict[asyncio.Task, LLMProvider] = {}
+        last_error: Optional[BaseException] = None
+        hedged = False
+
+        def launch():
+            provider = queue.pop(0)
+            pending[asyncio.ensure_future(self._call(provider, messages, bucket))] = provider
+            return provider
+
+        current = launch()
+        try:
+            while pending:
+                # Wait up to the current provider's p95 before hedging
+                can_hedge = self.hedging and not hedged and queue
+                timeout = self.hedge_delay(current, bucket) if can_hedge else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    hedged = True
+                    current.stats.hedges += 1
+                    metrics.LLM_PROVIDER_HEDGES.inc(provider=current.name)
+                    slow = current
+                    current = launch()
+                    print(f"⏱️ LLM provider '{slow.name}' slower than p95 ({timeout:.2f}s), hedging with '{current.name}'")
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        provider.stats.wins += 1
+                        return task.result()
+                    last_error = task.exception()
+                    print(f"❌ LLM provider '{provider.name}' failed: {last_error}")
+
+                # Fail over to the next provider when nothing is left in flight
+                if not pending and queue:
+                    current = launch()
+                    print(f"🔁 Failing over to LLM provider '{current.name}'")
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error if last_error else RuntimeError("No LLM provider available")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {provider.name: provider.stats.snapshot() for provider in self.providers}
+
+
+def openai_compatible_providers_from_env() -> List[LLMProvider]:
+    """Extra OpenAI-compatible endpoints from LLM_OPENAI_COMPAT_PROVIDERS.
+
+    Format: comma-separated ``name|base_url|model[|api_key]`` entries, e.g.
+    ``local|http://localhost:8080/v1|llama3`` for a local stub or vLLM server.
+    """
+    spec = os.getenv("LLM_OPENAI_COMPAT_PROVIDERS", "").strip()
+    if not spec:
+        return []
+
+    from langchain_openai import ChatOpenAI
+
+    providers = []
+    for entry in spec.split(","):
+        parts = [part.strip() for part in entry.split("|")]
+        if len(parts) < 3:
+            print(f"⚠️ Ignoring invalid LLM_OPENAI_COMPAT_PROVIDERS entry: {entry!r}")
+            continue
+        name, base_url, model = parts[:3]
+        api_key = parts[3] if len(parts) > 3 else "not-needed"
+        providers.append(LLMProvider(name, ChatOpenAI(base_url=base_url, openai_api_key=api_key,
+                                                      model=model, max_retries=0)))
+    return providers
@@ -0,0 +1,250 @@
+"""
+Prometheus-style metrics for the graph pipeline.
+
+A small dependency-free registry of counters, gauges and histograms rendered
+in the Prometheus text exposition format (served at /metrics). Metric objects
+are module-level so any part of the pipeline can record into them.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+COUNT_BUCKETS = (1, 2, 3, 4, 5, 10)
+
+_REGISTRY: List["_Metric"] = []
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for name, value in labels:
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> List[Tuple[str, str]]:
+        return list(zip(self.labelnames, key))
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        """Compute the gauge value at scrape time"""
+        with self._lock:
+            self._functions[self._key(labels)] = fn
+
+    def get(self, **labels) -> float:
+        key = self._key(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, fn in functions.items():
+            try:
+                values[key] = fn()
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0) + value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of a block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), []))
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        for key, counts, total in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    """Render every registered metric in the Prometheus text exposition format"""
+    return "\n".join(metric.render() for metric in _REGISTRY) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# -----------------------------
+# Pipeline metrics
+# -----------------------------
+NODE_LATENCY = Histogram("genx_node_duration_seconds", "Graph node latency", ["node"])
+NODE_REQUESTS = Counter("genx_node_requests_total", "Graph node executions", ["node", "status"])
+LLM_LATENCY = Histogram("genx_llm_duration_seconds", "LLM call latency", ["node"])
+LLM_TOKENS = Histogram("genx_llm_tokens", "LLM tokens per call", ["node", "direction"], buckets=TOKEN_BUCKETS)
+LLM_ERRORS = Counter("genx_llm_errors_total", "Failed LLM calls", ["node"])
+CODE_GEN_RETRIES = Counter("genx_code_gen_retries_total", "code_gen attempts that failed and were retried")
+CODE_GEN_ATTEMPTS = Histogram("genx_code_gen_attempts", "Attempts used per code_gen request", ["status"],
+                              buckets=COUNT_BUCKETS)
+RETRIEVAL_LATENCY = Histogram("genx_retrieval_duration_seconds", "RAG retrieval latency", ["backend"])
+CACHE_REQUESTS = Counter("genx_cache_requests_total", "Cache lookups", ["cache", "result"])
+EXECUTION_LATENCY = Histogram("genx_cad_execution_duration_seconds", "CadQuery execution time", ["status"])
+PARAMETRIC_REEXECUTIONS = Counter("genx_parametric_reexecutions_total", "Models re-executed with edited parameters instead of the LLM")
+SESSION_EDITS = Counter("genx_session_edits_total", "Follow-up edits applied to a session's model", ["kind"])
+LLM_PROVIDER_REQUESTS = Counter("genx_llm_provider_requests_total", "LLM provider calls", ["provider", "outcome"])
+LLM_PROVIDER_HEDGES = Counter("genx_llm_provider_hedges_total", "Hedged requests fired because a provider exceeded its p95",
+                              ["provider"])
+IN_FLIGHT = Gauge("genx_inflight_requests", "Coalesced computations currently in flight", ["scope"])
+ARTIFACT_BYTES = Histogram("genx_artifact_bytes", "Size of exported model artifacts", ["format"],
+                           buckets=BYTES_BUCKETS)
+ARTIFACT_REMOVALS = Counter("genx_artifact_removals_total", "Temp model artifacts removed", ["reason"])
+ARTIFACT_STORE_BYTES = Gauge("genx_artifact_store_bytes", "Bytes of tracked temp model artifacts")
+DOWNLOADS = Counter("genx_model_downloads_total", "Model download responses", ["status", "encoding"])
+DOWNLOAD_BYTES = Counter("genx_model_download_bytes_total", "Model bytes sent (after compression)", ["encoding"])
+PROCESS_MEMORY = Gauge("genx_process_memory_bytes", "Memory used by this worker process", ["kind"])
+BULKHEAD_ACTIVE = Gauge("genx_bulkhead_active", "Requests holding a route bulkhead slot", ["route"])
+BULKHEAD_QUEUE_DEPTH = Gauge("genx_bulkhead_queue_depth", "Requests waiting for a route bulkhead slot", ["route"])
+BULKHEAD_CAPACITY = Gauge("genx_bulkhead_capacity", "Configured route bulkhead slots and queue length", ["route", "kind"])
+BULKHEAD_WAIT = Histogram("genx_bulkhead_wait_seconds", "Time spent queued for a route bulkhead slot", ["route"])
+BULKHEAD_REJECTIONS = Counter("genx_bulkhead_rejections_total", "Requests rejected because the route queue was full",
+                              ["route"])
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def instrumented(node_name: str, node):
+    """Wrap a graph node to record its latency and outcome"""
+    async def wrapper(state):
+        start = time.perf_counter()
+        try:
+            new_state = await node(state)
+        except Exception:
+            NODE_REQUESTS.inc(node=node_name, status="error")
+            raise
+        finally:
+            NODE_LATENCY.observe(time.perf_counter() - start, node=node_name)
+        NODE_REQUESTS.inc(node=node_name, status="ok")
+        return new_state
+    return wrapper
+
+
+def usage_tokens(response) -> Optional[Tuple[int, int]]:
+    """Extract (input, output) token counts reported by the provider, if any"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    metadata = getattr(response, "response_metadata", None) or {}
+    token_usage = metadata.get("token_usage") or metadata.get("usage")
+    if token_usage:
+        return (token_usage.get("prompt_tokens", token_usage.get("input_tokens", 0)),
+                token_usage.get("completion_tokens", token_usage.get("output_tokens", 0)))
+    return None
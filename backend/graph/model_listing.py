@@ -0,0 +1,289 @@
+"""
+In-memory index of generated models for /list_generated_models.
+
+The model browser polls the listing, and the directory holds tens of thousands
+of files, so instead of an os.listdir per request the index:
+
+- rescans only when the directory mtime changes (files added, removed or
+  renamed), when a watchdog filesystem event marks it dirty (optional
+  dependency; catches in-place rewrites), or after MODEL_INDEX_MAX_AGE seconds;
+- keeps entries sorted newest first, so pages are sliced with a keyset cursor
+  (modified time, name) that stays stable while new models arrive;
+- caches lightweight geometry metadata (bounding box, triangle / face counts)
+  parsed from STL, GLB and STEP files, keyed by file mtime and size.
+"""
+
+import base64
+import bisect
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+import time
+from pathlib import Path
+from queue import Queue
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Directory mtime checks still catch creates/deletes
+    FileSystemEventHandler = object
+    Observer = None
+
+# Rescan at least this often (seconds) even without mtime changes or events
+MODEL_INDEX_MAX_AGE = float(os.getenv("GENX_MODEL_INDEX_MAX_AGE", "60"))
+# Largest page a client can request
+MODEL_LIST_MAX_LIMIT = int(os.getenv("GENX_MODEL_LIST_MAX_LIMIT", "500"))
+
+_STEP_POINT = re.compile(rb"CARTESIAN_POINT\s*\(\s*'[^']*'\s*,\s*\(\s*([-+\d.eE]+)\s*,\s*([-+\d.eE]+)\s*,\s*([-+\d.eE]+)")
+_STL_VERTEX = re.compile(rb"vertex\s+([-+\d.eE]+)\s+([-+\d.eE]+)\s+([-+\d.eE]+)")
+
+
+def _bbox(points: np.ndarray) -> Optional[Dict[str, List[float]]]:
+    if points.size == 0:
+        return None
+    points = points.reshape(-1, 3)
+    return {"min": [round(float(v), 6) for v in points.min(axis=0)],
+            "max": [round(float(v), 6) for v in points.max(axis=0)]}
+
+
+def _stl_geometry(path: Path) -> Dict[str, Any]:
+    data = path.read_bytes()
+    if len(data) >= 84:
+        count = struct.unpack_from("<I", data, 80)[0]
+        if len(data) == 84 + 50 * count:
+            triangles = np.frombuffer(data, dtype=np.dtype([("normal", "<f4", 3), ("vertices", "<f4", 9),
+                                                            ("attr", "<u2")]), count=count, offset=84)
+            return {"triangles": count, "bbox": _bbox(triangles["vertices"])}
+    points = np.array(_STL_VERTEX.findall(data), dtype=float)
+    return {"triangles": len(points) // 3, "bbox": _bbox(points)}
+
+
+def _glb_geometry(path: Path) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        magic, _, _ = struct.unpack("<4sII", f.read(12))
+        if magic != b"glTF":
+            raise ValueError("not a GLB file")
+        chunk_length, _ = struct.unpack("<I4s", f.read(8))
+        gltf = json.loads(f.read(chunk_length))
+    accessors = gltf.get("accessors", [])
+    mins, maxs, triangles = [], [], 0
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            position = accessors[primitive["attributes"]["POSITION"]]
+            if "min" in position and "max" in position:
+                mins.append(position["min"])
+                maxs.append(position["max"])
+            indices = primitive.get("indices")
+            triangles += (accessors[indices]["count"] if indices is not None else position["count"]) // 3
+    bbox = _bbox(np.array(mins + maxs, dtype=float))
+    return {"triangles": triangles, "bbox": bbox}
+
+
+def _step_geometry(path: Path) -> Dict[str, Any]:
+    # Text scan only (no OpenCascade import): the bbox covers all cartesian
+    # points, so B-spline control points can make it slightly larger
+    data = path.read_bytes()
+    points = np.array(_STEP_POINT.findall(data), dtype=float)
+    return {"solids": data.count(b"MANIFOLD_SOLID_BREP"), "faces": data.count(b"ADVANCED_FACE"),
+            "bbox": _bbox(points)}
+
+
+GEOMETRY_READERS = {"stl": _stl_geometry, "glb": _glb_geometry, "step": _step_geometry, "stp": _step_geometry}
+
+
+def read_geometry(path: Path) -> Optional[Dict[str, Any]]:
+    reader = GEOMETRY_READERS.get(path.suffix.lstrip(".").lower())
+    if reader is None:
+        return None
+    try:
+        return reader(path)
+    except Exception as e:
+        print(f"⚠️ Could not read geometry of {path.name}: {e}")
+        return {"error": str(e)}
+
+
+def encode_cursor(entry: Dict[str, Any]) -> str:
+    raw = json.dumps([entry["_mtime_ns"], entry["name"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    mtime_ns, name = json.loads(raw)
+    return int(mtime_ns), str(name)
+
+
+def _sort_key(mtime_ns: int, name: str) -> Tuple[int, str]:
+    # Newest first, then by name for a total order
+    return (-mtime_ns, name)
+
+
+class _DirtyHandler(FileSystemEventHandler):
+    def __init__(self, index: "ModelListingIndex"):
+        self.index = index
+
+    def on_any_event(self, event):
+        self.index.invalidate()
+
+
+class ModelListingIndex:
+    """Cached, sorted listing of model files in one directory"""
+
+    def __init__(self, directory: Union[str, Path], url_prefix: str,
+                 allowed_ext: Iterable[str] = (".step", ".stl", ".glb"),
+                 max_age: float = MODEL_INDEX_MAX_AGE, watch: bool = True):
+        self.directory = Path(directory)
+        self.url_prefix = url_prefix.rstrip("/")
+        self.allowed_ext = {ext.lower() for ext in allowed_ext}
+        self.max_age = max_age
+        self.version = 0
+        self._lock = threading.Lock()
+        self._entries: List[Dict[str, Any]] = []
+        self._keys: List[Tuple[int, str]] = []
+        self._dir_mtime_ns: Optional[int] = None
+        self._scanned_at = 0.0
+        self._dirty = True
+        self._geometry: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+        self._pending: "Queue[Dict[str, Any]]" = Queue()
+        self._scheduled = set()
+        self._filler = None
+        self._observer = None
+        if watch and Observer is not None and self.directory.is_dir():
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_DirtyHandler(self), str(self.directory), recursive=False)
+                self._observer.daemon = True
+                self._observer.start()
+            except Exception as e:
+                print(f"⚠️ Filesystem watcher unavailable for {self.directory}: {e}")
+                self._observer = None
+
+    def invalidate(self):
+        self._dirty = True
+
+    def _needs_scan(self) -> bool:
+        if self._dirty or time.monotonic() - self._scanned_at > self.max_age:
+            return True
+        try:
+            return self.directory.stat().st_mtime_ns != self._dir_mtime_ns
+        except FileNotFoundError:
+            return self._dir_mtime_ns is not None
+
+    def refresh(self) -> bool:
+        """Rescan the directory if it changed; returns True if the listing changed"""
+        with self._lock:
+            if not self._needs_scan():
+                return False
+            self._dirty = False
+            self._scanned_at = time.monotonic()
+            entries = []
+            try:
+                self._dir_mtime_ns = self.directory.stat().st_mtime_ns
+                with os.scandir(self.directory) as it:
+                    for dirent in it:
+                        ext = os.path.splitext(dirent.name)[1].lower()
+                        if ext not in self.allowed_ext or not dirent.is_file():
+                            continue
+                        stat = dirent.stat()
+                        entries.append({
+                            "name": dirent.name,
+                            "url": f"{self.url_prefix}/{dirent.name}",
+                            "format": ext.lstrip("."),
+                            "size": stat.st_size,
+                            "modified": stat.st_mtime,
+                            "_mtime_ns": stat.st_mtime_ns,
+                        })
+            except FileNotFoundError:
+                self._dir_mtime_ns = None
+            entries.sort(key=lambda entry: _sort_key(entry["_mtime_ns"], entry["name"]))
+            keys = [_sort_key(entry["_mtime_ns"], entry["name"]) for entry in entries]
+            changed = [(e["name"], e["size"], e["_mtime_ns"]) for e in entries] != \
+                      [(e["name"], e["size"], e["_mtime_ns"]) for e in self._entries]
+            self._entries, self._keys = entries, keys
+            if changed:
+                self.version += 1
+                live = {(e["name"], e["_mtime_ns"], e["size"]) for e in entries}
+                self._geometry = {key: value for key, value in self._geometry.items() if key in live}
+            return changed
+
+    def _geometry_for(self, entry: Dict[str, Any], compute: bool) -> Optional[Dict[str, Any]]:
+        key = (entry["name"], entry["_mtime_ns"], entry["size"])
+        geometry = self._geometry.get(key)
+        if geometry is None and compute:
+            geometry = read_geometry(self.directory / entry["name"])
+            self._geometry[key] = geometry
+        return geometry
+
+    def _fill_geometry(self):
+        while True:
+            entry = self._pending.get()
+            self._geometry_for(entry, compute=True)
+            self._scheduled.discard((entry["name"], entry["_mtime_ns"], entry["size"]))
+
+    def _schedule_geometry(self, entries: List[Dict[str, Any]]):
+        if self._filler is None or not self._filler.is_alive():
+            self._filler = threading.Thread(target=self._fill_geometry, daemon=True)
+            self._filler.start()
+        for entry in entries:
+            key = (entry["name"], entry["_mtime_ns"], entry["size"])
+            if key not in self._scheduled:
+                self._scheduled.add(key)
+                self._pending.put(entry)
+
+    def query(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+              formats: Optional[Iterable[str]] = None, since: Optional[float] = None,
+              until: Optional[float] = None) -> Dict[str, Any]:
+        """One page of entries (newest first) after the cursor, plus the next cursor.
+
+        ``total`` counts every entry matching the filters, across all pages;
+        ``etag`` changes whenever the page content does (same on every worker).
+        """
+        self.refresh()
+        with self._lock:
+            entries, keys = self._entries, self._keys
+
+        start = 0
+        if cursor:
+            start = bisect.bisect_right(keys, _sort_key(*decode_cursor(cursor)))
+        wanted = {fmt.lower().lstrip(".") for fmt in formats} if formats else None
+
+        def matches(entry):
+            return ((wanted is None or entry["format"] in wanted)
+                    and (since is None or entry["modified"] >= since)
+                    and (until is None or entry["modified"] < until))
+
+        matching = [entry for entry in entries if matches(entry)]
+        page, next_cursor = [], None
+        for entry in entries[start:]:
+            if not matches(entry):
+                continue
+            if limit is not None and len(page) == limit:
+                next_cursor = encode_cursor(page[-1])
+                break
+            page.append(entry)
+
+        # Geometry is parsed on demand for bounded pages; for unbounded listings
+        # only cached values are returned and the rest is filled in the background
+        compute = limit is not None
+        items, missing = [], []
+        for entry in page:
+            geometry = self._geometry_for(entry, compute)
+            if geometry is None and entry["format"] in GEOMETRY_READERS:
+                missing.append(entry)
+            items.append({**{k: v for k, v in entry.items() if not k.startswith("_")}, "geometry": geometry})
+        if missing:
+            self._schedule_geometry(missing)
+
+        digest = hashlib.sha1(json.dumps([items, next_cursor, len(matching)], sort_keys=True).encode())
+        return {"items": items, "next_cursor": next_cursor, "total": len(matching),
+                "etag": f'W/"{digest.hexdigest()}"'}
+
+    def close(self):
+        if self._observer is not None:
+            self._observer.stop()
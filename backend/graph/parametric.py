@@ -0,0 +1,246 @@
+"""
+Parametric re-execution of generated CadQuery code.
+
+When generated code runs successfully its numeric literals are lifted into
+named parameters and the code is rewritten into a template that reads them
+from ``__params__``:
+
+    height = 10                      ->  height = __params__["height"]
+    cq.Workplane("XY").box(10, 5, 3) ->  ....box(__params__["box_1"], ...)
+    .hole(diameter=4)                ->  .hole(diameter=__params__["diameter"])
+
+Templates are kept per model_id in a small SQLite database shared by all
+workers, so a parameter edit ("make it 20 mm taller", a Sidebar input) is one
+kernel run of the stored template instead of an LLM round-trip plus retries.
+Compiled code objects are cached per template in each worker.
+"""
+
+import ast
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from .workers import ProcessLocal
+
+PARAMETRIC_DB_PATH = os.getenv("GENX_PARAMETRIC_DB", "parametric.db")
+# Templates kept before the oldest are dropped
+PARAMETRIC_MAX_MODELS = int(os.getenv("GENX_PARAMETRIC_MAX_MODELS", "1000"))
+# Name of the dict the rewritten code reads its parameters from
+PARAMS_NAME = "__params__"
+
+
+def _numeric_literal(node: ast.AST) -> Optional[Union[int, float]]:
+    """Value of an int/float literal (optionally negated), else None"""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _numeric_literal(node.operand)
+        if value is None:
+            return None
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    return None
+
+
+def _call_name(call: ast.Call) -> str:
+    func = call.func
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return "call"
+
+
+class _ParameterExtractor(ast.NodeTransformer):
+    """Replaces numeric literals with __params__[...] lookups, naming each from its context"""
+
+    def __init__(self):
+        self.parameters: Dict[str, Union[int, float]] = {}
+
+    def _name(self, base: str) -> str:
+        name, suffix = base, 2
+        while name in self.parameters:
+            name, suffix = f"{base}_{suffix}", suffix + 1
+        return name
+
+    def _lift(self, node: ast.AST, base: str) -> ast.AST:
+        value = _numeric_literal(node)
+        if value is None:
+            return self.visit(node)
+        name = self._name(base)
+        self.parameters[name] = value
+        return ast.copy_location(
+            ast.Subscript(value=ast.Name(id=PARAMS_NAME, ctx=ast.Load()), slice=ast.Constant(name), ctx=ast.Load()),
+            node)
+
+    def visit_Assign(self, node: ast.Assign) -> ast.AST:
+        targets = node.targets[0] if len(node.targets) == 1 else None
+        if isinstance(targets, ast.Name):
+            node.value = self._lift(node.value, targets.id)
+        elif (isinstance(targets, ast.Tuple) and isinstance(node.value, ast.Tuple)
+              and len(targets.elts) == len(node.value.elts)):
+            node.value.elts = [self._lift(value, target.id) if isinstance(target, ast.Name) else self.visit(value)
+                               for target, value in zip(targets.elts, node.value.elts)]
+        else:
+            node.value = self.visit(node.value)
+        return node
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> ast.AST:
+        if node.value is not None and isinstance(node.target, ast.Name):
+            node.value = self._lift(node.value, node.target.id)
+        return node
+
+    def _lift_argument(self, node: ast.AST, base: str) -> ast.AST:
+        # Vectors such as translate((0, 0, 5)) get one parameter per axis
+        if isinstance(node, (ast.Tuple, ast.List)) and 2 <= len(node.elts) <= 3:
+            node.elts = [self._lift(value, f"{base}_{axis}") for axis, value in zip("xyz", node.elts)]
+            return node
+        return self._lift(node, base)
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        name = _call_name(node)
+        node.func = self.visit(node.func)
+        node.args = [self._lift_argument(arg, f"{name}_{position}") for position, arg in enumerate(node.args, 1)]
+        for keyword in node.keywords:
+            keyword.value = self._lift_argument(keyword.value, keyword.arg or name)
+        return node
+
+    def visit_Subscript(self, node: ast.Subscript) -> ast.AST:
+        # Indices (points[0]) are structure, not dimensions
+        node.value = self.visit(node.value)
+        return node
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        return self._lift(node, "value") if _numeric_literal(node) is not None else self.generic_visit(node)
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        return self._lift(node, "value") if _numeric_literal(node) is not None else node
+
+
+def extract_parameters(code: str) -> Tuple[str, Dict[str, Union[int, float]]]:
+    """Rewrite code into a template plus its named parameters (in source order).
+
+    Running the template with ``__params__`` set to the returned parameters is
+    equivalent to running the original code. Raises SyntaxError for code that
+    does not parse.
+    """
+    tree = ast.parse(code)
+    extractor = _ParameterExtractor()
+    tree = ast.fix_missing_locations(extractor.visit(tree))
+    return ast.unparse(tree), extractor.parameters
+
+
+class _ParameterRenderer(ast.NodeTransformer):
+    def __init__(self, parameters: Dict[str, Union[int, float]]):
+        self.parameters = parameters
+
+    def visit_Subscript(self, node: ast.Subscript) -> ast.AST:
+        if (isinstance(node.value, ast.Name) and node.value.id == PARAMS_NAME
+                and isinstance(node.slice, ast.Constant) and node.slice.value in self.parameters):
+            value = self.parameters[node.slice.value]
+            literal = ast.Constant(abs(value))
+            if value < 0:
+                literal = ast.UnaryOp(op=ast.USub(), operand=literal)
+            return ast.copy_location(literal, node)
+        return self.generic_visit(node)
+
+
+def render_code(template: str, parameters: Dict[str, Union[int, float]]) -> str:
+    """Plain code for a template with its current parameter values written back in"""
+    tree = _ParameterRenderer(parameters).visit(ast.parse(template))
+    return ast.unparse(ast.fix_missing_locations(tree))
+
+
+def apply_overrides(parameters: Dict[str, Union[int, float]],
+                    overrides: Dict[str, Any]) -> Dict[str, Union[int, float]]:
+    """Merge overrides into parameters; raises ValueError for unknown names or non-numeric values"""
+    merged = dict(parameters)
+    for name, value in overrides.items():
+        if name not in parameters:
+            raise ValueError(f"Unknown parameter '{name}'. Available: {', '.join(parameters) or 'none'}")
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"Parameter '{name}' must be a number, got {value!r}")
+        # Integers stay integers (counts feed range() and polarArray())
+        if isinstance(parameters[name], int) and float(value).is_integer():
+            value = int(value)
+        merged[name] = value
+    return merged
+
+
+@lru_cache(maxsize=256)
+def compile_template(template: str):
+    """Compiled code object for a template, cached per worker"""
+    return compile(template, "<parametric>", "exec")
+
+
+class ParametricStore:
+    """Templates and parameters of generated models, keyed by model_id"""
+
+    def __init__(self, db_path: Union[str, Path] = PARAMETRIC_DB_PATH, max_models: int = PARAMETRIC_MAX_MODELS):
+        self.db_path = Path(db_path)
+        self.max_models = max_models
+        self._lock = threading.Lock()
+        self._local = ProcessLocal(self._connect)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use in each worker, never inherited across fork()
+        return self._local.get()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS parametric_models (
+                    model_id TEXT PRIMARY KEY,
+                    template TEXT NOT NULL,
+                    parameters TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    parent_id TEXT,
+                    created_at REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS parametric_age ON parametric_models (created_at)")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def put(self, model_id: str, template: str, parameters: Dict[str, Union[int, float]],
+            message: str = "", parent_id: Optional[str] = None):
+        with self._transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parametric_models (model_id, template, parameters, message, parent_id, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (model_id, template, json.dumps(parameters), message, parent_id, time.time()))
+            # Drop the oldest templates beyond the limit
+            self._conn.execute(
+                "DELETE FROM parametric_models WHERE model_id IN ("
+                "SELECT model_id FROM parametric_models ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_models,))
+
+    def get(self, model_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM parametric_models WHERE model_id = ?", (model_id,)).fetchone()
+        if row is None:
+            return None
+        return {**dict(row), "parameters": json.loads(row["parameters"])}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM parametric_models").fetchone()[0]
@@ -0,0 +1,326 @@
+"""
+Deterministic fast path for common primitives.
+
+Requests that fully specify a basic shape, such as
+
+    box 10x5x3                                   cylinder radius 5 height 10
+    sphere of diameter 20                        tube od 20 id 16 length 50
+    plate 100x60x5 with 4 holes of 6 mm          flange outer diameter 100 bore 40 12 mm thick
+
+are parsed by a small grammar and built without the router LLM, retrieval or
+code generation. Dimension phrases ("radius 5", "5 cm thick", "6 bolt holes
+of 8 mm") are matched by rules and removed; what is left may only be one
+shape name, filler words ("make me a ... with ...") and bare numbers. Any
+other word, a missing dimension, or a dimension or number the shape does not
+use ("box 10x5x3 with 4 holes", "cylinder ... with bore 4") returns None and
+the request takes the normal LLM route, so "a box-shaped gear housing" or
+"CadQuery code for a cylinder" are never mistaken for primitives and no
+requested feature is silently dropped.
+
+Each primitive is emitted as a few lines of CadQuery with one named variable
+per dimension, so the result is stored and edited like any generated model
+(parametric templates, Sidebar inputs, session edits).
+"""
+
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+SHAPES = {
+    "box": "box", "cuboid": "box", "block": "box", "brick": "box", "cube": "cube",
+    "cylinder": "cylinder", "rod": "cylinder", "disc": "cylinder", "disk": "cylinder",
+    "sphere": "sphere", "ball": "sphere",
+    "tube": "tube", "pipe": "tube", "sleeve": "tube", "ring": "tube", "washer": "tube",
+    "plate": "plate",
+    "flange": "flange",
+}
+FILLER = {
+    "make", "create", "generate", "build", "design", "draw", "model", "give", "need", "want", "please",
+    "me", "i", "a", "an", "the", "with", "of", "and", "by", "in", "on", "at", "to", "for", "it", "is",
+    "has", "having", "that", "each", "which", "are", "its", "can", "you", "could", "simple", "solid",
+    "basic", "rectangular", "round", "circular", "hollow", "mm",
+}
+UNITS = {"mm": 1.0, "millimeter": 1.0, "millimeters": 1.0, "millimetre": 1.0, "millimetres": 1.0,
+         "cm": 10.0, "m": 1000.0, "in": 25.4, "inch": 25.4, "inches": 25.4}
+# Canonical dimension names for the words the rules capture
+ALIASES = {
+    "l": "length", "long": "length", "w": "width", "wide": "width",
+    "h": "height", "tall": "height", "high": "height", "deep": "height", "depth": "height",
+    "t": "thickness", "thick": "thickness", "r": "radius", "d": "diameter", "dia": "diameter",
+    "edge": "side",
+}
+
+_N = r"(\d+(?:\.\d+)?)"
+_IS = r"(?: of| is| at)?"
+_UNIT = "|".join(sorted(UNITS, key=len, reverse=True))
+# A number with its unit, if any
+_MEASURE = rf"{_N}(?:\s*({_UNIT})\b)?"
+# (pattern, slot for each value group); "{dim}" is the captured dimension word
+RULES: List[Tuple[str, Tuple[str, ...]]] = [
+    (rf"\b{_N} (?:bolt )?(?:holes?|bolts)(?: (?:of|with|at)(?: a)?(?: (?:diameter|dia|size))?{_IS} {_N}(?: (?:diameter|dia))?)?",
+     ("hole_count", "hole_diameter")),
+    (rf"\b(?:bolt )?holes?(?: (?:of|with)(?: a)?)?(?: (?:diameter|dia|size))?{_IS} {_N}", ("hole_diameter",)),
+    (rf"\b(?:bolt circle|pcd)(?: diameter)?{_IS} {_N}", ("bolt_circle_diameter",)),
+    (rf"\b(?:outer|outside) (?P<dim>diameter|radius){_IS} {_N}", ("outer_{dim}",)),
+    (rf"\b{_N} (?:outer|outside) (?P<dim>diameter|radius)\b", ("outer_{dim}",)),
+    (rf"\bod{_IS} {_N}", ("outer_diameter",)),
+    (rf"\b(?:inner|inside) (?P<dim>diameter|radius){_IS} {_N}", ("inner_{dim}",)),
+    (rf"\b{_N} (?:inner|inside) (?P<dim>diameter|radius)\b", ("inner_{dim}",)),
+    (rf"\b(?:id|bore(?: diameter)?){_IS} {_N}", ("inner_diameter",)),
+    (rf"\b{_N} bore\b", ("inner_diameter",)),
+    (rf"\bwall(?: thickness)?{_IS} {_N}", ("wall_thickness",)),
+    (rf"\b{_N} (?:thick )?wall\b", ("wall_thickness",)),
+    (rf"\b(?P<dim>length|width|height|depth|thickness|diameter|dia|radius|side|edge|[lwhtrd]){_IS} {_N}", ("{dim}",)),
+    (rf"\b{_N} (?P<dim>long|wide|tall|high|deep|thick|diameter|radius)\b", ("{dim}",)),
+    (rf"\b{_N}x{_N}(?:x{_N})?\b", ("dim_1", "dim_2", "dim_3")),
+]
+_RULES = [(re.compile(pattern), slots) for pattern, slots in RULES]
+# Holes and bolts are kept this far from the plate edge, as a share of the shorter side
+PLATE_MARGIN = 0.15
+
+
+def _group_to_mm(match: re.Match) -> str:
+    """'2x3x4 in' -> '50.8x76.2x101.6': a trailing unit covers the group's unit-free numbers"""
+    measures = [re.fullmatch(_MEASURE, part).groups() for part in re.split(r"\s*x\s*", match.group(0).strip())]
+    trailing = measures[-1][1]
+    if trailing is None and any(unit for _, unit in measures):
+        raise ValueError(f"Mixed units in '{match.group(0)}'")
+    return "x".join(f"{float(value) * UNITS[unit or trailing or 'mm']:g}" for value, unit in measures)
+
+
+def _normalize(message: str) -> str:
+    """Lowercase words and unit-free numbers in millimetres, e.g. '5 x 2 cm' -> '50x20'
+
+    Raises ValueError for a dimension group whose unit is ambiguous ('2cm x 3 x 4').
+    """
+    text = message.lower().replace("×", " x ").replace("ø", " diameter ")
+    text = re.sub(r"[,;:=()!?\"'/]|\.(?!\d)|(?<=\d)\*(?=\s*\d)", " ", text)
+    text = re.sub(rf"{_MEASURE}(?:\s*x\s*{_MEASURE})+", _group_to_mm, text)
+    text = re.sub(rf"(\d+(?:\.\d+)?)\s*({_UNIT})\b", lambda m: f"{float(m.group(1)) * UNITS[m.group(2)]:g}", text)
+    return " ".join(text.split())
+
+
+def parse_request(message: str) -> Optional[Dict[str, Any]]:
+    """Shape name, named dimensions (mm) and leftover numbers of a primitive request, or None"""
+    try:
+        normalized = _normalize(message)
+    except ValueError:
+        return None
+    text = f" {normalized} "
+    slots: Dict[str, float] = {}
+    for pattern, names in _RULES:
+        for match in pattern.finditer(text):
+            dimension = match.groupdict().get("dim")
+            values = [group for index, group in enumerate(match.groups(), 1)
+                      if group is not None and index != pattern.groupindex.get("dim")]
+            for name, value in zip(names, values):
+                name = name.format(dim=ALIASES.get(dimension, dimension))
+                value = float(value)
+                if name.endswith("radius"):
+                    name, value = name[:-len("radius")] + "diameter", value * 2
+                if slots.get(name, value) != value:
+                    return None  # The same dimension given twice
+                slots[name] = value
+        text = pattern.sub(" ", text)
+
+    shapes, positional, holes = [], [], False
+    for word in text.split():
+        if re.fullmatch(_N, word):
+            positional.append(float(word))
+        elif word in SHAPES:
+            shapes.append(SHAPES[word])
+        elif word in ("hole", "holes"):
+            holes = True
+        elif word not in FILLER:
+            return None
+    if len(set(shapes)) != 1:
+        return None
+    shape = shapes[0]
+    if shape == "cylinder" and re.search(r"\bhollow\b", normalized):
+        shape = "tube"
+    if shape == "plate" and (holes or "hole_count" in slots or "hole_diameter" in slots):
+        shape = "plate_with_holes"
+    elif holes:
+        return None
+    return {"shape": shape, "slots": slots, "positional": positional}
+
+
+class _Slots:
+    """Parsed dimensions of a request, recording which ones the shape used"""
+
+    def __init__(self, slots: Dict[str, float], positional: List[float]):
+        self.slots = slots
+        self.positional = positional
+        self.used: set = set()
+        self.positional_used = False
+
+    def take(self, *names: str) -> Optional[float]:
+        """First of names that was given"""
+        for name in names:
+            if name in self.slots:
+                self.used.add(name)
+                return self.slots[name]
+        return None
+
+    def dims(self) -> List[float]:
+        """The numbers of an 'AxB' or 'AxBxC' group"""
+        return [self.take(name) for name in ("dim_1", "dim_2", "dim_3") if name in self.slots]
+
+    def numbers(self, count: int) -> Optional[List[float]]:
+        """Exactly count bare numbers, e.g. 'sphere 5' or 'box 10 5 3'"""
+        if len(self.positional) != count:
+            return None
+        self.positional_used = True
+        return self.positional
+
+    @property
+    def leftover(self) -> bool:
+        return bool(set(self.slots) - self.used) or bool(self.positional and not self.positional_used)
+
+
+def _resolve(shape: str, slots: _Slots) -> Optional[Dict[str, Any]]:
+    """Dimensions each primitive's code needs; missing ones are None"""
+    if shape == "cube":
+        dims = slots.dims()
+        if dims:
+            side = dims[0] if len(dims) == 3 and len(set(dims)) == 1 else None
+        else:
+            side = slots.take("side", "length", "width", "height") or (slots.numbers(1) or [None])[0]
+        return {"length": side, "width": side, "height": side}
+    if shape == "box":
+        dims = slots.dims() or slots.numbers(3)
+        if dims:
+            return dict(zip(("length", "width", "height"), dims)) if len(dims) == 3 else None
+        return {"length": slots.take("length"), "width": slots.take("width"),
+                "height": slots.take("height", "thickness")}
+    if shape == "sphere":
+        diameter = slots.take("diameter")
+        if diameter is None and slots.numbers(1):
+            diameter = slots.positional[0] * 2
+        return {"radius": diameter / 2 if diameter else None}
+    if shape == "cylinder":
+        diameter = slots.take("diameter", "outer_diameter")
+        return {"radius": diameter / 2 if diameter else None,
+                "height": slots.take("height", "length", "thickness")}
+    if shape == "tube":
+        outer = slots.take("outer_diameter", "diameter")
+        inner = slots.take("inner_diameter")
+        if inner is None and outer and "wall_thickness" in slots.slots:
+            inner = outer - 2 * slots.take("wall_thickness")
+        return {"outer_radius": outer / 2 if outer else None, "inner_radius": inner / 2 if inner else None,
+                "height": slots.take("height", "length", "thickness")}
+    if shape in ("plate", "plate_with_holes"):
+        dims = slots.dims()
+        if len(dims) in (2, 3):
+            length, width = dims[0], dims[1]
+            thickness = dims[2] if len(dims) == 3 else slots.take("thickness", "height")
+        elif dims:
+            return None
+        else:
+            length, width, thickness = (slots.take("length"), slots.take("width"),
+                                        slots.take("thickness", "height"))
+        params = {"length": length, "width": width, "height": thickness}
+        if shape == "plate":
+            return params
+        # A plate has no diameter of its own, so a bare one is the holes'
+        hole_count = slots.take("hole_count")
+        return {**params, "hole_count": hole_count if hole_count is not None else 4,
+                "hole_diameter": slots.take("hole_diameter", "diameter")}
+    if shape == "flange":
+        outer = slots.take("outer_diameter", "diameter")
+        if outer is None:
+            return None
+        inner = slots.take("inner_diameter")
+        inner = inner if inner is not None else round(outer * 0.4, 3)
+        bolt_hole = slots.take("hole_diameter")
+        bolt_hole = bolt_hole if bolt_hole is not None else round((outer - inner) * 0.15, 3)
+        bolt_circle = slots.take("bolt_circle_diameter")
+        bolt_count = slots.take("hole_count")
+        return {"outer_radius": outer / 2, "inner_radius": inner / 2,
+                "thickness": slots.take("thickness", "height"),
+                "bolt_circle_radius": bolt_circle / 2 if bolt_circle is not None else (outer + inner) / 4,
+                "bolt_hole_diameter": bolt_hole, "bolt_count": bolt_count if bolt_count is not None else 6}
+    return None
+
+
+def _grid(count: int, length: float, width: float) -> Tuple[int, int]:
+    """Columns and rows of a hole grid with exactly count holes, shaped like the plate"""
+    pairs = [(count // rows, rows) for rows in range(1, count + 1) if count % rows == 0]
+    return min(pairs, key=lambda pair: abs(math.log(pair[0] / pair[1]) - math.log(length / width)))
+
+
+def _valid(shape: str, params: Dict[str, Any]) -> bool:
+    if any(value is None or value <= 0 for value in params.values()):
+        return False
+    if shape == "tube":
+        return params["inner_radius"] < params["outer_radius"]
+    if shape == "plate_with_holes":
+        margin = min(params["length"], params["width"]) * PLATE_MARGIN
+        return (float(params["hole_count"]).is_integer() and params["hole_diameter"] < margin * 2
+                and params["length"] > 2 * margin and params["width"] > 2 * margin)
+    if shape == "flange":
+        clearance = params["bolt_hole_diameter"] / 2
+        return (params["inner_radius"] < params["bolt_circle_radius"] - clearance
+                and params["bolt_circle_radius"] + clearance < params["outer_radius"]
+                and float(params["bolt_count"]).is_integer())
+    return True
+
+
+def _literal(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:g}"
+
+
+def primitive_code(shape: str, params: Dict[str, Any]) -> str:
+    """CadQuery code with one named variable per dimension"""
+    if shape == "plate_with_holes":
+        margin = min(params["length"], params["width"]) * PLATE_MARGIN
+        columns, rows = _grid(int(params["hole_count"]), params["length"], params["width"])
+        params = {"length": params["length"], "width": params["width"], "height": params["height"],
+                  "hole_diameter": params["hole_diameter"], "columns": columns, "rows": rows,
+                  "x_spacing": round((params["length"] - 2 * margin) / max(columns - 1, 1), 3),
+                  "y_spacing": round((params["width"] - 2 * margin) / max(rows - 1, 1), 3)}
+    if shape == "flange":
+        params = {**params, "bolt_start_angle": 0, "bolt_sweep_angle": 360}
+    body = {
+        "cube": 'cq.Workplane("XY").box(length, width, height)',
+        "box": 'cq.Workplane("XY").box(length, width, height)',
+        "plate": 'cq.Workplane("XY").box(length, width, height)',
+        "sphere": 'cq.Workplane("XY").sphere(radius)',
+        "cylinder": 'cq.Workplane("XY").circle(radius).extrude(height)',
+        "tube": 'cq.Workplane("XY").circle(outer_radius).circle(inner_radius).extrude(height)',
+        "plate_with_holes": ('(cq.Workplane("XY").box(length, width, height)\n'
+                             '          .faces(">Z").workplane()\n'
+                             '          .rarray(x_spacing, y_spacing, columns, rows)\n'
+                             '          .hole(hole_diameter))'),
+        "flange": ('(cq.Workplane("XY").circle(outer_radius).circle(inner_radius).extrude(thickness)\n'
+                   '          .faces(">Z").workplane()\n'
+                   '          .polarArray(bolt_circle_radius, bolt_start_angle, bolt_sweep_angle, bolt_count)\n'
+                   '          .hole(bolt_hole_diameter))'),
+    }[shape]
+    lines = ["import cadquery as cq", ""]
+    lines += [f"{name} = {_literal(value)}" for name, value in params.items()]
+    lines += ["", f"result = {body}"]
+    return "\n".join(lines) + "\n"
+
+
+def parse_primitive(message: str) -> Optional[Dict[str, Any]]:
+    """{"shape", "params", "code"} for a fully specified primitive request, else None"""
+    request = parse_request(message)
+    if request is None:
+        return None
+    slots = _Slots(request["slots"], request["positional"])
+    params = _resolve(request["shape"], slots)
+    # A dimension or number the shape did not use is a feature it cannot build
+    if params is None or slots.leftover or not _valid(request["shape"], params):
+        return None
+    shape = "box" if request["shape"] in ("cube", "plate") else request["shape"]
+    return {"shape": shape, "params": params, "code": primitive_code(request["shape"], params)}
+
+
+def describe(primitive: Dict[str, Any]) -> str:
+    """Short description for the chat reply, e.g. 'box 10 × 5 × 3 mm'"""
+    params = primitive["params"]
+    shape = primitive["shape"].replace("_", " ")
+    if primitive["shape"] == "box":
+        return f"{shape} {_literal(params['length'])} × {_literal(params['width'])} × {_literal(params['height'])} mm"
+    return f"{shape} ({', '.join(f'{name} {_literal(value)}' for name, value in params.items())})"
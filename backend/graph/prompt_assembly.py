@@ -0,0 +1,202 @@
+"""
+Token-budgeted prompt assembly for RAG examples.
+
+Dataset snippets are long chains of sketch calls (`moveTo`, `lineTo`,
+`threePointArc`, ...) with 18-digit floats. Pasting them verbatim into the
+code generation prompt makes every request slower and more expensive, so
+examples are compacted (floats rounded, repetitive segments collapsed) and
+only the subset that fits the configured token budget is kept.
+"""
+
+import os
+import re
+from typing import List, Dict, Any, Optional
+
+# Token budget for the examples section of the code generation prompt
+DEFAULT_EXAMPLES_TOKEN_BUDGET = int(os.getenv("RAG_EXAMPLES_TOKEN_BUDGET", "1200"))
+# Most examples included even when more fit the budget
+DEFAULT_MAX_EXAMPLES = int(os.getenv("RAG_EXAMPLES_MAX", "2"))
+# Significant digits kept when rounding float literals in examples
+DEFAULT_FLOAT_DIGITS = int(os.getenv("RAG_EXAMPLES_FLOAT_DIGITS", "4"))
+# Chained sketch calls kept on a single line before the middle is collapsed
+DEFAULT_MAX_CHAIN_SEGMENTS = int(os.getenv("RAG_EXAMPLES_MAX_CHAIN_SEGMENTS", "8"))
+
+_FLOAT_RE = re.compile(r"(?<![\w.])-?\d+\.\d+(?:[eE][-+]?\d+)?")
+
+# Tokenizer is optional - tiktoken ships with langchain-openai but we fall
+# back to a character heuristic when it is not installed
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text (tiktoken when available, ~4 chars/token otherwise)"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        try:
+            return len(_ENCODING.encode(text))
+        except Exception:
+            pass
+    return max(1, (len(text) + 3) // 4)
+
+
+def round_floats(code: str, digits: int = DEFAULT_FLOAT_DIGITS) -> str:
+    """Round float literals in code to the given number of significant digits"""
+    def _round(match):
+        literal = match.group(0)
+        try:
+            value = float(f"{float(literal):.{digits}g}")
+        except ValueError:
+            return literal
+        rounded = repr(value)
+        return rounded if len(rounded) < len(literal) else literal
+
+    return _FLOAT_RE.sub(_round, code)
+
+
+def _split_chain(line: str) -> Optional[List[str]]:
+    """Split a line into its top-level `.method(...)` segments.
+
+    Returns the head expression followed by each chained call, or None when
+    the line cannot be split safely (unbalanced parentheses, strings with
+    dots, etc.).
+    """
+    segments = []
+    depth = 0
+    quote = None
+    start = 0
+    for i, ch in enumerate(line):
+        if quote:
+            if ch == quote and line[i - 1] != "\\":
+                quote = None
+            continue
+        if ch in ("'", '"'):
+            quote = ch
+        elif ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+            if depth < 0:
+                return None
+        elif ch == "." and depth == 0 and i > 0 and line[i - 1] == ")":
+            segments.append(line[start:i])
+            start = i
+    if depth != 0 or quote:
+        return None
+    segments.append(line[start:])
+    return segments
+
+
+def collapse_segments(code: str, max_segments: int = DEFAULT_MAX_CHAIN_SEGMENTS) -> str:
+    """Collapse the middle of very long method chains.
+
+    A sketch loop with dozens of `lineTo`/`threePointArc` calls teaches the
+    model nothing beyond the first few segments, so keep the head and tail of
+    the chain and replace the rest with a short marker comment.
+    """
+    if max_segments <= 0:
+        return code
+
+    lines = []
+    for line in code.split("\n"):
+        segments = _split_chain(line)
+        # segments[0] is the head expression (e.g. "loop0=wp.moveTo(0, 0)")
+        # Only collapse when at least two segments would be omitted
+        if not segments or len(segments) - 1 <= max_segments + 1:
+            lines.append(line)
+            continue
+
+        keep_head = max(1, max_segments // 2)
+        keep_tail = max(1, max_segments - keep_head)
+        calls = segments[1:]
+        omitted = calls[keep_head:len(calls) - keep_tail]
+        omitted_names = sorted({seg[1:seg.find("(")] for seg in omitted if "(" in seg})
+
+        # Wrap the right-hand side in parentheses so the collapsed chain stays
+        # valid Python with the marker comment on its own line
+        indent = line[:len(line) - len(line.lstrip())]
+        head = segments[0].strip()
+        target, expr = "", head
+        eq = head.find("=")
+        if 0 < eq < head.find("(") and head[eq + 1:eq + 2] != "=":
+            target, expr = head[:eq + 1], head[eq + 1:]
+        lines.append(f"{indent}{target}({expr}{''.join(calls[:keep_head])}")
+        lines.append(f"{indent}    # ... {len(omitted)} more {'/'.join(omitted_names)} segments ...")
+        lines.append(f"{indent}    {''.join(calls[len(calls) - keep_tail:])})")
+    return "\n".join(lines)
+
+
+def compact_code(code: str,
+                 float_digits: int = DEFAULT_FLOAT_DIGITS,
+                 max_segments: int = DEFAULT_MAX_CHAIN_SEGMENTS) -> str:
+    """Compact an example snippet for use in a prompt"""
+    compacted = round_floats(code.strip(), float_digits)
+    compacted = collapse_segments(compacted, max_segments)
+    return compacted
+
+
+def format_example(index: int, example: Dict[str, Any], code: str) -> str:
+    """Format a single RAG example the way the code generation prompt expects"""
+    example_prompt = example.get("metadata", {}).get("prompt", "")
+    similarity_score = example.get("score", 0)
+    text = f"\nExample {index} (similarity: {similarity_score:.3f}):\n"
+    text += f"Prompt: {example_prompt}\n"
+    text += f"Code:\n```python\n{code}\n```\n"
+    return text
+
+
+def assemble_examples(examples: List[Dict[str, Any]],
+                      token_budget: int = DEFAULT_EXAMPLES_TOKEN_BUDGET,
+                      max_examples: Optional[int] = DEFAULT_MAX_EXAMPLES,
+                      compact: bool = True) -> Dict[str, Any]:
+    """Build the examples section of the prompt within a token budget.
+
+    Examples are taken in ranking order, at most ``max_examples`` of them
+    (None for no cap); each one is compacted and added only if it still fits
+    the remaining budget, so a single oversized snippet does not crowd out
+    smaller relevant ones.
+
+    Returns a dict with the assembled ``text``, the ``examples`` that were
+    used, and token accounting (``tokens``, ``raw_tokens``, ``budget``).
+    """
+    header = "\n\nHere are some relevant CADQuery examples from our knowledge base:\n"
+    used_tokens = count_tokens(header)
+    raw_tokens = used_tokens
+    parts = [header]
+    selected = []
+
+    for example in examples:
+        if max_examples is not None and len(selected) >= max_examples:
+            break
+        code = example.get("metadata", {}).get("code", "")
+        if not code:
+            continue
+
+        raw_tokens += count_tokens(format_example(len(selected) + 1, example, code))
+        example_code = compact_code(code) if compact else code
+        block = format_example(len(selected) + 1, example, example_code)
+        block_tokens = count_tokens(block)
+
+        if used_tokens + block_tokens > token_budget:
+            print(f"✂️ Skipping example ({block_tokens} tokens) - exceeds remaining budget of {token_budget - used_tokens}")
+            continue
+
+        parts.append(block)
+        used_tokens += block_tokens
+        selected.append(example)
+
+    if not selected:
+        return {"text": "", "examples": [], "tokens": 0, "raw_tokens": raw_tokens, "budget": token_budget}
+
+    print(f"🧮 Prompt examples: {len(selected)} used, {used_tokens} tokens (raw {raw_tokens}, budget {token_budget})")
+    return {
+        "text": "".join(parts),
+        "examples": selected,
+        "tokens": used_tokens,
+        "raw_tokens": raw_tokens,
+        "budget": token_budget,
+    }
@@ -0,0 +1,189 @@
+"""
+Conversation sessions for iterative model edits.
+
+/graph_chat is stateless unless the client sends a ``session_id``. With one,
+the session remembers the last model it produced (its code and parameters
+live in the parametric store under that model_id) and the recent requests.
+A follow-up such as "make it 20 mm taller" or "add a 5 mm hole on top" is
+then routed to the edit node, which asks the LLM for a small change instead
+of a whole new model. The LLM answers with one of:
+
+    {"parameters": {"height": 30}}                          re-run the template
+    {"append": "result = result.faces('>Z').hole(5)"}       ops on the current shape
+    {"code": "..."}                                         full replacement
+
+Appended operations run directly on the kernel shape kept in this worker's
+ShapeCache; on another worker (or after eviction) the combined code runs in
+full instead. Session records are shared by all workers through SQLite.
+"""
+
+import ast
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from .workers import ProcessLocal
+
+SESSIONS_DB_PATH = os.getenv("GENX_SESSIONS_DB", "sessions.db")
+# Sessions idle for longer than this are forgotten
+SESSION_TTL_MINUTES = float(os.getenv("GENX_SESSION_TTL_MINUTES", "120"))
+# Recent requests kept per session as context for edits
+SESSION_HISTORY = int(os.getenv("GENX_SESSION_HISTORY", "5"))
+# Kernel shapes kept in memory per worker for edits on the current shape
+SHAPE_CACHE_SIZE = int(os.getenv("GENX_SHAPE_CACHE_SIZE", "64"))
+# Variables the executor looks in for the final solid, in lookup order
+RESULT_VARIABLES = ("solid", "result", "shape")
+EDIT_KINDS = ("parameters", "append", "code")
+
+
+class SessionStore:
+    """Last model and recent requests per session_id"""
+
+    def __init__(self, db_path: Union[str, Path] = SESSIONS_DB_PATH,
+                 ttl_seconds: float = SESSION_TTL_MINUTES * 60, history: int = SESSION_HISTORY):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.history = history
+        self._lock = threading.Lock()
+        self._local = ProcessLocal(self._connect)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use in each worker, never inherited across fork()
+        return self._local.get()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    model_id TEXT NOT NULL,
+                    history TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_age ON sessions (updated_at)")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM sessions WHERE session_id = ? AND updated_at > ?",
+                                     (session_id, time.time() - self.ttl_seconds)).fetchone()
+        if row is None:
+            return None
+        return {**dict(row), "history": json.loads(row["history"])}
+
+    def save(self, session_id: str, model_id: str, message: str):
+        """Point the session at its newest model and add the request to its history"""
+        now = time.time()
+        with self._transaction():
+            row = self._conn.execute("SELECT history FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            history = (json.loads(row["history"]) if row else []) + [message]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, model_id, history, updated_at) VALUES (?, ?, ?, ?)",
+                (session_id, model_id, json.dumps(history[-self.history:]), now))
+            self._conn.execute("DELETE FROM sessions WHERE updated_at <= ?", (now - self.ttl_seconds,))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class ShapeCache:
+    """LRU of kernel shapes by model_id, local to this worker"""
+
+    def __init__(self, max_entries: int = SHAPE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._shapes: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, model_id: str, shape: Any):
+        with self._lock:
+            self._shapes[model_id] = shape
+            self._shapes.move_to_end(model_id)
+            while len(self._shapes) > self.max_entries:
+                self._shapes.popitem(last=False)
+
+    def get(self, model_id: str) -> Optional[Any]:
+        with self._lock:
+            shape = self._shapes.get(model_id)
+            if shape is None:
+                self.misses += 1
+                return None
+            self._shapes.move_to_end(model_id)
+            self.hits += 1
+            return shape
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"shapes": len(self._shapes), "max_entries": self.max_entries,
+                    "hits": self.hits, "misses": self.misses}
+
+
+def _is_export(statement: ast.stmt) -> bool:
+    if not (isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Call)):
+        return False
+    func = statement.value.func
+    return isinstance(func, ast.Attribute) and func.attr == "export"
+
+
+def strip_exports(code: str) -> str:
+    """Drop top-level exporter calls so operations can be appended before the executor exports"""
+    tree = ast.parse(code)
+    tree.body = [statement for statement in tree.body if not _is_export(statement)]
+    return ast.unparse(tree)
+
+
+def result_variable(code: str) -> str:
+    """Variable the executor will take the final solid from"""
+    assigned = set()
+    for statement in ast.parse(code).body:
+        targets = getattr(statement, "targets", None) or [getattr(statement, "target", None)]
+        for target in targets:
+            if isinstance(target, ast.Name):
+                assigned.add(target.id)
+    return next((name for name in RESULT_VARIABLES if name in assigned), "result")
+
+
+def parse_edit(text: str) -> Tuple[str, Any]:
+    """Parse the LLM's edit answer into (kind, payload); raises ValueError if it is not one"""
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("Edit response is not a JSON object")
+    try:
+        edit = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Edit response is not valid JSON: {e}")
+    kinds = [kind for kind in EDIT_KINDS if kind in edit]
+    if len(kinds) != 1:
+        raise ValueError(f"Edit response must have exactly one of {', '.join(EDIT_KINDS)}")
+    kind, payload = kinds[0], edit[kinds[0]]
+    if kind == "parameters" and not (isinstance(payload, dict) and payload):
+        raise ValueError("'parameters' must be a non-empty object")
+    if kind in ("append", "code") and not (isinstance(payload, str) and payload.strip()):
+        raise ValueError(f"'{kind}' must be non-empty Python code")
+    return kind, payload
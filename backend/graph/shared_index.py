@@ -0,0 +1,131 @@
+"""
+Read-only RAG index storage that can be shared between worker processes.
+
+Each uvicorn/gunicorn worker used to hold its own copy of the FAISS index and
+of the pickled (prompt, code) DataFrame. Here the FAISS index is memory-mapped
+read-only and the records are converted once into a flat file that is also
+memory-mapped, so every worker on the host reads the same page-cache pages
+instead of a private copy.
+
+Record file layout (little endian):
+    8 bytes  magic b"GENXREC1"
+    8 bytes  record count N
+    (N + 1) * 8 bytes  offsets into the data section
+    data section: one UTF-8 JSON object {"prompt", "code"} per record
+"""
+
+import fcntl
+import json
+import mmap
+import os
+import pickle
+import struct
+from pathlib import Path
+from typing import Dict, Iterator, Union
+
+RECORDS_MAGIC = b"GENXREC1"
+_HEADER = struct.Struct("<8sQ")
+_OFFSET = struct.Struct("<Q")
+
+
+def load_faiss_index(path: Union[str, Path]):
+    """Load a FAISS index memory-mapped and read-only, falling back to a normal read"""
+    import faiss
+    try:
+        return faiss.read_index(str(path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except Exception as e:
+        print(f"⚠️ FAISS mmap load failed ({e}), reading index into memory")
+        return faiss.read_index(str(path))
+
+
+def write_records(records, path: Union[str, Path]):
+    """Write (prompt, code) records to the flat record file format"""
+    blobs = [json.dumps({"prompt": str(prompt), "code": str(code)}, ensure_ascii=False).encode("utf-8")
+             for prompt, code in records]
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(RECORDS_MAGIC, len(blobs)))
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        for blob in blobs:
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _records_from_pickle(pickle_path: Path):
+    with open(pickle_path, "rb") as f:
+        data = pickle.load(f)
+    if hasattr(data, "to_dict"):
+        data = data.to_dict("records")
+    return [(row.get("prompt", ""), row.get("code", "")) for row in data]
+
+
+def ensure_records_file(pickle_path: Union[str, Path], records_path: Union[str, Path, None] = None) -> Path:
+    """Build the record file from the pickled DataFrame if missing or stale.
+
+    Workers starting at the same time serialise on a lock file; the first one
+    converts the pickle and atomically renames the result into place, the
+    others find it up to date.
+    """
+    pickle_path = Path(pickle_path)
+    records_path = Path(records_path) if records_path else pickle_path.with_suffix(".records")
+
+    def up_to_date():
+        return records_path.exists() and records_path.stat().st_mtime >= pickle_path.stat().st_mtime
+
+    if up_to_date():
+        return records_path
+
+    lock_path = records_path.with_suffix(records_path.suffix + ".lock")
+    with open(lock_path, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if not up_to_date():
+                print(f"📦 Building shared record file {records_path.name} from {pickle_path.name}")
+                tmp_path = records_path.with_suffix(f".tmp{os.getpid()}")
+                write_records(_records_from_pickle(pickle_path), tmp_path)
+                os.replace(tmp_path, records_path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    return records_path
+
+
+class SharedRecords:
+    """Memory-mapped, read-only sequence of {"prompt", "code"} records"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != RECORDS_MAGIC:
+            raise ValueError(f"{self.path} is not a record file")
+        self._offsets_start = _HEADER.size
+        self._data_start = self._offsets_start + (self._count + 1) * _OFFSET.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Dict[str, str]:
+        index = int(index)
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        start, end = struct.unpack_from("<2Q", self._mmap, self._offsets_start + index * _OFFSET.size)
+        return json.loads(self._mmap[self._data_start + start:self._data_start + end].decode("utf-8"))
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for index in range(self._count):
+            yield self[index]
+
+    def close(self):
+        self._mmap.close()
+
+
+def load_shared_records(pickle_path: Union[str, Path]) -> SharedRecords:
+    """Open the memory-mapped records for a vector_data.pkl, building them on first use"""
+    return SharedRecords(ensure_records_file(pickle_path))
@@ -0,0 +1,53 @@
+"""
+Single-flight coalescing of identical in-flight requests.
+
+When several callers ask for the same thing at the same time (everyone typing
+the demo starter prompt), only the first one does the work; the others wait on
+the same in-flight computation and share its result.
+"""
+
+import asyncio
+import re
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Normalize a user message for coalescing (case, whitespace, trailing punctuation)"""
+    normalized = _WHITESPACE_RE.sub(" ", (message or "").strip().lower())
+    return normalized.rstrip(" .!?")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one computation"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {"leaders": 0, "shared": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run fn once per key among concurrent callers.
+
+        Returns ``(result, shared)`` where ``shared`` is True when the result
+        came from another caller's in-flight computation. Exceptions are
+        propagated to every waiter.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["shared"] += 1
+            print(f"🔗 [{self.name}] Joining in-flight request: {key}")
+            return await asyncio.shield(task), True
+
+        # Run as a task so a disconnecting leader does not cancel the work
+        # the other waiters are sharing
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        self.stats["leaders"] += 1
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task), False
+
+    def in_flight(self) -> int:
+        """Number of computations currently in flight"""
+        return len(self._inflight)
@@ -0,0 +1,254 @@
+"""
+Request-scoped tracing spans for the graph pipeline.
+
+Each HTTP request opens a root span (see the middleware in main.py) and the
+pipeline opens child spans around its stages: graph nodes, retrieval per
+backend, prompt assembly, LLM calls, code cleaning, CadQuery execution and
+export. The current span lives in a ContextVar, so the tree follows asyncio
+tasks and asyncio.to_thread without passing anything around; outside a
+request span() is a no-op.
+
+Finished spans are appended to a local JSONL file (GENX_TRACE_PATH, one span
+per line, rotated at GENX_TRACE_MAX_MB) and summarised per span name in the
+response's Server-Timing header, so browser dev tools show whether a slow
+request spent its time in Pinecone, the LLM or OpenCascade.
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+TRACING_ENABLED = os.getenv("GENX_TRACING", "true").lower() != "false"
+TRACE_PATH = os.getenv("GENX_TRACE_PATH", "traces/spans.jsonl")
+TRACE_MAX_BYTES = int(float(os.getenv("GENX_TRACE_MAX_MB", "100")) * 2**20)
+# Requests under these path prefixes are not traced (scrapes, probes, assets)
+TRACE_EXCLUDE_PATHS = tuple(path for path in os.getenv("GENX_TRACE_EXCLUDE_PATHS", "/metrics,/health,/static").split(",")
+                            if path)
+
+
+class Trace:
+    """Spans of one request, exported together when the root span ends"""
+
+    def __init__(self, exporter: Optional["JsonlSpanExporter"]):
+        self.trace_id = uuid.uuid4().hex
+        self.exporter = exporter
+        self.spans: List["Span"] = []
+        self.root: Optional["Span"] = None
+        self.exported = False
+        self._lock = threading.Lock()
+
+    def finish(self, span: "Span"):
+        with self._lock:
+            self.spans.append(span)
+            # Background work that outlives the request is exported as it ends
+            late = self.exported
+            if span.parent_id is None:
+                self.exported = True
+            if late:
+                batch = [span]
+            else:
+                batch = list(self.spans) if span.parent_id is None else []
+        if batch and self.exporter is not None:
+            self.exporter.export(batch)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: total duration per span name"""
+        totals: Dict[str, List[float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            if span.parent_id is not None:
+                entry = totals.setdefault(span.name, [0.0, 0])
+                entry[0] += span.duration
+                entry[1] += 1
+        parts = []
+        for name, (duration, count) in totals.items():
+            part = f"{name};dur={duration * 1000:.1f}"
+            if count > 1:
+                part += f';desc="{count} calls"'
+            parts.append(part)
+        root = next((span for span in spans if span.parent_id is None), self.root)
+        if root is not None:
+            parts.append(f"total;dur={root.elapsed * 1000:.1f}")
+        return ", ".join(parts)
+
+
+class Span:
+    def __init__(self, trace: Trace, name: str, parent: Optional["Span"] = None, **attributes):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes: Dict[str, Any] = dict(attributes)
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        """Duration so far (the header is written before the root span ends)"""
+        return self.duration if self.duration is not None else time.perf_counter() - self._start
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._start
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+        self.trace.finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+            "pid": os.getpid(),
+        }
+
+
+class _NoopSpan:
+    """Returned outside a traced request so call sites need no checks"""
+    trace = None
+
+    def set(self, **attributes):
+        pass
+
+    def end(self, error: Optional[BaseException] = None):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonlSpanExporter:
+    """Appends finished spans to a JSONL file, one line per span"""
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = TRACE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                for attempt in range(3):
+                    with open(self.path, "a") as f:
+                        # Several workers may append to the same file
+                        fcntl.flock(f, fcntl.LOCK_EX)
+                        if attempt < 2 and not self._is_current(f):
+                            # Another worker rotated it while we waited for the lock
+                            continue
+                        if attempt < 2 and self.max_bytes and 0 < f.tell() and f.tell() + len(lines) > self.max_bytes:
+                            # Keep one rotated file and append to a new one
+                            self.path.replace(self.path.with_name(self.path.name + ".1"))
+                            continue
+                        f.write(lines)
+                        f.flush()
+                        fcntl.flock(f, fcntl.LOCK_UN)
+                        return
+        except Exception as e:
+            print(f"⚠️ Failed to export trace spans: {e}")
+
+    def _is_current(self, f) -> bool:
+        try:
+            return os.fstat(f.fileno()).st_ino == os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("genx_current_span", default=None)
+default_exporter = JsonlSpanExporter(TRACE_PATH) if TRACE_PATH else None
+
+
+def is_traced_path(path: str) -> bool:
+    return TRACING_ENABLED and not path.startswith(TRACE_EXCLUDE_PATHS)
+
+
+def current_span() -> Union[Span, _NoopSpan]:
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def start_trace(name: str, exporter: Optional[JsonlSpanExporter] = None, **attributes) -> Iterator[Union[Span, _NoopSpan]]:
+    """Open the root span of a request"""
+    if not TRACING_ENABLED:
+        yield NOOP_SPAN
+        return
+    root = Span(Trace(exporter or default_exporter), name, **attributes)
+    root.trace.root = root
+    with _activate(root):
+        yield root
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Union[Span, _NoopSpan]]:
+    """Open a child span of the current span (no-op outside a trace)"""
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    with _activate(Span(parent.trace, name, parent, **attributes)) as child:
+        yield child
+
+
+def start_span(name: str, **attributes) -> Union[Span, _NoopSpan]:
+    """Start a leaf span without making it current; call .end() when done"""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.trace, name, parent, **attributes)
+
+
+@contextmanager
+def _activate(new_span: Span) -> Iterator[Span]:
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException as e:
+        new_span.end(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        new_span.end()
+
+
+def traced(name: str, node):
+    """Wrap an async graph node in a span"""
+    async def wrapper(state):
+        with span(name):
+            return await node(state)
+    return wrapper
+
+
+async def trace_http_request(request, call_next):
+    """HTTP middleware: root span per request plus Server-Timing / X-Trace-Id headers"""
+    if not is_traced_path(request.url.path):
+        return await call_next(request)
+    with start_trace("request", method=request.method, path=request.url.path) as root:
+        response = await call_next(request)
+        root.set(status_code=response.status_code)
+        if root.trace is not None:
+            response.headers["Server-Timing"] = root.trace.server_timing()
+            response.headers["X-Trace-Id"] = root.trace.trace_id
+        return response
@@ -0,0 +1,153 @@
+"""
+Helpers for running the API under several uvicorn/gunicorn worker processes.
+
+- LeaderLock: a non-blocking file lock so host-wide background work (such as
+  temp model cleanup) runs in exactly one worker; when the leader exits, the
+  kernel releases the lock and another worker takes over.
+- ProcessLocal: a value built on first use in each process, for state that
+  must not be inherited from the gunicorn master under --preload (SQLite
+  connections).
+- memory_usage(): per-worker RSS/PSS/USS so shared index pages can be told
+  apart from private memory.
+"""
+
+import fcntl
+import os
+import resource
+import socket
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Generic, List, Optional, TypeVar, Union
+
+from . import metrics
+
+LEADER_LOCK_PATH = os.getenv("GENX_LEADER_LOCK", "genx_leader.lock")
+
+T = TypeVar("T")
+
+
+def worker_id(pid: Optional[int] = None) -> str:
+    """Identify a worker process as hostname:pid"""
+    return f"{socket.gethostname()}:{pid or os.getpid()}"
+
+
+def worker_alive(owner: Optional[str]) -> bool:
+    """Whether the worker identified by hostname:pid is still running.
+
+    Workers on other hosts are assumed alive; they share the job store only
+    through a network filesystem, which SQLite does not support anyway.
+    """
+    if not owner:
+        return False
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ProcessLocal(Generic[T]):
+    """A value created lazily, once per process.
+
+    Objects built while the app is imported in the gunicorn master are copied
+    into every forked worker; get() builds a fresh value when called from a
+    process other than the one that built the current one.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._value: Optional[T] = None
+        # Values inherited from the parent are kept referenced, never closed
+        # here: closing a parent's SQLite connection in the child can
+        # checkpoint or remove the WAL the parent is still using
+        self._inherited: List[T] = []
+
+    def get(self) -> T:
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    if self._pid is not None:
+                        self._inherited.append(self._value)
+                    self._value = self._factory()
+                    self._pid = pid
+        return self._value
+
+
+class LeaderLock:
+    """Non-blocking exclusive file lock electing one leader among workers"""
+
+    def __init__(self, path: Union[str, Path] = LEADER_LOCK_PATH):
+        self.path = Path(path)
+        self._file = None
+        self._pid = None
+
+    @property
+    def held(self) -> bool:
+        # A lock inherited across fork() belongs to the parent, not to us
+        return self._file is not None and self._pid == os.getpid()
+
+    def acquire(self) -> bool:
+        """Try to become leader; returns True if this process holds the lock"""
+        if self.held:
+            return True
+        self._file = None
+        lock_file = open(self.path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(worker_id())
+        lock_file.flush()
+        self._file = lock_file
+        self._pid = os.getpid()
+        print(f"👑 Worker {worker_id()} is now leader ({self.path.name})")
+        return True
+
+    def release(self):
+        if self.held:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+        self._file = None
+        self._pid = None
+
+
+def memory_usage() -> Dict[str, int]:
+    """Memory use of this worker in bytes.
+
+    rss counts shared pages (mmapped index, preloaded model weights) in every
+    worker; pss splits them between the workers sharing them and uss is memory
+    private to this worker, so sum(pss) is the real host footprint.
+    """
+    usage: Dict[str, int] = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[-1] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+        usage["rss"] = fields.get("Rss", 0)
+        usage["pss"] = fields.get("Pss", 0)
+        usage["shared"] = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+        usage["uss"] = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    except OSError:
+        # No /proc (macOS); ru_maxrss is the peak, in bytes on macOS and KiB on Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage["rss"] = peak if sys.platform == "darwin" else peak * 1024
+    return usage
+
+
+for _kind in ("rss", "pss", "uss", "shared"):
+    metrics.PROCESS_MEMORY.set_function(lambda kind=_kind: memory_usage()[kind], kind=_kind)
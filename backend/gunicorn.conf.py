@@ -0,0 +1,37 @@
+"""
+Gunicorn configuration for multi-worker serving.
+
+    gunicorn backend.main:app -c backend/gunicorn.conf.py
+
+The app is preloaded in the master before forking, and the master warms up
+the lazily imported subsystems (see when_ready), so CadQuery, the
+SentenceTransformer weights, the memory-mapped FAISS index and the RAG records
+are loaded once and shared copy-on-write by every worker. The temp models
+cleanup thread is started per worker on FastAPI startup and only the leader
+(file lock) does the work. SQLite stores open their connections on first use
+in each worker, and jobs are owned by the worker's own pid, so nothing
+process-specific is inherited from the master.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GENX_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# Code generation requests can run several LLM round trips
+timeout = int(os.getenv("GENX_WORKER_TIMEOUT", "300"))
+graceful_timeout = 30
+
+# Threads started while importing the app in the master would not survive
+# fork(); let each worker start the cleanup service from its startup event
+os.environ.setdefault("GENX_CLEANUP_AUTOSTART", "false")
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported and before any
+    # worker is forked; langgraph_app defers its heavy imports until first use
+    if os.getenv("GENX_WARMUP", "true").lower() != "false":
+        from graph.langgraph_app import warmup
+        warmup()
@@ -1,12 +1,18 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import Body
+from fastapi import Body, Query
 import os
-from typing import List
+import json
+from typing import List, Optional
+from datetime import datetime
+from urllib.parse import urlencode
+import asyncio
 import atexit
+import threading
+import uuid
 
 # Load environment variables from .env file
 try:
@@ -21,10 +27,15 @@ except ImportError:
 # from cadquery import exporters
 
 # LLM imports
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 # from langgraph_app import run_graph, cad_generator
-from graph.langgraph_app import run_graph, cad_generator
+from graph.langgraph_app import run_graph, cad_generator, job_manager, llm_providers, session_store, warmup
+from graph import metrics
+from graph import tracing
+from graph.bulkheads import BulkheadFull, guarded, route_bulkheads
+from graph.workers import memory_usage, worker_id
+from graph.downloads import model_file_response, REVALIDATE_CACHE_CONTROL
+from graph.model_listing import ModelListingIndex, MODEL_LIST_MAX_LIMIT
 
 
 app = FastAPI()
@@ -50,6 +61,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Root tracing span per request; the span tree goes to the JSONL trace file
+# and a per-stage summary to the Server-Timing header (see graph/tracing.py)
+app.middleware("http")(tracing.trace_http_request)
+
 # Setup directories
 STATIC_DIR = "static"
 TEMPLATES_DIR = "templates"
@@ -150,17 +165,19 @@ if os.path.exists(DOCS_DIR):
 
 # Serve STEP model
 @app.get("/model.step", response_class=FileResponse)
-def get_step():
-    return FileResponse(path=step_path, media_type='application/step', filename="model.step")
+def get_step(request: Request):
+    return model_file_response(request, step_path, 'application/step', filename="model.step",
+                               cache_control=REVALIDATE_CACHE_CONTROL)
 
 # ✅ Serve STL model with CORS working
 @app.get("/model.stl", response_class=FileResponse)
-def get_stl():
-    return FileResponse(path=stl_path, media_type='application/sla', filename="model.stl")
+def get_stl(request: Request):
+    return model_file_response(request, stl_path, 'application/sla', filename="model.stl",
+                               cache_control=REVALIDATE_CACHE_CONTROL)
 
 # Serve temporary model files
 @app.get("/temp_models/{filename}")
-def get_temp_model(filename: str):
+def get_temp_model(filename: str, request: Request):
     temp_models_dir = "temp_models"
     file_path = os.path.join(temp_models_dir, filename)
     
@@ -176,11 +193,11 @@ def get_temp_model(filename: str):
     }
     content_type = content_type_map.get(ext, 'application/octet-stream')
     
-    return FileResponse(
-        path=file_path, 
-        media_type=content_type, 
-        filename=filename
-    )
+    # Recently downloaded models are evicted last when the disk quota is hit
+    cad_generator.cleanup_service.touch_file(filename)
+    
+    # Compressed sidecars, strong ETag, conditional GET and byte ranges
+    return model_file_response(request, file_path, content_type, filename=filename)
 
 # Mount temp_models directory for static file serving
 TEMP_MODELS_DIR = "temp_models"
@@ -192,6 +209,8 @@ from pydantic import BaseModel
 
 class ChatRequest(BaseModel):
     message: str
+    # Send back the session_id from the previous response to edit its model
+    session_id: Optional[str] = None
 
 @app.post("/chat")
 async def chat_endpoint(body: ChatRequest):
@@ -206,6 +225,7 @@ async def chat_endpoint(body: ChatRequest):
     #     streaming=False
     # )
 
+    from langchain_openai import ChatOpenAI
     llm = ChatOpenAI(
         base_url="https://api.groq.com/openai/v1",  # Groq uses OpenAI-compatible API
         api_key=os.getenv("GROQ_API_KEY"),          # Store key in .env for security
@@ -224,48 +244,179 @@ async def chat_endpoint(body: ChatRequest):
 #     result = await run_graph({"message": body.message})
 #     return result
 
+# Map route to agent name
+AGENT_MAP = {
+    "help": "HelpBot",
+    "generate": "GenBot",
+    "create_cad": "CADBot",
+    "code_gen": "GenBot",  # code_gen also creates models, so map to GenBot
+    "edit": "GenBot",
+    "primitive": "CADBot"  # deterministic primitives are built without the LLM
+}
+
 # Endpoint to trigger the graph
 @app.post("/graph_chat")
 async def graph_chat_endpoint(body: ChatRequest):
+    session_id = body.session_id or str(uuid.uuid4())
     try:
-        result = await run_graph({"message": body.message})
-        # Map route to agent name
+        result = await run_graph({"message": body.message, "session_id": session_id})
         route = result.get("route") or result.get("next")
-        agent_map = {
-            "help": "HelpBot",
-            "generate": "GenBot",
-            "create_cad": "CADBot",
-            "code_gen": "GenBot"  # code_gen also creates models, so map to GenBot
-        }
-        agent = agent_map.get(route, route)
+        agent = AGENT_MAP.get(route, route)
         return {
             "success": True,
             "intent": result.get("next"),
             "response": result.get("result"),
             "agent": agent,
+            "session_id": session_id,
         }
+    except BulkheadFull as e:
+        # The route's slots and wait queue are full; tell the client when to come back
+        return JSONResponse({"success": False, "error": str(e), "retry_after": e.retry_after},
+                            status_code=429, headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         return {
             "success": False,
             "error": str(e),
         }
 
+# === Background job endpoints ===
+# POST returns a job ID right away; poll GET /jobs/{id} or subscribe to
+# GET /jobs/{id}/events (Server-Sent Events) for completion.
+def _job_response(job: dict) -> dict:
+    response = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "message": job["message"],
+        "agent": AGENT_MAP.get(job["route"], job["route"]),
+        "session_id": job["session_id"],
+        "checkpoints": job["checkpoints"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+    if job["status"] == "succeeded":
+        response["response"] = json.loads(job["result"]) if job["result"] else None
+    if job["status"] == "failed":
+        response["error"] = job["error"]
+    return response
+
+@app.post("/jobs", status_code=202)
+async def create_job(body: ChatRequest):
+    """Submit a graph_chat request as a background job"""
+    session_id = body.session_id or str(uuid.uuid4())
+    job_id = job_manager.submit(body.message, session_id=session_id)
+    return {"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}", "events_url": f"/jobs/{job_id}/events",
+            "session_id": session_id}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get job status (and result once finished)"""
+    job = job_manager.store.get_job(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return _job_response(job)
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Stream job progress as Server-Sent Events until the job finishes"""
+    if job_manager.store.get_job(job_id) is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+
+    async def event_stream():
+        async for event in job_manager.subscribe(job_id):
+            yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        yield f"event: result\ndata: {json.dumps(_job_response(job_manager.store.get_job(job_id)))}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+# === Parametric model edits ===
+# Generated code is kept as a template with its numeric literals as named
+# parameters; changing them re-runs the template without the LLM.
+class ParametersRequest(BaseModel):
+    parameters: dict
+    # Moves this chat session on to the new model
+    session_id: Optional[str] = None
+
+@app.get("/models/{model_id}/parameters")
+def get_model_parameters(model_id: str):
+    """Named parameters of a generated model"""
+    parameters = cad_generator.get_parameters(model_id)
+    if parameters is None:
+        return JSONResponse({"error": "Model not found or not parametric"}, status_code=404)
+    return {"model_id": model_id, "parameters": parameters}
+
+@app.post("/models/{model_id}/parameters")
+async def update_model_parameters(model_id: str, body: ParametersRequest):
+    """Re-execute a generated model with some parameters changed; returns a new model"""
+    async def reexecute(_):
+        # The kernel run blocks, so it goes to a thread
+        return await asyncio.to_thread(cad_generator.reexecute, model_id, body.parameters)
+
+    try:
+        response = await guarded("parametric", reexecute)(None)
+        if body.session_id:
+            changes = ", ".join(f"{name}={value}" for name, value in body.parameters.items())
+            session_store.save(body.session_id, response["model_id"], f"Set {changes}")
+        return {"success": True, "response": response}
+    except BulkheadFull as e:
+        return JSONResponse({"success": False, "error": str(e), "retry_after": e.retry_after},
+                            status_code=429, headers={"Retry-After": str(e.retry_after)})
+    except KeyError:
+        return JSONResponse({"success": False, "error": "Model not found or not parametric"}, status_code=404)
+    except ValueError as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=422)
+
+# Index of static/generated_models, rescanned only when the directory changes
+generated_models_index = ModelListingIndex(os.path.join("static", "generated_models"), "/static/generated_models")
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds or an ISO 8601 timestamp"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
 # Endpoint to list generated models in static/generated_models
 @app.get("/list_generated_models")
-def list_generated_models():
-    models_dir = os.path.join("static", "generated_models")
-    allowed_ext = {".step", ".stl", ".glb"}
-    if not os.path.exists(models_dir):
-        return JSONResponse([])
-    files = []
-    for fname in os.listdir(models_dir):
-        ext = os.path.splitext(fname)[1].lower()
-        if ext in allowed_ext:
-            files.append({
-                "name": fname,
-                "url": f"/static/generated_models/{fname}"
-            })
-    return JSONResponse(files)
+def list_generated_models(request: Request, limit: Optional[int] = None, cursor: Optional[str] = None,
+                          formats: Optional[str] = Query(None, alias="format"),
+                          since: Optional[str] = None, until: Optional[str] = None):
+    """List generated models, newest first.
+
+    The body stays a JSON array of {name, url, format, size, modified, geometry}.
+    Pass ``limit`` to paginate: the next page's cursor is returned in the
+    X-Next-Cursor and Link headers. ``format`` takes a comma-separated list
+    (e.g. ``step,stl``); ``since``/``until`` take epoch seconds or ISO 8601.
+    """
+    try:
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be at least 1")
+        page = generated_models_index.query(
+            limit=min(limit, MODEL_LIST_MAX_LIMIT) if limit is not None else None,
+            cursor=cursor,
+            formats=[fmt for fmt in formats.split(",") if fmt] if formats else None,
+            since=_parse_time(since),
+            until=_parse_time(until))
+    except (ValueError, TypeError) as e:
+        return JSONResponse({"error": f"Invalid listing parameters: {str(e)}"}, status_code=400)
+
+    headers = {
+        "ETag": page["etag"],
+        "Cache-Control": "no-cache",
+        "X-Total-Count": str(page["total"]),
+    }
+    if page["next_cursor"]:
+        params = {key: value for key, value in request.query_params.items() if key != "cursor"}
+        params["cursor"] = page["next_cursor"]
+        headers["X-Next-Cursor"] = page["next_cursor"]
+        headers["Link"] = f'<{request.url.path}?{urlencode(params)}>; rel="next"'
+    # The model browser polls this endpoint; unchanged pages cost a 304
+    if request.headers.get("if-none-match") == page["etag"]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(page["items"], headers=headers)
 
 # API information endpoint
 @app.get("/api/info")
@@ -284,7 +435,27 @@ async def api_info():
             "graph_chat": {
                 "url": "/graph_chat", 
                 "method": "POST",
-                "description": "Advanced chat with intelligent routing and CAD generation"
+                "description": "Advanced chat with intelligent routing and CAD generation (pass session_id to edit the last model)"
+            },
+            "jobs": {
+                "url": "/jobs",
+                "method": "POST",
+                "description": "Submit graph_chat as a background job (poll /jobs/{job_id} or stream /jobs/{job_id}/events)"
+            },
+            "model_parameters": {
+                "url": "/models/{model_id}/parameters",
+                "method": "GET, POST",
+                "description": "Named parameters of a generated model; POST {parameters} re-executes it without the LLM"
+            },
+            "metrics": {
+                "url": "/metrics",
+                "method": "GET",
+                "description": "Prometheus metrics (node latency, LLM tokens, retrieval, cache hits, execution)"
+            },
+            "worker_memory": {
+                "url": "/worker/memory",
+                "method": "GET",
+                "description": "Memory use of the worker serving the request (RSS, PSS, USS, shared)"
             },
             "health": {
                 "url": "/health",
@@ -294,7 +465,7 @@ async def api_info():
             "models": {
                 "url": "/list_generated_models",
                 "method": "GET",
-                "description": "List generated CAD models"
+                "description": "List generated CAD models (newest first; limit/cursor pagination, format and since/until filters)"
             },
             "cleanup_stats": {
                 "url": "/cleanup/stats",
@@ -346,6 +517,47 @@ async def health_check():
         }
     }
 
+# Prometheus metrics (text exposition format)
+@app.get("/metrics")
+def get_metrics():
+    """Per-node latency, LLM token, retrieval, cache and execution metrics"""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+# LLM provider pool statistics (rolling latency, error rate, hedges)
+@app.get("/llm/providers")
+async def get_llm_provider_stats():
+    """Get per-provider LLM latency and error statistics"""
+    return {
+        "status": "success",
+        "providers": {provider.name: provider.stats.snapshot() for provider in llm_providers}
+    }
+
+@app.get("/bulkheads")
+async def get_bulkhead_stats():
+    """Get per-route concurrency, queue depth and rejections of this worker"""
+    return {
+        "status": "success",
+        "worker": worker_id(),
+        "routes": {route: bulkhead.snapshot() for route, bulkhead in route_bulkheads.items()}
+    }
+
+# Per-worker memory report (each request is answered by one worker)
+@app.get("/worker/memory")
+def get_worker_memory():
+    """Get memory use of this worker process"""
+    try:
+        return {
+            "status": "success",
+            "worker": worker_id(),
+            "cleanup_leader": cad_generator.cleanup_service.leader_lock.held,
+            "memory_bytes": memory_usage()
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to get worker memory: {str(e)}"
+        }
+
 # Cleanup endpoints
 @app.get("/cleanup/stats")
 async def get_cleanup_stats():
@@ -395,12 +607,21 @@ async def startup_event():
     """Handle FastAPI startup event"""
     try:
         if hasattr(cad_generator, 'cleanup_service'):
-            # Ensure cleanup service is running
-            if not cad_generator.cleanup_service.running:
-                cad_generator.cleanup_service.start_cleanup_service()
+            # Ensure cleanup service is running in this worker (a no-op if it already is)
+            cad_generator.cleanup_service.start_cleanup_service()
             print("✅ Cleanup service started on FastAPI startup")
     except Exception as e:
         print(f"⚠️ Error starting cleanup service on startup: {e}")
+    if os.getenv("GENX_WARMUP", "true").lower() != "false":
+        # Load models in the background so the server answers /health right
+        # away; a no-op when gunicorn already warmed up the preloaded app
+        threading.Thread(target=warmup, name="genx-warmup", daemon=True).start()
+    try:
+        resumed = await job_manager.resume_pending()
+        if resumed:
+            print(f"♻️ Resumed {len(resumed)} unfinished jobs")
+    except Exception as e:
+        print(f"⚠️ Error resuming jobs on startup: {e}")
 
 # Register shutdown event handler for FastAPI
 @app.on_event("shutdown")
@@ -411,4 +632,9 @@ async def shutdown_event():
             cad_generator.cleanup_service.stop_cleanup_service()
             print("🛑 Cleanup service stopped on FastAPI shutdown")
     except Exception as e:
-        print(f"⚠️ Error stopping cleanup service on shutdown: {e}")
\ No newline at end of file
+        print(f"⚠️ Error stopping cleanup service on shutdown: {e}")
+    try:
+        # Running jobs stay pending in the job store and resume on next startup
+        await job_manager.shutdown()
+    except Exception as e:
+        print(f"⚠️ Error stopping jobs on shutdown: {e}")
\ No newline at end of file
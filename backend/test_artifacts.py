@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent temp model artifact index
+(expiry queue, LRU eviction at a byte quota, incremental stats)
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(__file__))
+
+from graph.artifacts import ArtifactIndex
+
+
+def make_index(quota_bytes: int = 10_000, max_age_seconds: float = 60):
+    tmp = Path(tempfile.mkdtemp())
+    models = tmp / "temp_models"
+    models.mkdir()
+    return ArtifactIndex(models, db_path=tmp / "artifacts.db", max_age_seconds=max_age_seconds,
+                         quota_bytes=quota_bytes)
+
+
+def write(index: ArtifactIndex, name: str, size: int) -> Path:
+    path = index.directory / name
+    path.write_bytes(b"x" * size)
+    return path
+
+
+def test_stats_track_all_formats():
+    """Totals per format are updated on register and removal"""
+    print("🧪 Testing incremental stats...")
+    index = make_index()
+    index.register(write(index, "model_a.step", 100))
+    index.register(write(index, "model_a.stl", 50))
+    index.register(write(index, "model_b.glb", 25))
+    # Re-registering a rewritten file replaces its size instead of double counting
+    index.register(write(index, "model_a.step", 120))
+
+    stats = index.stats()
+    print(f"📊 Stats: {stats}")
+    assert stats["files"] == 3
+    assert stats["bytes"] == 195
+    assert stats["by_format"]["step"] == {"files": 1, "bytes": 120}
+    assert stats["by_format"]["glb"] == {"files": 1, "bytes": 25}
+    print("✅ Incremental stats test completed")
+
+
+def test_expiry_queue():
+    """Only artifacts whose expiry has passed are removed, earliest first"""
+    print("🧪 Testing expiry queue...")
+    index = make_index(max_age_seconds=60)
+    write(index, "old.step.gz", 4)  # compressed download sidecar
+    index.register(write(index, "old.step", 10), ttl_seconds=-1)
+    index.register(write(index, "new.step", 10))
+    assert index.next_expiry() < time.time()
+    assert index.total_bytes() == 24
+
+    assert index.expire() == ["old.step"]
+    assert not (index.directory / "old.step").exists()
+    assert not (index.directory / "old.step.gz").exists()
+    assert (index.directory / "new.step").exists()
+    assert index.next_expiry() > time.time() + 50
+    assert index.stats()["files"] == 1
+    print("✅ Expiry queue test completed")
+
+
+def test_lru_eviction_at_quota():
+    """Going over the quota evicts least recently accessed artifacts immediately"""
+    print("🧪 Testing LRU eviction...")
+    index = make_index(quota_bytes=250)
+    index.register(write(index, "a.step", 100))
+    time.sleep(0.01)
+    index.register(write(index, "b.step", 100))
+    time.sleep(0.01)
+    index.touch("a.step")  # a was downloaded more recently than b
+
+    evicted = index.register(write(index, "c.step", 100))
+    print(f"🗑️ Evicted: {evicted}")
+    assert evicted == ["b.step"]
+    assert sorted(path.name for path in index.directory.iterdir()) == ["a.step", "c.step"]
+    assert index.total_bytes() == 200
+    print("✅ LRU eviction test completed")
+
+
+def test_index_survives_restart():
+    """A new index over the same database keeps expiry; reconcile adopts and drops files"""
+    print("🧪 Testing restart and reconcile...")
+    index = make_index()
+    index.register(write(index, "tracked.step", 10))
+    untracked = index.directory / "untracked.stl"
+    untracked.write_bytes(b"y" * 20)
+    write(index, "gone.step", 5)
+    index.register(index.directory / "gone.step")
+    (index.directory / "gone.step").unlink()
+
+    reopened = ArtifactIndex(index.directory, db_path=index.db_path, quota_bytes=index.quota_bytes)
+    assert reopened.stats()["files"] == 2
+    result = reopened.reconcile()
+    assert result == {"adopted": 1, "missing": 1}
+    assert reopened.stats()["by_format"] == {"step": {"files": 1, "bytes": 10}, "stl": {"files": 1, "bytes": 20}}
+
+    # Another directory sharing the database is unaffected
+    other_dir = index.db_path.parent / "other"
+    other_dir.mkdir()
+    other = ArtifactIndex(other_dir, db_path=index.db_path)
+    assert other.reconcile() == {"adopted": 0, "missing": 0}
+    assert reopened.stats()["files"] == 2
+    print("✅ Restart and reconcile test completed")
+
+
+def main():
+    """Main function for running artifact index tests"""
+    print("🚀 Starting artifact index tests...")
+    test_stats_track_all_formats()
+    test_expiry_queue()
+    test_lru_eviction_at_quota()
+    test_index_survives_restart()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
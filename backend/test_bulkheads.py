@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for per-route bulkheads (bounded concurrency and wait queues)
+"""
+
+import asyncio
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from graph.bulkheads import Bulkhead, BulkheadFull, build_bulkheads, guarded, parse_bulkheads
+
+
+def test_limits_queue_and_rejection():
+    """Slots are capped, waiters are admitted FIFO and a full queue is rejected"""
+    print("🧪 Testing bulkhead limits...")
+
+    async def scenario():
+        bulkhead = Bulkhead("code_gen", max_concurrent=2, max_queue=2)
+        gate = asyncio.Event()
+        admitted = []
+
+        async def request(i):
+            async with bulkhead.slot():
+                admitted.append(i)
+                await gate.wait()
+
+        tasks = [asyncio.ensure_future(request(i)) for i in range(4)]
+        await asyncio.sleep(0.01)
+        assert (bulkhead.active, bulkhead.queue_depth) == (2, 2)
+        assert admitted == [0, 1]
+
+        try:
+            await bulkhead.acquire()
+            assert False, "expected BulkheadFull"
+        except BulkheadFull as e:
+            print(f"🚫 {e}")
+            assert e.name == "code_gen" and e.retry_after >= 1
+
+        gate.set()
+        await asyncio.gather(*tasks)
+        assert admitted == [0, 1, 2, 3]
+        assert (bulkhead.active, bulkhead.queue_depth) == (0, 0)
+        assert bulkhead.stats == {"admitted": 4, "queued": 2, "rejected": 1}
+
+    asyncio.run(scenario())
+    print("✅ Bulkhead limits test completed")
+
+
+def test_cancelled_waiter_leaves_queue():
+    """A client that disconnects while queued frees its place without leaking a slot"""
+    print("🧪 Testing cancelled waiters...")
+
+    async def scenario():
+        bulkhead = Bulkhead("generate", max_concurrent=1, max_queue=2)
+        await bulkhead.acquire()
+        waiter = asyncio.ensure_future(bulkhead.acquire())
+        follower = asyncio.ensure_future(bulkhead.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.sleep(0.01)
+        assert bulkhead.queue_depth == 1
+
+        bulkhead.release()
+        await asyncio.wait_for(follower, 1)
+        assert bulkhead.active == 1 and bulkhead.queue_depth == 0
+        bulkhead.release()
+        assert bulkhead.active == 0
+
+    asyncio.run(scenario())
+    print("✅ Cancelled waiters test completed")
+
+
+def test_routes_are_isolated():
+    """A saturated code_gen pool does not delay help requests"""
+    print("🧪 Testing route isolation...")
+    bulkheads = build_bulkheads("help=2:2,code_gen=1:1")
+
+    async def slow_node(state):
+        await asyncio.sleep(0.3)
+        return {**state, "result": "model"}
+
+    async def fast_node(state):
+        return {**state, "result": "answer"}
+
+    code_gen = guarded("code_gen", slow_node, bulkheads)
+    help_node = guarded("help", fast_node, bulkheads)
+    assert guarded("create_cad", fast_node, bulkheads) is fast_node
+
+    async def scenario():
+        results = asyncio.gather(*(code_gen({"message": str(i)}) for i in range(3)), return_exceptions=True)
+        await asyncio.sleep(0.01)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        answer = await help_node({"message": "what is a fillet?"})
+        help_latency = loop.time() - start
+        outcomes = await results
+        return answer, help_latency, outcomes
+
+    answer, help_latency, outcomes = asyncio.run(scenario())
+    print(f"⏱️ help answered in {help_latency * 1000:.1f} ms while code_gen was saturated")
+    assert answer["result"] == "answer" and help_latency < 0.1
+    assert [type(outcome).__name__ for outcome in outcomes] == ["dict", "dict", "BulkheadFull"]
+    print("✅ Route isolation test completed")
+
+
+def test_config_and_retry_after():
+    """GENX_BULKHEADS is parsed strictly and Retry-After follows service time"""
+    print("🧪 Testing bulkhead config...")
+    assert parse_bulkheads("help=16:64, code_gen=4:0,") == {"help": (16, 64), "code_gen": (4, 0)}
+    for bad in ("help=16", "help:16:64", "help=a:b"):
+        try:
+            parse_bulkheads(bad)
+            assert False, f"expected invalid config error for {bad!r}"
+        except ValueError:
+            pass
+
+    bulkhead = Bulkhead("code_gen", max_concurrent=2, max_queue=4)
+    bulkhead.service_time = 10.0
+    bulkhead._waiters.extend([None] * 3)
+    # Four requests ahead (three queued plus this one) through two slots
+    assert bulkhead.retry_after() == 20
+    bulkhead.service_time = 1000.0
+    assert bulkhead.retry_after() == 60
+    print("✅ Bulkhead config test completed")
+
+
+def main():
+    """Main function for running bulkhead tests"""
+    print("🚀 Starting bulkhead tests...")
+    test_limits_queue_and_rejection()
+    test_cancelled_waiter_leaves_queue()
+    test_routes_are_isolated()
+    test_config_and_retry_after()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
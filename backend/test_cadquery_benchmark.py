@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the CadQuery per-operation benchmark
+(operation timing, Workplane instrumentation, versioned corpus)
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(__file__))
+
+import cadquery as cq
+
+from benchmarks.cadquery_ops import (OperationTimer, build_corpus, compare_to_baseline, corpus_digest,
+                                     instrument, load_corpus, run_corpus)
+
+
+def test_self_and_inclusive_time():
+    """Nested operations are subtracted from the caller's self time"""
+    print("🧪 Testing operation timer...")
+    timer = OperationTimer()
+    inner = timer.wrap("inner", lambda: time.sleep(0.05))
+
+    def outer_body():
+        time.sleep(0.02)
+        inner()
+
+    outer = timer.wrap("outer", outer_body)
+    outer()
+    stats = timer.stats
+    print(f"⏱️ {stats}")
+    assert stats["outer"]["calls"] == 1 and stats["inner"]["calls"] == 1
+    assert stats["outer"]["inclusive_seconds"] >= 0.07
+    assert 0.015 < stats["outer"]["self_seconds"] < 0.045
+    assert stats["inner"]["self_seconds"] >= 0.05
+    print("✅ Operation timer test completed")
+
+
+def test_workplane_instrumentation():
+    """Workplane methods and export are timed while instrumented and restored afterwards"""
+    print("🧪 Testing Workplane instrumentation...")
+    original_extrude = cq.Workplane.extrude
+    timer = OperationTimer()
+    path = Path(tempfile.mkdtemp()) / "part.step"
+    with instrument(timer):
+        part = cq.Workplane("XY").rect(10, 10).extrude(5).faces(">Z").workplane().hole(2)
+        cq.exporters.export(part, str(path), exportType="STEP")
+    assert cq.Workplane.extrude is original_extrude
+    assert path.exists()
+    for name in ("rect", "extrude", "hole", "export"):
+        assert timer.stats[name]["calls"] >= 1, name
+    # extrude's self time excludes the newObject calls it makes
+    assert timer.stats["extrude"]["self_seconds"] <= timer.stats["extrude"]["inclusive_seconds"]
+    print("✅ Workplane instrumentation test completed")
+
+
+def test_corpus_is_versioned():
+    """Corpus entries pin dataset rows by hash; changed rows are refused"""
+    print("🧪 Testing corpus versioning...")
+    rows = [{"prompt": f"'part {i}'", "code": f"result = cq.Workplane('XY').box({i + 1}, 1, 1)" + " " * i}
+            for i in range(10)]
+    corpus = build_corpus(rows, 4, version=2, dataset="test.jsonl")
+    assert len(corpus["entries"]) == 4
+    assert corpus["entries"][0]["index"] == 0 and corpus["entries"][-1]["index"] == 9
+    snippets = load_corpus(corpus, rows)
+    assert snippets[0]["prompt"] == "part 0"
+
+    rows[9] = {**rows[9], "code": "result = None"}
+    try:
+        load_corpus(corpus, rows)
+        assert False, "expected changed row error"
+    except ValueError as e:
+        assert "--build-corpus" in str(e)
+    print("✅ Corpus versioning test completed")
+
+
+def test_run_corpus_and_baseline():
+    """Per-snippet results, totals and regressions are reported"""
+    print("🧪 Testing corpus run...")
+    directory = Path(tempfile.mkdtemp())
+
+    def execute(code):
+        step_path = directory / "model.step"
+        local_vars = {"cq": cq}
+        exec(code, {}, local_vars)
+        cq.exporters.export(local_vars["result"], str(step_path), exportType="STEP")
+        return {"step_path": str(step_path)}
+
+    snippets = [{"index": 0, "prompt": "box", "code": "result = cq.Workplane('XY').box(1, 2, 3)"},
+                {"index": 1, "prompt": "broken", "code": "result = cq.Workplane('XY').nope()"}]
+    timer = OperationTimer()
+    with instrument(timer):
+        results = run_corpus(execute, snippets, repeat=2, timer=timer)
+    assert [snippet["status"] for snippet in results["snippets"]] == ["ok", "error"]
+    assert results["operations"]["box"]["calls"] == 2
+    assert results["snippets"][0]["top_operations"]["export"]["calls"] == 1
+    assert not (directory / "model.step").exists()
+
+    corpus = {"version": 1, "entries": [{"index": 0, "sha256": "x"}]}
+    report = {"corpus": {"sha256": corpus_digest(corpus)}, "repeat": 1,
+              "operations": {"union": {"self_seconds": 0.5}, "extrude": {"self_seconds": 0.1}}}
+    baseline = {"corpus": {"sha256": corpus_digest(corpus)}, "repeat": 2,
+                "operations": {"union": {"self_seconds": 0.4}, "extrude": {"self_seconds": 0.2}}}
+    assert compare_to_baseline(report, baseline, tolerance=0.25) == ["union: 200.0 -> 500.0 ms self time per run"]
+    baseline["corpus"]["sha256"] = "other"
+    assert "not comparable" in compare_to_baseline(report, baseline, tolerance=0.25)[0]
+    print("✅ Corpus run test completed")
+
+
+def main():
+    """Main function for running CadQuery benchmark tests"""
+    print("🚀 Starting CadQuery benchmark tests...")
+    test_self_and_inclusive_time()
+    test_workplane_instrumentation()
+    test_corpus_is_versioned()
+    test_run_corpus_and_baseline()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
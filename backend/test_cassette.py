@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for LLM / Pinecone record-replay cassettes
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(__file__))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from graph.cassette import Cassette, CassetteMiss
+
+
+class CountingLLM:
+    """Answers with a numbered reply so repeats are distinguishable"""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return AIMessage(content=f"reply {self.calls} to {messages[0].content}",
+                         usage_metadata={"input_tokens": 3, "output_tokens": 4, "total_tokens": 7})
+
+
+class FakeIndex:
+    def __init__(self):
+        self.calls = 0
+
+    def query(self, vector, top_k, include_metadata=False):
+        self.calls += 1
+        return {"matches": [{"id": "7", "score": 0.9, "metadata": {"prompt": "cube", "code": "box"}}][:top_k]}
+
+
+def cassette_path() -> Path:
+    return Path(tempfile.mkdtemp()) / "cassettes" / "graph.jsonl"
+
+
+def test_llm_record_and_replay():
+    """Recorded responses replay in order, with usage metadata, without calling the LLM"""
+    print("🧪 Testing LLM record/replay...")
+    path = cassette_path()
+    llm = CountingLLM()
+    recorder = Cassette(path, "record").wrap_llm(llm)
+    for prompt in ("route: cube", "route: cube", "help: fillet"):
+        asyncio.run(recorder.ainvoke([HumanMessage(content=prompt)]))
+    assert llm.calls == 3
+
+    replayer = Cassette(path, "replay").wrap_llm(CountingLLM())
+    first = asyncio.run(replayer.ainvoke([HumanMessage(content="route: cube")]))
+    second = asyncio.run(replayer.ainvoke([HumanMessage(content="route: cube")]))
+    third = asyncio.run(replayer.ainvoke([HumanMessage(content="route: cube")]))
+    print(f"📼 Replayed: {first.content!r}, {second.content!r}, {third.content!r}")
+    assert (first.content, second.content, third.content) == ("reply 1 to route: cube", "reply 2 to route: cube",
+                                                              "reply 1 to route: cube")
+    assert first.usage_metadata["output_tokens"] == 4
+    assert replayer.llm.calls == 0
+
+    try:
+        asyncio.run(replayer.ainvoke([HumanMessage(content="never recorded")]))
+        assert False, "expected a cassette miss"
+    except CassetteMiss:
+        pass
+    print("✅ LLM record/replay test completed")
+
+
+def test_replay_latency_scale():
+    """Replays are instant by default and can reproduce the recorded latency"""
+    print("🧪 Testing replay latency...")
+    path = cassette_path()
+    asyncio.run(Cassette(path, "record").wrap_llm(CountingLLM(delay=0.2)).ainvoke([HumanMessage(content="slow")]))
+
+    for scale, low, high in ((0.0, 0.0, 0.1), (0.5, 0.09, 0.3)):
+        replayer = Cassette(path, "replay", latency_scale=scale).wrap_llm(None)
+        start = time.perf_counter()
+        asyncio.run(replayer.ainvoke([HumanMessage(content="slow")]))
+        elapsed = time.perf_counter() - start
+        print(f"⏱️ scale={scale}: {elapsed:.3f}s")
+        assert low <= elapsed < high
+    print("✅ Replay latency test completed")
+
+
+def test_index_record_and_replay():
+    """Pinecone queries replay by vector (tolerant to float noise) and options"""
+    print("🧪 Testing Pinecone record/replay...")
+    path = cassette_path()
+    index = FakeIndex()
+    Cassette(path, "record").wrap_index(index).query(vector=[0.1, 0.2, 0.3], top_k=1, include_metadata=True)
+
+    # Replay needs no index at all
+    replayer = Cassette(path, "replay").wrap_index(None)
+    results = replayer.query(vector=[0.1 + 1e-7, 0.2, 0.3], top_k=1, include_metadata=True)
+    assert results["matches"][0]["metadata"]["code"] == "box"
+    try:
+        replayer.query(vector=[0.1, 0.2, 0.3], top_k=3, include_metadata=True)
+        assert False, "expected a cassette miss"
+    except CassetteMiss:
+        pass
+    assert index.calls == 1
+    print("✅ Pinecone record/replay test completed")
+
+
+def test_off_mode_is_transparent():
+    """With the cassette off the original objects are returned unchanged"""
+    print("🧪 Testing off mode...")
+    llm, index = CountingLLM(), FakeIndex()
+    cassette = Cassette(cassette_path(), "off")
+    assert cassette.wrap_llm(llm) is llm and cassette.wrap_index(index) is index
+    try:
+        Cassette(cassette_path(), "playback")
+        assert False, "expected invalid mode error"
+    except ValueError:
+        pass
+    print("✅ Off mode test completed")
+
+
+def main():
+    """Main function for running cassette tests"""
+    print("🚀 Starting cassette tests...")
+    test_llm_record_and_replay()
+    test_replay_latency_scale()
+    test_index_record_and_replay()
+    test_off_mode_is_transparent()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
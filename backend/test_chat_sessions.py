@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for conversation sessions and follow-up edits
+(session store, shape cache, edit responses, code rewriting)
+"""
+
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(__file__))
+
+import cadquery as cq
+
+from graph.parametric import extract_parameters, render_code
+from graph.sessions import SessionStore, ShapeCache, parse_edit, result_variable, strip_exports
+
+CODE = """import cadquery as cq
+height = 10
+solid = cq.Workplane('XY').box(20, 10, height).translate((0, 0, -2.5))
+cq.exporters.export(solid, step_file_path, exportType='STEP')"""
+
+
+def test_session_store_history_and_expiry():
+    """Sessions follow their newest model, keep recent requests and expire when idle"""
+    print("🧪 Testing session store...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "sessions.db")
+        store = SessionStore(db_path, ttl_seconds=0.5, history=2)
+        store.save("s1", "m1", "make a box")
+        store.save("s1", "m2", "make it taller")
+        store.save("s1", "m3", "add a hole")
+
+        # Another worker sees the same session
+        session = SessionStore(db_path, ttl_seconds=0.5).get("s1")
+        assert session["model_id"] == "m3" and session["history"] == ["make it taller", "add a hole"]
+        assert store.get("unknown") is None
+
+        time.sleep(0.6)
+        assert store.get("s1") is None
+        store.save("s2", "m4", "make a cylinder")
+        assert store.count() == 1
+    print("✅ Session store test completed")
+
+
+def test_shape_cache_lru():
+    """The least recently used shapes are dropped first"""
+    print("🧪 Testing shape cache...")
+    cache = ShapeCache(max_entries=2)
+    cache.put("a", {"result": 1})
+    cache.put("b", {"result": 2})
+    assert cache.get("a") == {"result": 1}
+    cache.put("c", {"result": 3})
+    assert cache.get("b") is None and cache.get("a") is not None and cache.get("c") is not None
+    assert cache.snapshot() == {"shapes": 2, "max_entries": 2, "hits": 3, "misses": 1}
+    print("✅ Shape cache test completed")
+
+
+def test_parse_edit():
+    """Edit answers are one JSON object with exactly one known form"""
+    print("🧪 Testing edit parsing...")
+    assert parse_edit('{"parameters": {"height": 30}}') == ("parameters", {"height": 30})
+    assert parse_edit('```json\n{"append": "solid = solid.faces(\'>Z\').hole(4)"}\n```') == \
+        ("append", "solid = solid.faces('>Z').hole(4)")
+    assert parse_edit('Sure! {"code": "result = cq.Workplane().sphere(3)"}')[0] == "code"
+    for bad in ("make it taller", '{"parameters": {}}', '{"append": ""}', '{"code": "x", "append": "y"}',
+                '{"parameters": {"height": 30}'):
+        try:
+            parse_edit(bad)
+            assert False, "expected ValueError"
+        except ValueError as e:
+            print(f"🚫 {e}")
+    print("✅ Edit parsing test completed")
+
+
+def test_code_rewriting():
+    """Rendered templates carry edited values; appended ops run on the cached namespace"""
+    print("🧪 Testing code rewriting...")
+    template, parameters = extract_parameters(CODE)
+    code = render_code(template, {**parameters, "height": 30})
+    assert "height = 30" in code and "translate((0, 0, -2.5))" in code
+    assert result_variable(code) == "solid" and result_variable("result = 1\nshape = 2") == "result"
+
+    base = strip_exports(code)
+    assert "exporters" not in base and "box(20, 10, height)" in base
+    namespace = {"cq": cq}
+    exec(base, {}, namespace)
+
+    append = "solid = solid.faces('>Z').workplane().hole(4)"
+    cached = dict(namespace)
+    exec(append, {}, cached)
+    full = {"cq": cq}
+    exec(f"{base}\n{append}", {}, full)
+    assert abs(cached["solid"].val().Volume() - full["solid"].val().Volume()) < 1e-6
+    assert cached["solid"].val().Volume() < namespace["solid"].val().Volume()
+    print("✅ Code rewriting test completed")
+
+
+def main():
+    """Main function for running chat session tests"""
+    print("🚀 Starting chat session tests...")
+    test_session_store_history_and_expiry()
+    test_shape_cache_lru()
+    test_parse_edit()
+    test_code_rewriting()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
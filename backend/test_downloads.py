@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test script for model downloads: compressed sidecars, ETags,
+conditional GETs and byte ranges
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(__file__))
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from graph.downloads import (content_hash, model_file_response, negotiate_encoding, parse_range,
+                             sidecar_path, write_sidecars, zstandard)
+
+MODEL = ("ISO-10303-21;\nHEADER;\n" + "".join(f"#{i}=CARTESIAN_POINT('',(0.,{i}.,10.));\n" for i in range(400))
+         + "ENDSEC;\nEND-ISO-10303-21;\n").encode()
+
+
+def make_client():
+    directory = Path(tempfile.mkdtemp())
+    path = directory / "model_test.step"
+    path.write_bytes(MODEL)
+    write_sidecars(path)
+
+    app = FastAPI()
+
+    @app.get("/model")
+    def get_model(request: Request):
+        return model_file_response(request, path, "application/step")
+
+    return TestClient(app), path
+
+
+def raw_get(client: TestClient, headers: dict):
+    """GET without letting the HTTP client decode Content-Encoding"""
+    with client.stream("GET", "/model", headers=headers) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_negotiation_and_parsing():
+    """Accept-Encoding q-values and Range headers are parsed per RFC 9110"""
+    print("🧪 Testing header parsing...")
+    assert negotiate_encoding("gzip, deflate, br, zstd", ["zstd", "gzip"]) == "zstd"
+    assert negotiate_encoding("gzip;q=1.0, zstd;q=0.5", ["zstd", "gzip"]) == "gzip"
+    assert negotiate_encoding("zstd;q=0, *;q=0.1", ["zstd", "gzip"]) == "gzip"
+    assert negotiate_encoding("identity", ["zstd", "gzip"]) is None
+    assert negotiate_encoding(None, ["gzip"]) is None
+
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=990-2000", 1000) == (990, 999)
+    assert parse_range("bytes=0-1,5-9", 1000) is None
+    try:
+        parse_range("bytes=1000-", 1000)
+        assert False, "expected unsatisfiable range"
+    except ValueError:
+        pass
+    print("✅ Header parsing test completed")
+
+
+def test_compressed_sidecars():
+    """Sidecars are written at export time and served by negotiation"""
+    print("🧪 Testing compressed downloads...")
+    client, path = make_client()
+    assert sidecar_path(path, "gzip").exists()
+
+    response, body = raw_get(client, {"Accept-Encoding": "gzip"})
+    print(f"📦 {len(MODEL)} bytes -> {len(body)} bytes gzip")
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(body) == MODEL
+    assert len(body) * 5 < len(MODEL)
+
+    if zstandard is not None:
+        response, body = raw_get(client, {"Accept-Encoding": "gzip, zstd"})
+        assert response.headers["content-encoding"] == "zstd"
+        assert zstandard.ZstdDecompressor().decompressobj().decompress(body) == MODEL
+
+    response, body = raw_get(client, {"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert body == MODEL
+    print("✅ Compressed downloads test completed")
+
+
+def test_etag_conditional_get():
+    """Strong per-encoding ETags from the content hash; If-None-Match gives 304"""
+    print("🧪 Testing ETags...")
+    client, path = make_client()
+    digest = content_hash(path)
+
+    identity = client.get("/model", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/model", headers={"Accept-Encoding": "gzip"})
+    assert identity.headers["etag"] == f'"{digest}"'
+    assert gzipped.headers["etag"] == f'"{digest}-gzip"'
+    assert "immutable" in identity.headers["cache-control"]
+
+    not_modified = client.get("/model", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    # The identity ETag does not validate the gzip representation
+    changed = client.get("/model", headers={"Accept-Encoding": "gzip", "If-None-Match": identity.headers["etag"]})
+    assert changed.status_code == 200
+    print("✅ ETag test completed")
+
+
+def test_byte_ranges():
+    """Single ranges give 206, out-of-bounds 416, stale If-Range the full body"""
+    print("🧪 Testing byte ranges...")
+    client, path = make_client()
+    etag = f'"{content_hash(path)}"'
+
+    partial = client.get("/model", headers={"Range": "bytes=100-199", "Accept-Encoding": "gzip"})
+    assert partial.status_code == 206
+    assert partial.content == MODEL[100:200]
+    assert partial.headers["content-range"] == f"bytes 100-199/{len(MODEL)}"
+    assert "content-encoding" not in partial.headers
+
+    tail = client.get("/model", headers={"Range": "bytes=-10"})
+    assert tail.content == MODEL[-10:]
+
+    unsatisfiable = client.get("/model", headers={"Range": f"bytes={len(MODEL)}-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(MODEL)}"
+
+    resumed = client.get("/model", headers={"Range": "bytes=10-", "If-Range": etag})
+    assert resumed.status_code == 206 and resumed.content == MODEL[10:]
+    stale = client.get("/model", headers={"Range": "bytes=10-", "If-Range": '"outdated"'})
+    assert stale.status_code == 200 and stale.content == MODEL
+    print("✅ Byte range test completed")
+
+
+def main():
+    """Main function for running download tests"""
+    print("🚀 Starting download tests...")
+    test_negotiation_and_parsing()
+    test_compressed_sidecars()
+    test_etag_conditional_get()
+    test_byte_ranges()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline /graph_chat load test harness
+(workload mix, stand-ins, histogram deltas and baseline comparison)
+"""
+
+import asyncio
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from graph.metrics import Histogram
+from benchmarks.graph_chat_load import (CODE_GEN_PREFIX, DatasetLLM, LocalPineconeIndex, build_workload,
+                                        clean_prompt, compare_to_baseline, histogram_delta,
+                                        histogram_quantile, observed_route, parse_histograms,
+                                        parse_mix, percentile)
+
+RECORDS = [
+    {"prompt": "Make a round washer", "code": "solid = cq.Workplane('XY').circle(5).circle(2).extrude(1)"},
+    {"prompt": "Design a square plate", "code": "solid = cq.Workplane('XY').box(10, 10, 1)"},
+]
+
+
+class Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class WordEncoder:
+    """Bag-of-words vectors over a tiny vocabulary"""
+    vocabulary = ["round", "washer", "square", "plate", "make", "design"]
+
+    def encode(self, texts, **kwargs):
+        return [[float(word in text.lower()) for word in self.vocabulary] for text in texts]
+
+
+def test_workload_mix():
+    """Workloads follow the route weights and are reproducible by seed"""
+    print("🧪 Testing workload mix...")
+    assert clean_prompt("'Make a gear.'\n\nThis is based on...") == "Make a gear."
+    mix = parse_mix("generate=0.5,code_gen=0.5")
+    workload = build_workload(RECORDS, 200, mix, seed=1)
+    assert workload == build_workload(RECORDS, 200, mix, seed=1)
+    routes = [route for route, _ in workload]
+    assert 70 < routes.count("code_gen") < 130 and "help" not in routes
+    assert all(message.startswith(CODE_GEN_PREFIX) for route, message in workload if route == "code_gen")
+    try:
+        parse_mix("generate=1,render=1")
+        assert False, "expected unknown route error"
+    except ValueError:
+        pass
+    print("✅ Workload mix test completed")
+
+
+def test_dataset_llm():
+    """Code generation prompts get dataset code with an export; routing is delegated"""
+    print("🧪 Testing dataset LLM stand-in...")
+
+    class Fallback:
+        async def ainvoke(self, messages):
+            return Message("generate")
+
+    llm = DatasetLLM(Fallback(), RECORDS)
+    prompt = f'You are an expert CADQuery programmer.\n\nUser request: "{CODE_GEN_PREFIX}make a round washer"\n'
+    code = asyncio.run(llm.ainvoke([Message(prompt)])).content
+    assert code.startswith(RECORDS[0]["code"])
+    assert "cq.exporters.export(result, step_file_path" in code
+    assert asyncio.run(llm.ainvoke([Message("router: User message: hi")])).content == "generate"
+    # Unknown requests still get (deterministic) runnable code
+    assert llm.code_for("a spiral staircase") == llm.code_for("a spiral staircase")
+    print("✅ Dataset LLM test completed")
+
+
+def test_local_pinecone_index():
+    """The local index answers Pinecone-style queries by cosine similarity"""
+    print("🧪 Testing local Pinecone index...")
+    index = LocalPineconeIndex(RECORDS)
+    encoder = WordEncoder()
+    index.build(encoder)
+    results = index.query(vector=encoder.encode(["square plate"])[0], top_k=1, include_metadata=True)
+    assert results["matches"][0]["metadata"]["prompt"] == "Design a square plate"
+    assert results["matches"][0]["score"] > 0.8
+    print("✅ Local Pinecone index test completed")
+
+
+def test_histogram_deltas_and_quantiles():
+    """Per-series deltas between scrapes give Prometheus-style quantile estimates"""
+    print("🧪 Testing histogram deltas...")
+    histogram = Histogram("test_load_node_seconds", "Test node latency", ["node"], buckets=(0.1, 0.2, 0.4))
+    histogram.observe(5.0, node="analyze")
+    before = parse_histograms(histogram.render(), "test_load_node_seconds")
+    for value in (0.05, 0.15, 0.15, 0.3):
+        histogram.observe(value, node="analyze")
+    histogram.observe(0.05, node="help")
+    delta = histogram_delta(before, parse_histograms(histogram.render(), "test_load_node_seconds"))
+
+    analyze = delta["node=analyze"]
+    assert analyze["count"] == 4 and abs(analyze["sum"] - 0.65) < 1e-9
+    # Cumulative: the 5.0s observation before the first scrape is not counted
+    assert analyze["buckets"] == [(0.1, 1), (0.2, 3), (0.4, 4), (float("inf"), 4)]
+    assert abs(histogram_quantile(0.5, analyze["buckets"]) - 0.15) < 1e-9
+    assert histogram_quantile(1.0, analyze["buckets"]) == 0.4
+    assert delta["node=help"]["count"] == 1
+
+    assert percentile([1, 2, 3, 4], 0.5) == 2.5
+    assert percentile([], 0.5) is None
+    print("✅ Histogram delta test completed")
+
+
+def test_routes_and_baseline():
+    """Responses map to routes; p95 and throughput regressions are reported"""
+    print("🧪 Testing route mapping and baseline comparison...")
+    assert observed_route({"agent": "GenBot", "response": '{"attempts": 1}'}) == "code_gen"
+    assert observed_route({"agent": "GenBot", "response": '{"similarity_score": 0.9}'}) == "generate"
+    assert observed_route({"agent": "HelpBot", "response": "text"}) == "help"
+    assert observed_route({"agent": "CADBot", "response": '{"method": "deterministic_primitive"}'}) == "primitive"
+
+    baseline = {"throughput_rps": 10.0, "routes": {"generate": {"p95": 0.5}}, "nodes": {"analyze": {"p95": 0.1}}}
+    report = {"throughput_rps": 9.0, "routes": {"generate": {"p95": 0.55}}, "nodes": {"analyze": {"p95": 0.2}}}
+    regressions = compare_to_baseline(report, baseline, tolerance=0.25)
+    print(f"📉 Regressions: {regressions}")
+    assert regressions == ["nodes/analyze p95 100.0 -> 200.0 ms"]
+    report["throughput_rps"] = 5.0
+    assert len(compare_to_baseline(report, baseline, tolerance=0.25)) == 2
+    print("✅ Route mapping and baseline test completed")
+
+
+def main():
+    """Main function for running load test harness tests"""
+    print("🚀 Starting load test harness tests...")
+    test_workload_mix()
+    test_dataset_llm()
+    test_local_pinecone_index()
+    test_histogram_deltas_and_quantiles()
+    test_routes_and_baseline()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
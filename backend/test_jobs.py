@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test script for the background job API and checkpointed graph state
+"""
+
+import asyncio
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from graph.jobs import JobManager, JobStore, checkpoint, checkpointed
+
+
+def make_store():
+    return JobStore(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+
+
+async def fake_analyze(state):
+    return {**state, "route": "code_gen"}
+
+
+async def fake_code_gen(state):
+    attempt = state.get("attempt", 0)
+    while attempt < 3:
+        attempt += 1
+        if attempt < 3:
+            checkpoint("code_gen", {**state, "attempt": attempt, "last_error": f"error {attempt}"})
+            continue
+        return {**state, "attempt": attempt, "result": f"done after {attempt}"}
+
+
+async def fake_graph(state):
+    if not state.get("route"):
+        state = await checkpointed("analyze", fake_analyze)(state)
+    return await checkpointed("code_gen", fake_code_gen)(state)
+
+
+def test_job_checkpoints_every_node():
+    """A job records a checkpoint after analyze, each failed attempt and the final node"""
+    print("🧪 Testing job checkpoints...")
+    store = make_store()
+
+    async def run():
+        manager = JobManager(store, fake_graph)
+        job_id = manager.submit("write code for a staircase")
+        events = [event async for event in manager.subscribe(job_id)]
+        return job_id, events
+
+    job_id, events = asyncio.run(run())
+    job = store.get_job(job_id)
+    nodes = [cp["node"] for cp in store.get_checkpoints(job_id)]
+    print(f"📊 Checkpoints: {nodes}")
+    assert job["status"] == "succeeded"
+    assert job["route"] == "code_gen"
+    assert nodes == ["analyze", "code_gen", "code_gen", "code_gen"]
+    assert events[-1]["event"] == "succeeded"
+    print("✅ Job checkpoints test completed")
+
+
+def test_pending_job_resumes_from_checkpoint():
+    """An unfinished job resumes from its latest checkpoint instead of starting over"""
+    print("🧪 Testing job resume...")
+    store = make_store()
+    job_id = store.create_job("write code for a staircase")
+    store.add_checkpoint(job_id, "analyze", {"message": "write code for a staircase", "route": "code_gen"})
+    store.add_checkpoint(job_id, "code_gen", {"message": "write code for a staircase", "route": "code_gen",
+                                              "attempt": 2, "last_error": "error 2"})
+
+    async def run():
+        manager = JobManager(store, fake_graph)
+        resumed = await manager.resume_pending()
+        events = [event async for event in manager.subscribe(job_id)]
+        return resumed, events
+
+    resumed, events = asyncio.run(run())
+    assert resumed == [job_id]
+    assert store.get_job(job_id)["status"] == "succeeded"
+    assert store.get_job(job_id)["result"] == '"done after 3"'
+    # Only the final attempt ran after resuming
+    assert [cp["node"] for cp in store.get_checkpoints(job_id)] == ["analyze", "code_gen", "code_gen"]
+    print("✅ Job resume test completed")
+
+
+def test_failed_job_records_error():
+    """Exceptions mark the job failed with the error message"""
+    print("🧪 Testing job failure...")
+    store = make_store()
+
+    async def broken_graph(state):
+        raise RuntimeError("kernel crashed")
+
+    async def run():
+        manager = JobManager(store, broken_graph)
+        job_id = manager.submit("make a cube")
+        events = [event async for event in manager.subscribe(job_id)]
+        return job_id, events
+
+    job_id, events = asyncio.run(run())
+    assert store.get_job(job_id)["status"] == "failed"
+    assert store.get_job(job_id)["error"] == "kernel crashed"
+    assert events[-1] == {"event": "failed", "error": "kernel crashed"}
+    print("✅ Job failure test completed")
+
+
+def test_session_id_reaches_the_graph():
+    """Jobs hand their session_id to the graph, when submitted and when resumed"""
+    print("🧪 Testing job sessions...")
+    store = make_store()
+    seen = []
+
+    async def session_graph(state):
+        seen.append(state.get("session_id"))
+        return {**state, "result": "done"}
+
+    resumed_id = store.create_job("make it taller", session_id="s2")
+    store.add_checkpoint(resumed_id, "analyze", {"message": "make it taller", "route": "edit"})
+
+    async def run():
+        manager = JobManager(store, session_graph)
+        job_id = manager.submit("make it wider", session_id="s1")
+        await manager.resume_pending()
+        for pending in (job_id, resumed_id):
+            [event async for event in manager.subscribe(pending)]
+        return job_id
+
+    job_id = asyncio.run(run())
+    assert sorted(seen) == ["s1", "s2"]
+    assert store.get_job(job_id)["session_id"] == "s1"
+    print("✅ Job sessions test completed")
+
+
+def main():
+    """Main function for running job tests"""
+    print("🚀 Starting job tests...")
+    test_job_checkpoints_every_node()
+    test_pending_job_resumes_from_checkpoint()
+    test_failed_job_records_error()
+    test_session_id_reaches_the_graph()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM provider pool (hedged requests and failover)
+using local OpenAI-compatible stub servers
+"""
+
+import asyncio
+import json
+import sys
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(__file__))
+
+from langchain_core.messages import HumanMessage
+from langchain_openai import ChatOpenAI
+
+from graph.llm_providers import LLMProvider, ProviderPool
+
+
+def start_stub(reply: str, delay: float = 0.0, fail: bool = False):
+    """Start a local OpenAI-compatible /v1/chat/completions stub"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.server.calls += 1
+            time.sleep(delay)
+            if fail:
+                self.send_response(500)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b'{"error": {"message": "stub failure"}}')
+                return
+            body = json.dumps({
+                "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": reply}}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.calls = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stub_provider(name: str, server) -> LLMProvider:
+    host, port = server.server_address
+    return LLMProvider(name, ChatOpenAI(base_url=f"http://{host}:{port}/v1", openai_api_key="stub",
+                                        model="stub", max_retries=0))
+
+
+def ask(pool: ProviderPool) -> str:
+    return asyncio.run(pool.ainvoke([HumanMessage(content="help")])).content
+
+
+def test_failover_on_error():
+    """A failing provider falls over to the next one"""
+    print("🧪 Testing failover...")
+    broken = start_stub("broken", fail=True)
+    healthy = start_stub("healthy")
+    try:
+        pool = ProviderPool([stub_provider("broken", broken), stub_provider("healthy", healthy)])
+        assert ask(pool) == "healthy"
+        stats = pool.get_stats()
+        print(f"📊 Stats: {stats}")
+        assert stats["broken"]["errors"] == 1
+        assert stats["healthy"]["wins"] == 1
+    finally:
+        broken.shutdown()
+        healthy.shutdown()
+    print("✅ Failover test completed")
+
+
+def test_hedge_when_primary_is_slow():
+    """A slow primary triggers a hedged request that wins the race"""
+    print("🧪 Testing hedged requests...")
+    slow = start_stub("slow", delay=2.0)
+    fast = start_stub("fast")
+    try:
+        pool = ProviderPool([stub_provider("slow", slow), stub_provider("fast", fast)],
+                            default_hedge_delay=0.3)
+
+        start = time.perf_counter()
+        assert ask(pool) == "fast"
+        elapsed = time.perf_counter() - start
+        print(f"⏱️ Hedged request took {elapsed:.2f}s")
+        assert elapsed < 1.5
+        assert pool.get_stats()["slow"]["hedges"] == 1
+        assert fast.calls == 1
+    finally:
+        slow.shutdown()
+        fast.shutdown()
+    print("✅ Hedged request test completed")
+
+
+def test_ranking_prefers_fast_healthy_providers():
+    """Providers with lower latency and error rate are tried first"""
+    print("🧪 Testing provider ranking...")
+    a, b, c = LLMProvider("a", None), LLMProvider("b", None), LLMProvider("c", None)
+    for _ in range(30):
+        a.stats.record_success("short", 1.0)
+        b.stats.record_success("short", 0.2)
+        c.stats.record_error()
+    pool = ProviderPool([c, a, b])
+    assert [provider.name for provider in pool.ranked("short")] == ["b", "a", "c"]
+    assert pool.hedge_delay(b, "short") >= 0.2
+    print("✅ Provider ranking test completed")
+
+
+def test_all_providers_failing_raises():
+    """When every provider fails, the last error is raised"""
+    print("🧪 Testing total failure...")
+    first = start_stub("first", fail=True)
+    second = start_stub("second", fail=True)
+    try:
+        pool = ProviderPool([stub_provider("first", first), stub_provider("second", second)])
+        try:
+            ask(pool)
+            assert False, "expected an error"
+        except Exception as e:
+            print(f"📊 Raised: {type(e).__name__}")
+        assert first.calls == 1 and second.calls == 1
+    finally:
+        first.shutdown()
+        second.shutdown()
+    print("✅ Total failure test completed")
+
+
+def main():
+    """Main function for running provider pool tests"""
+    print("🚀 Starting LLM provider pool tests...")
+    test_failover_on_error()
+    test_hedge_when_primary_is_slow()
+    test_ranking_prefers_fast_healthy_providers()
+    test_all_providers_failing_raises()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the Prometheus-style metrics registry
+"""
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from graph.metrics import Counter, Gauge, Histogram, instrumented, render, usage_tokens, NODE_LATENCY, NODE_REQUESTS
+
+
+def test_histogram_exposition():
+    """Histogram buckets are cumulative and end with +Inf, _sum and _count"""
+    print("🧪 Testing histogram exposition...")
+    histogram = Histogram("test_latency_seconds", "Test latency", ["node"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, node="analyze")
+    histogram.observe(0.5, node="analyze")
+    histogram.observe(5.0, node="analyze")
+
+    text = histogram.render()
+    print(text)
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{node="analyze",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{node="analyze",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{node="analyze",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{node="analyze"} 3' in text
+    assert 'test_latency_seconds_sum{node="analyze"} 5.55' in text
+    print("✅ Histogram exposition test completed")
+
+
+def test_counter_and_gauge():
+    """Counters accumulate, gauges can be computed at scrape time"""
+    print("🧪 Testing counters and gauges...")
+    counter = Counter("test_cache_requests_total", "Test cache", ["cache", "result"])
+    counter.inc(cache="graph", result="hit")
+    counter.inc(2, cache="graph", result="hit")
+    assert counter.get(cache="graph", result="hit") == 3
+
+    gauge = Gauge("test_queue_depth", "Test queue depth", ["route"])
+    gauge.set_function(lambda: 7, route="code_gen")
+    assert 'test_queue_depth{route="code_gen"} 7' in gauge.render()
+
+    try:
+        counter.inc(cache="graph")
+        assert False, "expected missing label error"
+    except ValueError:
+        pass
+    assert "test_cache_requests_total" in render()
+    print("✅ Counter and gauge test completed")
+
+
+def test_instrumented_node():
+    """Instrumented nodes record latency and status"""
+    print("🧪 Testing node instrumentation...")
+
+    async def node(state):
+        return {**state, "result": "ok"}
+
+    async def broken(state):
+        raise RuntimeError("boom")
+
+    before = NODE_LATENCY.count(node="test_node")
+    asyncio.run(instrumented("test_node", node)({"message": "hi"}))
+    try:
+        asyncio.run(instrumented("test_node", broken)({"message": "hi"}))
+    except RuntimeError:
+        pass
+    assert NODE_LATENCY.count(node="test_node") == before + 2
+    assert NODE_REQUESTS.get(node="test_node", status="ok") == 1
+    assert NODE_REQUESTS.get(node="test_node", status="error") == 1
+    print("✅ Node instrumentation test completed")
+
+
+def test_usage_tokens():
+    """Provider token usage is read from LangChain response metadata"""
+    print("🧪 Testing token usage extraction...")
+
+    class Response:
+        usage_metadata = {"input_tokens": 120, "output_tokens": 30}
+
+    class OpenAIResponse:
+        usage_metadata = None
+        response_metadata = {"token_usage": {"prompt_tokens": 10, "completion_tokens": 4}}
+
+    class MockResponse:
+        content = "mock"
+
+    assert usage_tokens(Response()) == (120, 30)
+    assert usage_tokens(OpenAIResponse()) == (10, 4)
+    assert usage_tokens(MockResponse()) is None
+    print("✅ Token usage test completed")
+
+
+def main():
+    """Main function for running metrics tests"""
+    print("🚀 Starting metrics tests...")
+    test_histogram_exposition()
+    test_counter_and_gauge()
+    test_instrumented_node()
+    test_usage_tokens()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for the generated model listing index
+(cursor pagination, filters, invalidation, geometry metadata)
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(__file__))
+
+import cadquery as cq
+
+from graph.model_listing import ModelListingIndex, decode_cursor, read_geometry
+
+
+def make_models(count: int = 25) -> Path:
+    directory = Path(tempfile.mkdtemp())
+    base = time.time() - 1000
+    for i in range(count):
+        ext = ["step", "stl", "glb"][i % 3]
+        path = directory / f"model_{i:03d}.{ext}"
+        path.write_bytes(b"x" * (i + 1))
+        os.utime(path, (base + i, base + i))
+    (directory / "notes.txt").write_text("not a model")
+    return directory
+
+
+def test_cursor_pagination_covers_everything_once():
+    """Pages are newest first, disjoint, and stable while new files arrive"""
+    print("🧪 Testing cursor pagination...")
+    directory = make_models()
+    index = ModelListingIndex(directory, "/static/generated_models", watch=False)
+
+    first = index.query(limit=10)
+    assert [item["name"] for item in first["items"]][:2] == ["model_024.step", "model_023.glb"]
+    assert first["total"] == 25
+    assert first["items"][0]["url"] == "/static/generated_models/model_024.step"
+    assert first["items"][0]["size"] == 25
+
+    # A model created between page requests does not shift later pages
+    (directory / "model_new.stl").write_bytes(b"y")
+    names = [item["name"] for item in first["items"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = index.query(limit=10, cursor=cursor)
+        names.extend(item["name"] for item in page["items"])
+        cursor = page["next_cursor"]
+    assert len(names) == 25 and len(set(names)) == 25
+    assert "model_new.stl" not in names
+    assert index.query()["total"] == 26
+    assert decode_cursor(first["next_cursor"])[1] == "model_015.step"
+    print("✅ Cursor pagination test completed")
+
+
+def test_filters():
+    """Format and time filters apply before pagination"""
+    print("🧪 Testing filters...")
+    directory = make_models()
+    index = ModelListingIndex(directory, "/static/generated_models", watch=False)
+    cutoff = (directory / "model_020.glb").stat().st_mtime
+
+    stl = index.query(formats=["stl"])
+    assert {item["format"] for item in stl["items"]} == {"stl"}
+    assert stl["total"] == 8
+
+    recent = index.query(since=cutoff, formats=["step", "stl"], limit=2)
+    assert [item["name"] for item in recent["items"]] == ["model_024.step", "model_022.stl"]
+    assert recent["total"] == 3
+    older = index.query(until=cutoff)
+    assert all(item["modified"] < cutoff for item in older["items"])
+    print("✅ Filter test completed")
+
+
+def test_invalidation_by_directory_mtime():
+    """Unchanged directories are not rescanned; changes are picked up"""
+    print("🧪 Testing invalidation...")
+    directory = make_models(3)
+    index = ModelListingIndex(directory, "/m", watch=False, max_age=3600)
+    # Bounded pages compute geometry inline, so the ETag cannot change underneath
+    etag = index.query(limit=10)["etag"]
+    assert index.refresh() is False
+    assert index.query(limit=10)["etag"] == etag
+
+    (directory / "model_000.step").unlink()
+    assert index.query(limit=10)["total"] == 2
+    assert index.query(limit=10)["etag"] != etag
+    print("✅ Invalidation test completed")
+
+
+def test_geometry_metadata():
+    """Geometry is parsed from STEP and STL and cached per entry"""
+    print("🧪 Testing geometry metadata...")
+    directory = Path(tempfile.mkdtemp())
+    box = cq.Workplane("XY").box(10, 20, 30)
+    cq.exporters.export(box, str(directory / "box.step"), exportType="STEP")
+    cq.exporters.export(box, str(directory / "box.stl"), exportType="STL")
+    ascii_stl = "solid t\nfacet normal 0 0 1\nouter loop\nvertex 0 0 0\nvertex 1 0 0\nvertex 0 2 0\nendloop\nendfacet\nendsolid t\n"
+    (directory / "tri.stl").write_text(ascii_stl)
+
+    step = read_geometry(directory / "box.step")
+    print(f"📐 STEP: {step}")
+    assert step["solids"] == 1 and step["faces"] == 6
+    assert step["bbox"] == {"min": [-5.0, -10.0, -15.0], "max": [5.0, 10.0, 15.0]}
+
+    stl = read_geometry(directory / "box.stl")
+    assert stl["triangles"] == 12
+    assert stl["bbox"]["max"] == [5.0, 10.0, 15.0]
+    assert read_geometry(directory / "tri.stl") == {"triangles": 1, "bbox": {"min": [0.0, 0.0, 0.0], "max": [1.0, 2.0, 0.0]}}
+
+    index = ModelListingIndex(directory, "/m", watch=False)
+    page = index.query(limit=10)
+    assert all(item["geometry"] for item in page["items"])
+    print("✅ Geometry metadata test completed")
+
+
+def main():
+    """Main function for running model listing tests"""
+    print("🚀 Starting model listing tests...")
+    test_cursor_pagination_covers_everything_once()
+    test_filters()
+    test_invalidation_by_directory_mtime()
+    test_geometry_metadata()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for parametric templates of generated CadQuery code
+(literal extraction, overrides, template store)
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+import cadquery as cq
+
+from graph.parametric import ParametricStore, apply_overrides, compile_template, extract_parameters
+
+CODE = """
+import cadquery as cq
+# Flange dimensions
+outer_radius = 50
+thickness: float = 12.5
+bore, bolt_count = 20, 6
+result = (cq.Workplane("XY").circle(outer_radius).extrude(thickness)
+          .faces(">Z").workplane().hole(bore * 2)
+          .faces(">Z").workplane().polarArray(35, 0, 360, bolt_count).hole(diameter=8)
+          .translate((0, 0, -5)))
+edges = result.edges().vals()[0]
+"""
+
+
+def run(code, parameters=None):
+    local_vars = {"cq": cq}
+    exec(code, {"__params__": parameters} if parameters is not None else {}, local_vars)
+    return local_vars["result"]
+
+
+def test_extract_names_literals_from_context():
+    """Assignments keep their variable names, call arguments are named after the call"""
+    print("🧪 Testing parameter extraction...")
+    template, parameters = extract_parameters(CODE)
+    print(f"🎛️ {parameters}")
+    assert parameters == {
+        "outer_radius": 50, "thickness": 12.5, "bore": 20, "bolt_count": 6,
+        "value": 2, "polarArray_1": 35, "polarArray_2": 0, "polarArray_3": 360, "diameter": 8,
+        "translate_1_x": 0, "translate_1_y": 0, "translate_1_z": -5,
+    }
+    # Indices and strings are left alone
+    assert "vals()[0]" in template and "'>Z'" in template
+    assert "outer_radius = __params__['outer_radius']" in template
+
+    original = run(CODE).val().Volume()
+    assert abs(run(compile_template(template), parameters).val().Volume() - original) < 1e-6
+    print("✅ Parameter extraction test completed")
+
+
+def test_overrides_change_geometry():
+    """Overrides re-run the template; counts stay integers and bad input is rejected"""
+    print("🧪 Testing overrides...")
+    template, parameters = extract_parameters(CODE)
+    taller = apply_overrides(parameters, {"thickness": 32.5, "bolt_count": 4.0})
+    assert taller["bolt_count"] == 4 and isinstance(taller["bolt_count"], int)
+    assert parameters["thickness"] == 12.5
+
+    box = run(compile_template(template), taller).val().BoundingBox()
+    assert abs(box.zlen - 32.5) < 1e-6 and abs(box.zmin + 5) < 1e-6
+
+    for bad in ({"height": 3}, {"thickness": "tall"}, {"bolt_count": True}):
+        try:
+            apply_overrides(parameters, bad)
+            assert False, "expected ValueError"
+        except ValueError as e:
+            print(f"🚫 {e}")
+    assert compile_template(template) is compile_template(template)
+    print("✅ Overrides test completed")
+
+
+def test_store_roundtrip_and_limit():
+    """Templates are shared through SQLite and the oldest are dropped past the limit"""
+    print("🧪 Testing template store...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "parametric.db")
+        store = ParametricStore(db_path, max_models=2)
+        template, parameters = extract_parameters(CODE)
+        store.put("a", template, parameters, "make a flange")
+        store.put("b", template, {**parameters, "thickness": 20}, "make a flange", parent_id="a")
+
+        # Another worker sees the same records
+        other = ParametricStore(db_path, max_models=2)
+        record = other.get("b")
+        assert record["parent_id"] == "a" and record["parameters"]["thickness"] == 20
+        assert record["parameters"]["outer_radius"] == 50 and isinstance(record["parameters"]["outer_radius"], int)
+
+        store.put("c", template, parameters)
+        assert store.count() == 2 and store.get("a") is None and other.get("c") is not None
+        assert store.get("missing") is None
+    print("✅ Template store test completed")
+
+
+def main():
+    """Main function for running parametric template tests"""
+    print("🚀 Starting parametric template tests...")
+    test_extract_names_literals_from_context()
+    test_overrides_change_geometry()
+    test_store_roundtrip_and_limit()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
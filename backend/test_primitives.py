@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the deterministic primitive fast path
+(request grammar, fallbacks to the LLM route, generated geometry)
+"""
+
+import math
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+import cadquery as cq
+
+from graph.parametric import extract_parameters
+from graph.primitives import describe, parse_primitive
+
+
+def build(code):
+    local_vars = {"cq": cq}
+    exec(code, {}, local_vars)
+    return local_vars["result"].val()
+
+
+def test_grammar_units_and_synonyms():
+    """Dimension phrases in any order, units and synonyms resolve to the same primitive"""
+    print("🧪 Testing primitive grammar...")
+    expected = {
+        "box 10x5x3": ("box", {"length": 10, "width": 5, "height": 3}),
+        "Make me a box 1cm x 5 x 3 mm.": ("box", {"length": 10, "width": 5, "height": 3}),
+        "box 2x3x4 in": ("box", {"length": 50.8, "width": 76.2, "height": 101.6}),
+        "box 10 x 5 x 3 cm": ("box", {"length": 100, "width": 50, "height": 30}),
+        "box length 10 width 5 height 3": ("box", {"length": 10, "width": 5, "height": 3}),
+        "cube with side 3cm": ("box", {"length": 30, "width": 30, "height": 30}),
+        "cylinder radius 5 height 10": ("cylinder", {"radius": 5, "height": 10}),
+        "a rod with diameter 10 and 10 mm tall": ("cylinder", {"radius": 5, "height": 10}),
+        "cylinder r=5 h=10": ("cylinder", {"radius": 5, "height": 10}),
+        "sphere 5": ("sphere", {"radius": 5}),
+        "ball of diameter 10": ("sphere", {"radius": 5}),
+        "tube od 20 id 16 length 50": ("tube", {"outer_radius": 10, "inner_radius": 8, "height": 50}),
+        "hollow cylinder outer radius 10 wall thickness 2 height 50":
+            ("tube", {"outer_radius": 10, "inner_radius": 8, "height": 50}),
+    }
+    for message, (shape, params) in expected.items():
+        primitive = parse_primitive(message)
+        assert primitive is not None, message
+        assert (primitive["shape"], primitive["params"]) == (shape, params), (message, primitive)
+        print(f"⚡ {message!r} -> {describe(primitive)}")
+    print("✅ Primitive grammar test completed")
+
+
+def test_anything_else_takes_the_llm_route():
+    """Unknown words, missing, unused or contradictory dimensions and impossible geometry fall through"""
+    print("🧪 Testing fallbacks...")
+    for message in ["make a box", "make me a cube", "cylinder 5 10", "a box-shaped gear housing 10x5x3",
+                    "CadQuery code for a cylinder radius 5 height 10", "box 10x5x3 with a fillet",
+                    "box 10x5x3 with holes", "sphere radius 5 diameter 8", "box 10x5x3 and cylinder radius 2 height 4",
+                    "tube od 10 id 12 length 5", "plate 100x60x5 with 4 holes of 60 mm",
+                    "flange od 100 id 90 thickness 10 with bolt holes of 8", "What is a cylinder radius 5 height 10?",
+                    # Features the primitive cannot build are never dropped silently
+                    "box 10x5x3 with 4 holes of 2", "box 10x5x3 with wall thickness 1",
+                    "cylinder radius 5 height 10 with bore 4", "cylinder radius 5 height 10 with a 2 mm hole",
+                    "sphere radius 5 with 3 holes", "plate 100x60x5 with 4 holes of 6 mm and bore 10",
+                    "box 10x5x3 at 5",
+                    # Units that cannot be told apart
+                    "box 2cm x 3 x 4"]:
+        assert parse_primitive(message) is None, message
+    print("✅ Fallback test completed")
+
+
+def test_generated_geometry():
+    """The emitted code builds the requested solids and exposes every dimension as a parameter"""
+    print("🧪 Testing generated geometry...")
+    plate = parse_primitive("plate 100x60 5 mm thick with 6 holes of 5 mm")
+    assert plate["params"]["hole_count"] == 6
+    solid = build(plate["code"])
+    assert abs(solid.Volume() - (100 * 60 * 5 - 6 * math.pi * 2.5 ** 2 * 5)) < 1e-3
+    box = solid.BoundingBox()
+    assert (round(box.xlen), round(box.ylen), round(box.zlen)) == (100, 60, 5)
+
+    flange = parse_primitive("flange outer diameter 100 bore 40 12 mm thick with 8 bolt holes of 8 bolt circle 70")
+    ring = math.pi * (50 ** 2 - 20 ** 2) * 12
+    assert abs(build(flange["code"]).Volume() - (ring - 8 * math.pi * 4 ** 2 * 12)) < 1e-3
+    _, parameters = extract_parameters(flange["code"])
+    assert parameters["bolt_count"] == 8 and parameters["bolt_circle_radius"] == 35
+
+    tube = parse_primitive("pipe od 20 id 16 length 50")
+    assert abs(build(tube["code"]).Volume() - math.pi * (10 ** 2 - 8 ** 2) * 50) < 1e-3
+    print("✅ Generated geometry test completed")
+
+
+def main():
+    """Main function for running primitive fast path tests"""
+    print("🚀 Starting primitive fast path tests...")
+    test_grammar_units_and_synonyms()
+    test_anything_else_takes_the_llm_route()
+    test_generated_geometry()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for token-budgeted prompt assembly of RAG examples
+"""
+
+import ast
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from graph.prompt_assembly import (
+    assemble_examples,
+    collapse_segments,
+    compact_code,
+    count_tokens,
+    round_floats,
+)
+
+SNIPPET = (
+    "import cadquery as cq\n"
+    "wp_sketch0 = cq.Workplane(cq.Plane(cq.Vector(-0.015625, -0.0078125, 0.0), cq.Vector(1.0, 0.0, 0.0), cq.Vector(0.0, 0.0, 1.0)))\n"
+    "loop0=wp_sketch0.moveTo(0.0, 0.0)"
+    + "".join(f".lineTo(0.0{i}217105263157895, -0.0027138157894736844)" for i in range(10))
+    + ".threePointArc((0.0007948582418457166, -0.0019189575476279677), (0.0027138157894736844, -0.0027138157894736844)).close()\n"
+    "solid0=wp_sketch0.add(loop0).extrude(0.75)\n"
+    "solid=solid0"
+)
+
+
+def make_example(code, score=0.9, prompt="a plate"):
+    return {"metadata": {"code": code, "prompt": prompt}, "score": score, "source": "local_faiss"}
+
+
+def test_round_floats():
+    """Long float literals are rounded, short ones left alone"""
+    print("🧪 Testing float rounding...")
+    assert round_floats("x = 0.0027138157894736844", 4) == "x = 0.002714"
+    assert round_floats("box(10.5, 2.25, 3)", 4) == "box(10.5, 2.25, 3)"
+    assert round_floats("name_1.0", 4) == "name_1.0"
+    print("✅ Float rounding test completed")
+
+
+def test_collapse_segments_keeps_valid_python():
+    """Collapsed chains stay syntactically valid"""
+    print("🧪 Testing segment collapsing...")
+    collapsed = collapse_segments(SNIPPET, max_segments=4)
+    assert "more lineTo segments" in collapsed
+    assert collapsed.count(".lineTo(") < SNIPPET.count(".lineTo(")
+    ast.parse(collapsed)
+    ast.parse(compact_code(SNIPPET))
+    print("✅ Segment collapsing test completed")
+
+
+def test_compaction_reduces_tokens():
+    """Compacted examples use fewer tokens than the raw snippet"""
+    print("🧪 Testing compaction...")
+    raw = count_tokens(SNIPPET)
+    compacted = count_tokens(compact_code(SNIPPET))
+    print(f"📊 Raw tokens: {raw}, compacted tokens: {compacted}")
+    assert compacted < raw
+    print("✅ Compaction test completed")
+
+
+def test_assemble_examples_respects_budget():
+    """Only the examples that fit the budget are selected"""
+    print("🧪 Testing token budget...")
+    small = make_example("result = cq.Workplane('XY').box(10, 5, 3)", score=0.8)
+    large = make_example(SNIPPET * 20, score=0.95)
+
+    assembled = assemble_examples([large, small], token_budget=200)
+    assert assembled["examples"] == [small]
+    assert assembled["tokens"] <= 200
+    assert "Example 1" in assembled["text"]
+
+    assembled = assemble_examples([small, small], token_budget=5000, max_examples=1)
+    assert len(assembled["examples"]) == 1
+
+    # The baseline cap of two examples still applies within the budget
+    assembled = assemble_examples([small, small, small], token_budget=5000)
+    assert len(assembled["examples"]) == 2
+
+    assembled = assemble_examples([large], token_budget=50)
+    assert assembled["text"] == ""
+    print("✅ Token budget test completed")
+
+
+def main():
+    """Main function for running prompt assembly tests"""
+    print("🚀 Starting prompt assembly tests...")
+    test_round_floats()
+    test_collapse_segments_keeps_valid_python()
+    test_compaction_reduces_tokens()
+    test_assemble_examples_respects_budget()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
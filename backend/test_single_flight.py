@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight coalescing of identical in-flight requests
+"""
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from graph.single_flight import SingleFlight, normalize_message
+
+
+def test_normalize_message():
+    """Case, whitespace and trailing punctuation do not change the key"""
+    print("🧪 Testing message normalization...")
+    assert normalize_message("  Make me a   CUBE! ") == "make me a cube"
+    assert normalize_message("make me a cube") == normalize_message("Make me a cube.")
+    assert normalize_message("make a cube") != normalize_message("make a cylinder")
+    print("✅ Message normalization test completed")
+
+
+def test_concurrent_duplicates_share_one_computation():
+    """Concurrent callers with the same key run the work once"""
+    print("🧪 Testing coalescing...")
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"result": "cube"}
+
+    async def run():
+        return await asyncio.gather(*[flight.do("make a cube", work) for _ in range(5)])
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert [result for result, _ in results] == [{"result": "cube"}] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert flight.in_flight() == 0
+    print(f"📊 Stats: {flight.stats}")
+    print("✅ Coalescing test completed")
+
+
+def test_sequential_calls_are_not_coalesced():
+    """Once a computation finishes, the next call runs fresh"""
+    print("🧪 Testing sequential calls...")
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def run():
+        first, _ = await flight.do("key", work)
+        await asyncio.sleep(0)
+        second, _ = await flight.do("key", work)
+        return first, second
+
+    assert asyncio.run(run()) == (1, 2)
+    print("✅ Sequential calls test completed")
+
+
+def test_errors_propagate_to_all_waiters():
+    """A failing computation fails every waiter"""
+    print("🧪 Testing error propagation...")
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("kernel failure")
+
+    async def run():
+        return await asyncio.gather(*[flight.do("key", work) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    print("✅ Error propagation test completed")
+
+
+def main():
+    """Main function for running single-flight tests"""
+    print("🚀 Starting single-flight tests...")
+    test_normalize_message()
+    test_concurrent_duplicates_share_one_computation()
+    test_sequential_calls_are_not_coalesced()
+    test_errors_propagate_to_all_waiters()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
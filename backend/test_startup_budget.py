@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test script for the import-time budget (lazy loading of heavy subsystems)
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from benchmarks.import_time import IMPORT_BUDGET_SECONDS, package_totals, parse_importtime, profile_import
+
+# Without provider keys, so no LLM client library is legitimately needed at import
+NO_PROVIDERS = {"GROQ_API_KEY": None, "OPENAI_API_KEY": None, "ANTHROPIC_API_KEY": None,
+                "GENX_CLEANUP_AUTOSTART": "false"}
+
+
+def test_parse_importtime():
+    """-X importtime lines are parsed with depth and grouped per package"""
+    print("🧪 Testing importtime parsing...")
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       100 |        100 |     numpy.core\n"
+              "import time:       300 |        400 |   numpy\n"
+              "import time:      2000 |       2400 | graph.langgraph_app\n"
+              "some other stderr line\n")
+    entries = parse_importtime(stderr)
+    assert [(entry["module"], entry["depth"]) for entry in entries] == \
+        [("numpy.core", 2), ("numpy", 1), ("graph.langgraph_app", 0)]
+    assert entries[2]["cumulative_seconds"] == 0.0024
+    totals = package_totals(entries)
+    assert list(totals) == ["graph", "numpy"] and abs(totals["numpy"] - 0.0004) < 1e-9
+    print("✅ Importtime parsing test completed")
+
+
+def test_langgraph_app_import_budget():
+    """Importing the graph module stays within budget and loads no heavy subsystem"""
+    print("🧪 Testing langgraph_app import budget...")
+    profile = profile_import("graph.langgraph_app", runs=1, cwd=tempfile.mkdtemp(), env=NO_PROVIDERS)
+    print(f"⏱️ {profile['median_seconds']:.3f}s, heavy: {profile['heavy_modules_loaded']}")
+    assert profile["heavy_modules_loaded"] == []
+    assert profile["median_seconds"] <= IMPORT_BUDGET_SECONDS
+    print("✅ langgraph_app import budget test completed")
+
+
+def main():
+    """Main function for running startup budget tests"""
+    print("🚀 Starting startup budget tests...")
+    test_parse_importtime()
+    test_langgraph_app_import_budget()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test script for request tracing (span tree, JSONL export, Server-Timing)
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(__file__))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from graph import tracing
+from graph.tracing import JsonlSpanExporter
+
+
+def read_spans(path: Path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def trace_file() -> Path:
+    return Path(tempfile.mkdtemp()) / "traces" / "spans.jsonl"
+
+
+def test_span_tree_and_export():
+    """Child spans link to their parent and are exported when the root ends"""
+    print("🧪 Testing span tree...")
+    path = trace_file()
+    with tracing.start_trace("request", exporter=JsonlSpanExporter(path), path="/graph_chat") as root:
+        with tracing.span("node.code_gen"):
+            with tracing.span("retrieval.pinecone") as retrieval:
+                retrieval.set(matches=3)
+            cleaning = tracing.start_span("code_cleaning")
+            cleaning.end()
+            try:
+                with tracing.span("cad_execution"):
+                    raise ValueError("bad geometry")
+            except ValueError:
+                pass
+        assert not path.exists()
+
+    spans = {span["name"]: span for span in read_spans(path)}
+    print(f"🌳 {sorted(spans)}")
+    assert set(spans) == {"request", "node.code_gen", "retrieval.pinecone", "code_cleaning", "cad_execution"}
+    assert {span["trace_id"] for span in spans.values()} == {root.trace.trace_id}
+    assert spans["request"]["parent_id"] is None
+    assert spans["retrieval.pinecone"]["parent_id"] == spans["node.code_gen"]["span_id"]
+    assert spans["code_cleaning"]["parent_id"] == spans["node.code_gen"]["span_id"]
+    assert spans["retrieval.pinecone"]["attributes"] == {"matches": 3}
+    assert spans["cad_execution"]["status"] == "error" and "bad geometry" in spans["cad_execution"]["error"]
+
+    # Outside a trace spans are no-ops
+    with tracing.span("orphan") as orphan:
+        orphan.set(ignored=True)
+    assert tracing.current_span() is tracing.NOOP_SPAN
+    print("✅ Span tree test completed")
+
+
+def test_context_follows_tasks_and_threads():
+    """Concurrent tasks and to_thread work nest under the span that started them"""
+    print("🧪 Testing span propagation...")
+    path = trace_file()
+
+    def blocking_exec():
+        with tracing.span("cad_exec"):
+            time.sleep(0.01)
+
+    async def node(name):
+        with tracing.span(name):
+            await asyncio.sleep(0.01)
+            await asyncio.to_thread(blocking_exec)
+
+    async def request():
+        with tracing.start_trace("request", exporter=JsonlSpanExporter(path)):
+            await asyncio.gather(node("node.a"), node("node.b"))
+
+    asyncio.run(request())
+    spans = read_spans(path)
+    ids = {span["span_id"]: span["name"] for span in spans}
+    parents = sorted(ids[span["parent_id"]] for span in spans if span["name"] == "cad_exec")
+    assert parents == ["node.a", "node.b"]
+    print("✅ Span propagation test completed")
+
+
+def test_server_timing_middleware():
+    """Responses carry a per-stage Server-Timing summary and the trace id"""
+    print("🧪 Testing Server-Timing header...")
+    path = trace_file()
+    tracing.default_exporter, previous = JsonlSpanExporter(path), tracing.default_exporter
+    app = FastAPI()
+    app.middleware("http")(tracing.trace_http_request)
+
+    @app.get("/work")
+    async def work():
+        for _ in range(2):
+            with tracing.span("llm", node="help"):
+                await asyncio.sleep(0.02)
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    try:
+        client = TestClient(app)
+        response = client.get("/work")
+        header = response.headers["Server-Timing"]
+        print(f"⏱️ Server-Timing: {header}")
+        entries = {part.split(";")[0].strip(): part for part in header.split(",")}
+        assert set(entries) == {"llm", "total"}
+        assert 'desc="2 calls"' in entries["llm"]
+        assert float(entries["llm"].split("dur=")[1].split(";")[0]) >= 40
+        spans = read_spans(path)
+        assert {span["trace_id"] for span in spans} == {response.headers["X-Trace-Id"]}
+        assert [span["attributes"].get("status_code") for span in spans if span["name"] == "request"] == [200]
+
+        assert "Server-Timing" not in client.get("/health").headers
+    finally:
+        tracing.default_exporter = previous
+    print("✅ Server-Timing header test completed")
+
+
+def test_exporter_rotation():
+    """The JSONL file is rotated once it would exceed the size limit"""
+    print("🧪 Testing trace file rotation...")
+    path = trace_file()
+    exporter = JsonlSpanExporter(path, max_bytes=600)
+    for _ in range(6):
+        with tracing.start_trace("request", exporter=exporter, padding="x" * 100):
+            pass
+    rotated = path.with_name(path.name + ".1")
+    assert rotated.stat().st_size <= 600 and path.stat().st_size <= 600
+    assert 0 < len(read_spans(rotated)) + len(read_spans(path)) < 6
+    print("✅ Trace file rotation test completed")
+
+
+def main():
+    """Main function for running tracing tests"""
+    print("🚀 Starting tracing tests...")
+    test_span_tree_and_export()
+    test_context_follows_tasks_and_threads()
+    test_server_timing_middleware()
+    test_exporter_rotation()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-worker support: shared memory-mapped RAG records,
+cleanup leader election and job ownership
+"""
+
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(os.path.dirname(__file__))
+
+import pandas as pd
+
+from graph.artifacts import ArtifactIndex
+from graph.jobs import JobManager, JobStore
+from graph.parametric import ParametricStore
+from graph.sessions import SessionStore
+from graph.shared_index import SharedRecords, ensure_records_file, load_shared_records
+from graph.workers import LeaderLock, memory_usage, worker_alive, worker_id
+
+
+def test_shared_records_round_trip():
+    """Records built from the pickled DataFrame match it row for row"""
+    print("🧪 Testing shared records...")
+    tmp = Path(tempfile.mkdtemp())
+    frame = pd.DataFrame({
+        "prompt": ["a box", "a cylinder with a hole", "ünïcode flange"],
+        "code": ["result = cq.Workplane('XY').box(1, 2, 3)", "result = cq.Workplane('XY').circle(5).extrude(2)", ""],
+    })
+    with open(tmp / "vector_data.pkl", "wb") as f:
+        pickle.dump(frame, f)
+
+    records = load_shared_records(tmp / "vector_data.pkl")
+    assert len(records) == 3
+    for i, row in frame.iterrows():
+        assert records[i] == {"prompt": row["prompt"], "code": row["code"]}
+    assert records[-1]["prompt"] == "ünïcode flange"
+    try:
+        records[3]
+        assert False, "expected IndexError"
+    except IndexError:
+        pass
+
+    # Up to date: reused as is; pickle changed: rebuilt
+    built_at = (tmp / "vector_data.records").stat().st_mtime_ns
+    ensure_records_file(tmp / "vector_data.pkl")
+    assert (tmp / "vector_data.records").stat().st_mtime_ns == built_at
+    time.sleep(0.01)
+    with open(tmp / "vector_data.pkl", "wb") as f:
+        pickle.dump(frame.head(1), f)
+    assert len(SharedRecords(ensure_records_file(tmp / "vector_data.pkl"))) == 1
+    print("✅ Shared records test completed")
+
+
+def test_leader_lock_single_holder():
+    """Only one process holds the leader lock; it passes on when the leader exits"""
+    print("🧪 Testing leader lock...")
+    path = Path(tempfile.mkdtemp()) / "leader.lock"
+    holder = subprocess.Popen(
+        [sys.executable, "-c",
+         "import sys, time; sys.path.append(sys.argv[1]); from graph.workers import LeaderLock; "
+         "lock = LeaderLock(sys.argv[2]); assert lock.acquire(); print('ready', flush=True); time.sleep(30)",
+         os.path.dirname(os.path.abspath(__file__)), str(path)],
+        stdout=subprocess.PIPE, text=True)
+    try:
+        assert "ready" in [holder.stdout.readline().strip() for _ in range(2)]
+        lock = LeaderLock(path)
+        assert not lock.acquire()
+        assert not lock.held
+    finally:
+        holder.kill()
+        holder.wait()
+    assert lock.acquire()
+    assert lock.held
+    lock.release()
+    print("✅ Leader lock test completed")
+
+
+def test_orphaned_job_claimed_once():
+    """A job of a dead worker can be claimed by exactly one survivor"""
+    print("🧪 Testing job claims...")
+    store = JobStore(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    dead_owner = worker_id(dead.pid)
+    job_id = store.create_job("make a cube", owner=dead_owner)
+
+    assert worker_alive(worker_id())
+    assert not worker_alive(dead_owner)
+    assert store.claim_job(job_id, dead_owner, "host:1")
+    assert not store.claim_job(job_id, dead_owner, "host:2")
+    assert store.get_job(job_id)["owner"] == "host:1"
+    print("✅ Job claim test completed")
+
+
+def test_forked_workers_get_own_owner_and_connections():
+    """Stores and job managers built before fork() (gunicorn --preload) are per process in the workers"""
+    print("🧪 Testing fork safety...")
+    tmp = Path(tempfile.mkdtemp())
+    job_store = JobStore(tmp / "jobs.db")
+    manager = JobManager(job_store, run_fn=None)
+    stores = [job_store, ArtifactIndex(tmp, db_path=tmp / "artifacts.db"),
+              ParametricStore(tmp / "parametric.db"), SessionStore(tmp / "sessions.db")]
+    parent_connections = [store._conn for store in stores]
+    parent_owner = manager.owner
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            report = {
+                "owner": manager.owner,
+                "fresh": [store._conn is not connection for store, connection in zip(stores, parent_connections)],
+                "job": job_store.create_job("made in the child", owner=manager.owner),
+            }
+            os.write(write_fd, json.dumps(report).encode())
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        report = json.loads(pipe.read())
+    os.waitpid(pid, 0)
+
+    assert report["owner"] == worker_id(pid) != parent_owner
+    assert all(report["fresh"])
+    assert [store._conn for store in stores] == parent_connections
+    assert job_store.get_job(report["job"])["owner"] == report["owner"]
+    print("✅ Fork safety test completed")
+
+
+def test_memory_usage():
+    """Memory report includes RSS (and PSS/USS where /proc is available)"""
+    print("🧪 Testing memory usage...")
+    usage = memory_usage()
+    print(f"📊 Memory: {usage}")
+    assert usage["rss"] > 0
+    if os.path.exists("/proc/self/smaps_rollup"):
+        assert 0 < usage["pss"] <= usage["rss"]
+    print("✅ Memory usage test completed")
+
+
+def main():
+    """Main function for running multi-worker tests"""
+    print("🚀 Starting multi-worker tests...")
+    test_shared_records_round_trip()
+    test_leader_lock_single_holder()
+    test_orphaned_job_claimed_once()
+    test_forked_workers_get_own_owner_and_connections()
+    test_memory_usage()
+    print("🎉 All tests completed!")
+
+
+if __name__ == "__main__":
+    main()
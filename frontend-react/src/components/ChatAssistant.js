@@ -173,6 +173,7 @@ const ChatAssistant = () => {
   const [inputValue, setInputValue] = useState('');
   const [isMinimized, setIsMinimized] = useState(false);
   const [isLoading, setIsLoading] = useState(false);
+  const [sessionId, setSessionId] = useState(null);
   const messagesEndRef = useRef(null);
   const inputRef = useRef(null);
 
@@ -196,9 +197,11 @@ const ChatAssistant = () => {
 
     try {
       // Send to backend
-      const response = await axios.post(getApiUrl('/graph_chat'), { message });
+      // The session lets follow-ups ("make it taller") edit the last model
+      const response = await axios.post(getApiUrl('/graph_chat'), { message, session_id: sessionId });
       
       if (response.data.success) {
+        setSessionId(response.data.session_id);
         const assistantResponse = response.data.response;
         
         // Parse the response
@@ -243,6 +246,7 @@ const ChatAssistant = () => {
                 url: getModelUrl(modelUrl),
                 type: modelType,
                 modelId: modelData.model_id,
+                sessionId: response.data.session_id,
                 prompt: message,
                 modelType: modelData.model_type,
                 similarityScore: modelData.similarity_score
@@ -1,12 +1,16 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import styled from 'styled-components';
 import { 
   Layers, 
   ChevronRight, 
   ChevronDown,
   Trash2,
-  Copy
+  Copy,
+  RefreshCw
 } from 'lucide-react';
+import toast from 'react-hot-toast';
+import axios from 'axios';
+import { getApiUrl, getModelUrl } from '../config';
 
 const SidebarContainer = styled.div`
   width: 280px;
@@ -133,13 +137,99 @@ const Input = styled.input`
   }
 `;
 
+const ApplyButton = styled.button`
+  background: #4CAF50;
+  border: none;
+  color: white;
+  padding: 6px 12px;
+  margin-top: 8px;
+  border-radius: 3px;
+  font-size: 12px;
+  font-family: inherit;
+  cursor: pointer;
+  display: flex;
+  align-items: center;
+  gap: 6px;
+
+  &:disabled {
+    background: #555;
+    cursor: default;
+  }
+`;
+
 const Sidebar = () => {
   const [expandedSections, setExpandedSections] = useState({
     models: true,
     properties: true,
+    parameters: true,
     settings: false
   });
 
+  // Named parameters of the generated model in the viewer
+  const [activeModel, setActiveModel] = useState(null);
+  const [parameters, setParameters] = useState({});
+  const [edits, setEdits] = useState({});
+  const [isApplying, setIsApplying] = useState(false);
+
+  useEffect(() => {
+    const handleModelLoad = async (event) => {
+      const model = event.detail.model;
+      if (!model.modelId) return;
+      setActiveModel(model);
+      setEdits({});
+      try {
+        const response = await axios.get(getApiUrl(`/models/${model.modelId}/parameters`));
+        setParameters(response.data.parameters);
+      } catch {
+        setParameters({});  // Not a parametric model
+      }
+    };
+
+    window.addEventListener('loadModel', handleModelLoad);
+    return () => window.removeEventListener('loadModel', handleModelLoad);
+  }, []);
+
+  const handleParameterChange = (name, value) => {
+    setEdits(prev => ({ ...prev, [name]: value }));
+  };
+
+  const handleApplyParameters = async () => {
+    const changed = {};
+    for (const [name, value] of Object.entries(edits)) {
+      const number = parseFloat(value);
+      if (!Number.isNaN(number) && number !== parameters[name]) {
+        changed[name] = number;
+      }
+    }
+    if (Object.keys(changed).length === 0) return;
+
+    setIsApplying(true);
+    try {
+      // Re-runs the stored code with the new values; no LLM involved
+      const response = await axios.post(getApiUrl(`/models/${activeModel.modelId}/parameters`), {
+        parameters: changed,
+        session_id: activeModel.sessionId
+      });
+      const result = response.data.response;
+      window.dispatchEvent(new CustomEvent('loadModel', {
+        detail: {
+          model: {
+            ...activeModel,
+            url: getModelUrl(result.step_url),
+            type: 'step',
+            modelId: result.model_id,
+            modelType: result.model_type
+          }
+        }
+      }));
+      toast.success(result.text);
+    } catch (error) {
+      toast.error(error.response?.data?.error || 'Failed to update parameters');
+    } finally {
+      setIsApplying(false);
+    }
+  };
+
   const [selectedModel, setSelectedModel] = useState('model_1');
   const [models] = useState([
     { id: 'model_1', name: 'Sphere', type: 'sphere', visible: true },
@@ -295,6 +385,36 @@ const Sidebar = () => {
         )}
       </SidebarSection>
 
+      {/* Parameters Section */}
+      {Object.keys(parameters).length > 0 && (
+        <SidebarSection>
+          <SectionHeader onClick={() => toggleSection('parameters')}>
+            Parameters ({Object.keys(parameters).length})
+            {expandedSections.parameters ? <ChevronDown size={16} /> : <ChevronRight size={16} />}
+          </SectionHeader>
+          {expandedSections.parameters && (
+            <SectionContent>
+              {Object.entries(parameters).map(([name, value]) => (
+                <PropertyItem key={name}>
+                  <PropertyLabel>{name}:</PropertyLabel>
+                  <Input
+                    type="number"
+                    step={Number.isInteger(value) ? 1 : 0.1}
+                    value={edits[name] ?? value}
+                    onChange={(e) => handleParameterChange(name, e.target.value)}
+                    onKeyDown={(e) => e.key === 'Enter' && handleApplyParameters()}
+                  />
+                </PropertyItem>
+              ))}
+              <ApplyButton onClick={handleApplyParameters} disabled={isApplying}>
+                <RefreshCw size={12} />
+                {isApplying ? 'Updating...' : 'Apply'}
+              </ApplyButton>
+            </SectionContent>
+          )}
+        </SidebarSection>
+      )}
+
       {/* Settings Section */}
       <SidebarSection>
         <SectionHeader onClick={() => toggleSection('settings')}>
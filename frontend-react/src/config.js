@@ -20,6 +20,7 @@ const config = {
     health: '/health',
     apiInfo: '/api/info',
     models: '/list_generated_models',
+    modelParameters: '/models/{model_id}/parameters',
     cleanupStats: '/cleanup/stats',
     cleanupManual: '/cleanup/manual'
   }